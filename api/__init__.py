@@ -0,0 +1,9 @@
+"""
+API HTTP do sistema de estoque (sem interface gráfica)
+
+    python cli.py api --porta 8080
+
+Expõe produtos, movimentações, alertas e relatórios em JSON para coletores,
+leitores de código de barras e outros sistemas, reaproveitando o
+``EstoqueModel`` e o pool de conexões de ``DatabaseConfig``.
+"""
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from controllers.exportacao import ExportadorDados
+
+logger = logging.getLogger("estoque.api")
+
+
+class ErroHTTP(Exception):
+    """Erro que vira uma resposta JSON ``{"erro": mensagem}`` com o status dado"""
+
+    def __init__(self, status: int, mensagem: str, **detalhes):
+        super().__init__(mensagem)
+        self.status = status
+        self.detalhes = detalhes
+
+
+class Requisicao:
+    """Requisição HTTP já lida: método, caminho, parâmetros de consulta e corpo"""
+
+    def __init__(self, metodo: str, alvo: str, versao: str, cabecalhos: Dict[str, str], corpo: bytes):
+        partes = urlsplit(alvo)
+        self.metodo = metodo
+        self.caminho = unquote(partes.path)
+        self.consulta = dict(parse_qsl(partes.query))
+        self.versao = versao
+        self.cabecalhos = cabecalhos
+        self.corpo = corpo
+
+    @property
+    def manter_conexao(self) -> bool:
+        conexao = self.cabecalhos.get('connection', '').lower()
+        if self.versao == 'HTTP/1.0':
+            return conexao == 'keep-alive'
+        return conexao != 'close'
+
+    def json(self):
+        """Corpo decodificado como JSON"""
+        if not self.corpo:
+            raise ErroHTTP(400, "Corpo JSON obrigatório")
+        try:
+            return json.loads(self.corpo)
+        except (UnicodeDecodeError, ValueError):
+            raise ErroHTTP(400, "Corpo não é um JSON válido")
+
+
+class Resposta:
+    """Resposta completa, com o corpo já em memória"""
+
+    def __init__(self, corpo: bytes = b"", status: int = 200,
+                 tipo: str = "application/json; charset=utf-8"):
+        self.corpo = corpo
+        self.status = status
+        self.tipo = tipo
+
+    @staticmethod
+    def json(dados, status: int = 200) -> 'Resposta':
+        corpo = json.dumps(dados, ensure_ascii=False, default=ExportadorDados._valor_json)
+        return Resposta(corpo.encode('utf-8'), status)
+
+
+class RespostaFluxo:
+    """
+    Resposta enviada em partes (Transfer-Encoding: chunked)
+
+    ``partes`` é um iterador assíncrono de bytes; cada parte é escrita
+    assim que produzida, respeitando o ritmo de leitura do cliente.
+    """
+
+    def __init__(self, partes: AsyncIterator[bytes], tipo: str, status: int = 200):
+        self.partes = partes
+        self.tipo = tipo
+        self.status = status
+
+
+Despachante = Callable[[Requisicao], Awaitable[Union[Resposta, RespostaFluxo]]]
+
+
+class ServidorHTTP:
+    """
+    Servidor HTTP/1.1 mínimo sobre ``asyncio`` (keep-alive e respostas em fluxo)
+
+    Só faz o protocolo: cada requisição é entregue ao ``despachar``, que
+    devolve a resposta. Erros ``ErroHTTP`` viram respostas JSON; qualquer
+    outra exceção vira 500 e é registrada no log.
+    """
+
+    def __init__(self, despachar: Despachante, host: str = "127.0.0.1", porta: int = 8080,
+                 max_corpo: int = 10 * 1024 * 1024, ocioso_s: float = 60.0):
+        self.despachar = despachar
+        self.host = host
+        self.porta = porta
+        self.max_corpo = max_corpo
+        self.ocioso_s = ocioso_s
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        # Com porta 0 o sistema escolhe uma livre
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self):
+        """Inicia (se preciso) e atende até ser cancelado"""
+        if self._servidor is None:
+            await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def fechar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+
+    async def _ler(self, reader: asyncio.StreamReader) -> Optional[Requisicao]:
+        """Lê uma requisição; None se o cliente fechou a conexão"""
+        try:
+            cabeca = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.ocioso_s)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErroHTTP(431, "Cabeçalhos grandes demais")
+
+        linhas = cabeca.decode('latin-1').split("\r\n")
+        try:
+            metodo, alvo, versao = linhas[0].split(" ")
+        except ValueError:
+            raise ErroHTTP(400, "Linha de requisição inválida")
+
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if linha:
+                nome, _, valor = linha.partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+        try:
+            tamanho = int(cabecalhos.get('content-length', 0))
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido")
+        if tamanho > self.max_corpo:
+            raise ErroHTTP(413, "Corpo grande demais")
+        corpo = await reader.readexactly(tamanho) if tamanho else b""
+
+        return Requisicao(metodo.upper(), alvo, versao, cabecalhos, corpo)
+
+    @staticmethod
+    def _cabecalho(status: int, extras: Dict[str, str]) -> bytes:
+        linhas = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        linhas += [f"{nome}: {valor}" for nome, valor in extras.items()]
+        return ("\r\n".join(linhas) + "\r\n\r\n").encode('latin-1')
+
+    @staticmethod
+    def _erro(erro: ErroHTTP) -> Resposta:
+        return Resposta.json({'erro': str(erro), **erro.detalhes}, erro.status)
+
+    async def _escrever(self, writer: asyncio.StreamWriter, resposta, manter: bool,
+                        partes_http11: bool = True) -> bool:
+        """Envia a resposta; retorna se a conexão pode ser reaproveitada"""
+        if isinstance(resposta, RespostaFluxo) and not partes_http11:
+            # HTTP/1.0 não conhece chunked: o fim do corpo é o fechamento
+            manter = False
+        conexao = "keep-alive" if manter else "close"
+
+        if isinstance(resposta, Resposta):
+            writer.write(self._cabecalho(resposta.status, {
+                'Content-Type': resposta.tipo,
+                'Content-Length': str(len(resposta.corpo)),
+                'Connection': conexao,
+            }) + resposta.corpo)
+            await writer.drain()
+            return manter
+
+        partes = resposta.partes
+        try:
+            extras = {'Content-Type': resposta.tipo, 'Connection': conexao}
+            if partes_http11:
+                extras['Transfer-Encoding'] = 'chunked'
+            writer.write(self._cabecalho(resposta.status, extras))
+            try:
+                async for parte in partes:
+                    if parte:
+                        writer.write(b"%x\r\n%s\r\n" % (len(parte), parte) if partes_http11 else parte)
+                        await writer.drain()
+            except ConnectionError:
+                return False
+            except Exception:
+                # Cabeçalho já enviado: só resta interromper a resposta
+                logger.exception("Falha no meio de uma resposta em fluxo")
+                return False
+            if partes_http11:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+            return manter
+        finally:
+            # Cliente desconectado no meio: libera o cursor e a conexão do banco
+            fechar = getattr(partes, 'aclose', None)
+            if fechar is not None:
+                await fechar()
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler(reader)
+                except ErroHTTP as e:
+                    await self._escrever(writer, self._erro(e), False)
+                    break
+                if requisicao is None:
+                    break
+
+                try:
+                    resposta = await self.despachar(requisicao)
+                except ErroHTTP as e:
+                    resposta = self._erro(e)
+                except Exception:
+                    logger.exception("Erro ao atender %s %s", requisicao.metodo, requisicao.caminho)
+                    resposta = Resposta.json({'erro': "Erro interno"}, 500)
+
+                if not await self._escrever(writer, resposta, requisicao.manter_conexao,
+                                            requisicao.versao != 'HTTP/1.0'):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
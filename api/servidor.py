@@ -0,0 +1,338 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from api.protocolo import ErroHTTP, Requisicao, Resposta, RespostaFluxo, ServidorHTTP
+from config.database import DatabaseConfig, PoolEsgotadoError
+from controllers.exportacao import ExportadorDados
+from models.estoque_model import EstoqueModel, MovimentacaoLoteError
+
+logger = logging.getLogger("estoque.api")
+
+
+class _FormatadorLinhas:
+    """Serializa lotes de linhas do modelo em JSON Lines ou CSV (cabeçalho uma vez)"""
+
+    TIPOS = {'jsonl': "application/x-ndjson; charset=utf-8", 'csv': "text/csv; charset=utf-8"}
+
+    def __init__(self, formato: str):
+        if formato not in self.TIPOS:
+            raise ErroHTTP(400, f"Formato inválido: {formato!r} (use jsonl ou csv)")
+        self.formato = formato
+        self.tipo = self.TIPOS[formato]
+        self._buffer = io.StringIO()
+        self._escritor = None
+
+    def formatar(self, linhas: Iterable[Dict]) -> bytes:
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        for linha in linhas:
+            if self.formato == 'jsonl':
+                buffer.write(json.dumps(linha, ensure_ascii=False, default=ExportadorDados._valor_json))
+                buffer.write("\n")
+            else:
+                if self._escritor is None:
+                    self._escritor = csv.DictWriter(buffer, fieldnames=list(linha))
+                    self._escritor.writeheader()
+                self._escritor.writerow(linha)
+        return buffer.getvalue().encode('utf-8')
+
+
+class ServicoEstoque:
+    """
+    Rotas da API sobre o ``EstoqueModel``
+
+    O modelo é bloqueante, então cada chamada roda em um pool de
+    ``workers`` threads. Relatórios longos saem em fluxo, lote a lote, em
+    threads próprias e no máximo ``max_fluxos`` ao mesmo tempo (cada um
+    prende uma conexão do pool enquanto dura). Por padrão os fluxos ficam
+    com metade do pool de conexões e os workers com o resto, de modo que
+    ``workers + max_fluxos`` não passa do pool e nenhuma thread fica
+    esperando conexão. Requisições além de ``workers + fila`` em andamento
+    recebem 503 na hora, em vez de enfileirar sem limite.
+    """
+
+    LINHAS_POR_PARTE = 1000
+    LIMITE_PAGINA_MAX = 1000
+
+    def __init__(self, workers: Optional[int] = None, fila: int = 64, max_fluxos: Optional[int] = None):
+        tamanho_pool = DatabaseConfig.POOL_CONFIG['tamanho']
+        self.max_fluxos = max_fluxos or max(1, tamanho_pool // 2)
+        self.workers = workers or max(1, tamanho_pool - self.max_fluxos)
+        if self.workers + self.max_fluxos > tamanho_pool:
+            logger.warning("workers (%d) + fluxos (%d) acima do pool de conexões (%d): "
+                           "requisições podem esperar conexão", self.workers, self.max_fluxos, tamanho_pool)
+        self.limite_pendentes = self.workers + fila
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api-banco")
+        self.executor_fluxos = ThreadPoolExecutor(max_workers=self.max_fluxos, thread_name_prefix="api-fluxo")
+        self._pendentes = 0
+        self._fluxos = asyncio.Semaphore(self.max_fluxos)
+
+        self.rotas = [
+            ('GET', r"/saude", self.saude),
+            ('GET', r"/produtos", self.listar_produtos),
+            ('POST', r"/produtos", self.adicionar_produto),
+            ('GET', r"/produtos/(\d+)", self.obter_produto),
+            ('POST', r"/movimentacoes", self.registrar_movimentacao),
+            ('GET', r"/alertas", self.alertas),
+            ('GET', r"/relatorios/movimentacoes", self.relatorio_movimentacoes),
+            ('GET', r"/relatorios/totais", self.relatorio_totais),
+            ('GET', r"/relatorios/resumo", self.relatorio_resumo),
+            ('GET', r"/relatorios/estoque-em", self.relatorio_estoque_em),
+        ]
+        self._rotas = [(metodo, re.compile(padrao + "/?"), funcao) for metodo, padrao, funcao in self.rotas]
+
+    def encerrar(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor_fluxos.shutdown(wait=True, cancel_futures=True)
+
+    async def despachar(self, requisicao: Requisicao):
+        metodos = []
+        for metodo, padrao, funcao in self._rotas:
+            encontrado = padrao.fullmatch(requisicao.caminho)
+            if encontrado:
+                if metodo == requisicao.metodo:
+                    return await funcao(requisicao, *encontrado.groups())
+                metodos.append(metodo)
+        if metodos:
+            raise ErroHTTP(405, f"Método não permitido (use {', '.join(metodos)})")
+        raise ErroHTTP(404, "Rota não encontrada")
+
+    async def _executar(self, funcao: Callable, *args, executor: Optional[ThreadPoolExecutor] = None):
+        """Roda uma chamada bloqueante do modelo no pool de workers (ou no indicado)"""
+        if self._pendentes >= self.limite_pendentes:
+            raise ErroHTTP(503, "Servidor ocupado, tente novamente")
+        self._pendentes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor or self.executor, funcao, *args)
+        except (ValueError, MovimentacaoLoteError, PoolEsgotadoError) as e:
+            raise self._traduzir_erro(e)
+        except Exception as e:
+            # O modelo sinaliza regras de negócio (estoque insuficiente,
+            # produto inexistente) com Exception simples
+            if type(e) is Exception:
+                raise ErroHTTP(409, str(e))
+            raise
+        finally:
+            self._pendentes -= 1
+
+    @staticmethod
+    def _traduzir_erro(erro: Exception) -> ErroHTTP:
+        if isinstance(erro, MovimentacaoLoteError):
+            return ErroHTTP(422, "Lote rejeitado",
+                            erros=[{'linha': i + 1, 'mensagem': m} for i, m in erro.erros])
+        if isinstance(erro, PoolEsgotadoError):
+            return ErroHTTP(503, str(erro))
+        return ErroHTTP(400, str(erro))
+
+    async def _fluxo(self, criar: Callable[[], Iterator[Dict]], formatador: _FormatadorLinhas):
+        """Puxa o iterador do modelo em lotes nas threads de fluxo e entrega cada lote serializado"""
+        loop = asyncio.get_running_loop()
+
+        def proxima_parte(linhas: Iterator[Dict]) -> bytes:
+            lote = []
+            for linha in linhas:
+                lote.append(linha)
+                if len(lote) >= self.LINHAS_POR_PARTE:
+                    break
+            return formatador.formatar(lote) if lote else b""
+
+        async with self._fluxos:
+            linhas = await self._executar(criar, executor=self.executor_fluxos)
+            try:
+                while True:
+                    parte = await self._executar(proxima_parte, linhas, executor=self.executor_fluxos)
+                    if not parte:
+                        break
+                    yield parte
+            finally:
+                # Encerra o cursor nas threads de fluxo; a conexão volta ao pool
+                await loop.run_in_executor(self.executor_fluxos, linhas.close)
+
+    # Conversão de parâmetros
+
+    @staticmethod
+    def _inteiro(valor, campo: str, minimo: Optional[int] = None) -> int:
+        if isinstance(valor, bool):
+            raise ErroHTTP(400, f"{campo} deve ser um número inteiro")
+        try:
+            numero = int(valor)
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, f"{campo} deve ser um número inteiro")
+        if minimo is not None and numero < minimo:
+            raise ErroHTTP(400, f"{campo} deve ser maior ou igual a {minimo}")
+        return numero
+
+    @staticmethod
+    def _ids(texto: Optional[str]) -> Optional[List[int]]:
+        if not texto:
+            return None
+        return [ServicoEstoque._inteiro(i, "ids") for i in texto.split(",") if i.strip()]
+
+    @staticmethod
+    def _usuario(requisicao: Requisicao, dados: Dict) -> str:
+        return str(dados.get('usuario') or requisicao.cabecalhos.get('x-usuario') or "api")[:50]
+
+    # Rotas
+
+    async def saude(self, requisicao: Requisicao):
+        """Estado do serviço e do pool de conexões"""
+        return Resposta.json({
+            'status': 'ok',
+            'backend': DatabaseConfig.BACKEND,
+            'workers': self.workers,
+            'max_fluxos': self.max_fluxos,
+            'pendentes': self._pendentes,
+            'pool': DatabaseConfig.estatisticas_pool(),
+        })
+
+    async def listar_produtos(self, requisicao: Requisicao):
+        """Página de produtos por nome; a próxima página parte de ``apos_nome``/``apos_id``"""
+        consulta = requisicao.consulta
+        limite = min(self._inteiro(consulta.get('limite', 100), "limite", 1), self.LIMITE_PAGINA_MAX)
+        apos = None
+        if 'apos_id' in consulta:
+            apos = (consulta.get('apos_nome', ''), self._inteiro(consulta['apos_id'], "apos_id"))
+
+        produtos = await self._executar(EstoqueModel.listar_produtos_pagina, limite, apos)
+        proxima = None
+        if len(produtos) == limite:
+            proxima = {'apos_nome': produtos[-1]['nome_produto'], 'apos_id': produtos[-1]['id_produto']}
+        return Resposta.json({'produtos': produtos, 'proxima': proxima})
+
+    async def obter_produto(self, requisicao: Requisicao, id_produto: str):
+        produto = await self._executar(EstoqueModel.obter_produto, int(id_produto))
+        if produto is None:
+            raise ErroHTTP(404, f"Produto ID {id_produto} não encontrado")
+        return Resposta.json(produto)
+
+    async def adicionar_produto(self, requisicao: Requisicao):
+        dados = requisicao.json()
+        nome = str(dados.get('nome_produto') or "").strip()
+        if not nome:
+            raise ErroHTTP(400, "nome_produto é obrigatório")
+        qtd_minima = self._inteiro(dados.get('qtd_minima', 10), "qtd_minima", 0)
+        try:
+            preco = float(dados.get('preco_unitario', 0))
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, "preco_unitario deve ser numérico")
+
+        id_produto = await self._executar(EstoqueModel.adicionar_produto, nome,
+                                          str(dados.get('descricao') or ""), qtd_minima, preco)
+        return Resposta.json({'id_produto': id_produto}, 201)
+
+    def _movimentacao(self, item) -> Dict:
+        """Monta uma movimentação só com os campos aceitos pela API"""
+        if not isinstance(item, dict):
+            raise ErroHTTP(400, "Cada movimentação deve ser um objeto JSON")
+        tipo = str(item.get('tipo_movimentacao', '')).upper()
+        if tipo not in ('ENTRADA', 'SAIDA'):
+            raise ErroHTTP(400, "tipo_movimentacao deve ser ENTRADA ou SAIDA")
+        return {
+            'id_produto': self._inteiro(item.get('id_produto'), "id_produto"),
+            'tipo_movimentacao': tipo,
+            'quantidade': self._inteiro(item.get('quantidade'), "quantidade", 1),
+            'observacao': str(item.get('observacao') or ""),
+        }
+
+    async def registrar_movimentacao(self, requisicao: Requisicao):
+        """
+        Registra uma movimentação, ou um lote em ``{"movimentacoes": [...]}``
+
+        O lote é atômico (``EstoqueModel.registrar_movimentacoes``): com
+        qualquer linha inválida nada é gravado e a resposta 422 lista os erros.
+        """
+        dados = requisicao.json()
+        if not isinstance(dados, dict):
+            raise ErroHTTP(400, "Envie um objeto JSON")
+        usuario = self._usuario(requisicao, dados)
+
+        if 'movimentacoes' in dados:
+            itens = dados['movimentacoes']
+            if not isinstance(itens, list) or not itens:
+                raise ErroHTTP(400, "movimentacoes deve ser uma lista não vazia")
+            movimentacoes, erros = [], []
+            for i, item in enumerate(itens):
+                try:
+                    movimentacoes.append(self._movimentacao(item))
+                except ErroHTTP as e:
+                    erros.append({'linha': i + 1, 'mensagem': str(e)})
+            if erros:
+                raise ErroHTTP(422, "Lote rejeitado", erros=erros)
+            gravadas = await self._executar(EstoqueModel.registrar_movimentacoes, movimentacoes, usuario)
+            return Resposta.json({'registradas': gravadas}, 201)
+
+        mov = self._movimentacao(dados)
+        id_produto, tipo, quantidade = mov['id_produto'], mov['tipo_movimentacao'], mov['quantidade']
+        registrar = EstoqueModel.registrar_entrada if tipo == 'ENTRADA' else EstoqueModel.registrar_saida
+
+        def gravar() -> Optional[Dict]:
+            registrar(id_produto, quantidade, mov['observacao'], usuario)
+            # O saldo gravado já está no cache do modelo
+            return EstoqueModel.obter_produto(id_produto)
+
+        produto = await self._executar(gravar)
+        return Resposta.json({
+            'id_produto': id_produto,
+            'tipo_movimentacao': tipo,
+            'quantidade': quantidade,
+            'qtd_estoque': produto['qtd_estoque'] if produto else None,
+        }, 201)
+
+    async def alertas(self, requisicao: Requisicao):
+        """Produtos abaixo do estoque mínimo, do maior déficit ao menor"""
+        return Resposta.json(await self._executar(EstoqueModel.produtos_criticos))
+
+    async def relatorio_movimentacoes(self, requisicao: Requisicao):
+        """Movimentações do período em fluxo (JSON Lines ou CSV), mais recentes primeiro"""
+        consulta = requisicao.consulta
+        formatador = _FormatadorLinhas(consulta.get('formato', 'jsonl'))
+        limite = consulta.get('limite')
+        limite = self._inteiro(limite, "limite", 1) if limite else None
+        # Datas validadas antes do cabeçalho sair, para que o erro vire 400
+        try:
+            EstoqueModel._intervalo_datas(consulta.get('inicio'), consulta.get('fim'))
+        except ValueError as e:
+            raise ErroHTTP(400, str(e))
+
+        # Função nomeada: o nome vira a origem do fluxo na instrumentação
+        def api_movimentacoes():
+            return EstoqueModel.iterar_movimentacoes(consulta.get('inicio'), consulta.get('fim'), limite)
+
+        return RespostaFluxo(self._fluxo(api_movimentacoes, formatador), formatador.tipo)
+
+    async def relatorio_totais(self, requisicao: Requisicao):
+        consulta = requisicao.consulta
+        return Resposta.json(await self._executar(
+            EstoqueModel.totais_periodo, consulta.get('inicio'), consulta.get('fim')))
+
+    async def relatorio_resumo(self, requisicao: Requisicao):
+        consulta = requisicao.consulta
+        return Resposta.json(await self._executar(
+            EstoqueModel.resumo_por_produto, consulta.get('inicio'), consulta.get('fim')))
+
+    async def relatorio_estoque_em(self, requisicao: Requisicao):
+        consulta = requisicao.consulta
+        return Resposta.json(await self._executar(
+            EstoqueModel.estoque_em, consulta.get('data'), self._ids(consulta.get('ids'))))
+
+
+async def servir(host: str = "127.0.0.1", porta: int = 8080, workers: Optional[int] = None,
+                 fila: int = 64, ao_iniciar: Callable[[ServidorHTTP], None] = None):
+    """Sobe a API e atende até ser cancelada"""
+    servico = ServicoEstoque(workers, fila)
+    servidor = ServidorHTTP(servico.despachar, host, porta)
+    await servidor.iniciar()
+    if ao_iniciar:
+        ao_iniciar(servidor)
+    try:
+        await servidor.servir()
+    finally:
+        await servidor.fechar()
+        servico.encerrar()
@@ -0,0 +1,9 @@
+"""
+Benchmarks do sistema de estoque
+
+    python -m benchmarks.gerador      # popula o banco com dados sintéticos
+    python -m benchmarks.executar     # mede os cenários e grava/compara JSON
+
+Os comandos usam o banco configurado pelas variáveis DB_* (veja o README):
+aponte-as para um MySQL local ou compatível dedicado aos benchmarks.
+"""
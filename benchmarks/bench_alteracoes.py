@@ -0,0 +1,130 @@
+"""
+Benchmark: custo no banco do acompanhamento de alterações com vários clientes
+
+Uso:
+    python -m benchmarks.bench_alteracoes [--produtos 20000] [--clientes 1,10,50]
+                                          [--duracao 20] [--escritas 5]
+
+Importa um catálogo sintético e, para cada quantidade de clientes, roda uma
+thread por cliente consultando ``alteracoes_produtos`` no ritmo do
+``AcompanhamentoAlteracoes`` (intervalo base com recuo quando ocioso)
+enquanto um posto grava ``--escritas`` entradas por segundo. Mostra
+consultas por segundo, linhas lidas por consulta, latência (p50/p95) e
+atraso até o produto alterado chegar aos clientes. Para comparação, mede a
+recarga completa (página de produtos + alertas) que cada cliente faria.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.carga_api import percentil
+from config.database import DatabaseConfig
+from controllers.alteracoes import AcompanhamentoAlteracoes
+from models.estoque_model import EstoqueModel
+
+
+def criar_catalogo(quantidade: int) -> list:
+    EstoqueModel.importar_produtos([
+        {'nome_produto': f"Bench Alterações {i:06d}", 'descricao': "Produto do benchmark",
+         'qtd_minima': 0, 'preco_unitario': 1.0, 'qtd_estoque': 0}
+        for i in range(quantidade)
+    ], usuario="benchmark")
+    return [p['id_produto'] for p in EstoqueModel.iterar_produtos()]
+
+
+def cliente(acompanhamento: AcompanhamentoAlteracoes, fim: float, gravados: dict,
+            tempos: list, atrasos: list, lock: threading.Lock):
+    acompanhamento.aplicar(*EstoqueModel.alteracoes_produtos())
+    while True:
+        espera = acompanhamento.proximo_ms() / 1000
+        if time.monotonic() + espera >= fim:
+            return
+        time.sleep(espera)
+
+        inicio = time.perf_counter()
+        resultado = EstoqueModel.alteracoes_produtos(acompanhamento.desde(), acompanhamento.limite)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        alterados, _ = acompanhamento.aplicar(*resultado)
+
+        agora = time.monotonic()
+        with lock:
+            tempos.append(decorrido)
+            atrasos.extend(agora - gravados[p['id_produto']]
+                           for p in alterados if p['id_produto'] in gravados)
+
+
+def rodada(ids: list, clientes: int, duracao: float, escritas: float, config: dict) -> dict:
+    gravados, tempos, atrasos = {}, [], []
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+    acompanhamentos = [AcompanhamentoAlteracoes(**config) for _ in range(clientes)]
+    threads = [threading.Thread(target=cliente, args=(a, fim, gravados, tempos, atrasos, lock))
+               for a in acompanhamentos]
+    for thread in threads:
+        thread.start()
+
+    rnd = random.Random(42)
+    while escritas > 0 and time.monotonic() < fim:
+        id_produto = rnd.choice(ids)
+        EstoqueModel.registrar_entrada(id_produto, 1, "benchmark", "benchmark")
+        with lock:
+            gravados[id_produto] = time.monotonic()
+        time.sleep(1 / escritas)
+    for thread in threads:
+        thread.join()
+
+    tempos.sort()
+    atrasos.sort()
+    linhas = sum(a.linhas_lidas for a in acompanhamentos)
+    return {
+        'consultas_s': len(tempos) / duracao,
+        'linhas_consulta': linhas / len(tempos) if tempos else 0.0,
+        'p50_ms': percentil(tempos, 50),
+        'p95_ms': percentil(tempos, 95),
+        'atraso_p95_s': percentil(atrasos, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--produtos', type=int, default=20000)
+    parser.add_argument('--clientes', default="1,10,50")
+    parser.add_argument('--duracao', type=float, default=20.0, help="Segundos por rodada")
+    parser.add_argument('--escritas', type=float, default=5.0, help="Entradas por segundo (0: ocioso)")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"📦 Importando {args.produtos} produtos...")
+    ids = criar_catalogo(args.produtos)
+    config = DatabaseConfig.ALTERACOES_CONFIG
+
+    # Referência: o que cada clique em "Atualizar Lista" custa
+    recargas = []
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        EstoqueModel.listar_produtos_pagina(200)
+        EstoqueModel.produtos_criticos()
+        recargas.append((time.perf_counter() - inicio) * 1000)
+    recargas.sort()
+
+    print("=" * 86)
+    print(f"{'Clientes':>8} {'Consultas/s':>12} {'Linhas/cons.':>13} {'p50 (ms)':>10} "
+          f"{'p95 (ms)':>10} {'Atraso p95 (s)':>15}")
+    print("-" * 86)
+    for clientes in [int(c) for c in args.clientes.split(",")]:
+        medido = rodada(ids, clientes, args.duracao, args.escritas, config)
+        print(f"{clientes:>8} {medido['consultas_s']:>12.1f} {medido['linhas_consulta']:>13.1f} "
+              f"{medido['p50_ms']:>10.2f} {medido['p95_ms']:>10.2f} {medido['atraso_p95_s']:>15.2f}")
+    print("=" * 86)
+    print(f"Recarga completa (página + alertas): p50 {percentil(recargas, 50):.2f} ms, "
+          f"p95 {percentil(recargas, 95):.2f} ms por cliente e atualização "
+          f"(intervalo base {config['intervalo']:g} s, máximo {config['intervalo_max']:g} s)")
+
+
+if __name__ == '__main__':
+    main()
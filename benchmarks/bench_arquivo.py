@@ -0,0 +1,125 @@
+"""
+Benchmark: latência dos relatórios com o histórico crescendo, antes e depois do arquivamento
+
+Uso:
+    python -m benchmarks.bench_arquivo [--recentes 20000] [--etapas 4]
+                                       [--por-etapa 200000] [--meses-por-etapa 6]
+
+Grava ``--recentes`` movimentações nos últimos 30 dias e mede o relatório do
+período, as 500 mais recentes e os totais. Depois, a cada etapa, acrescenta
+``--por-etapa`` movimentações em meses mais antigos e mede de novo: com os
+filtros de período sobre a coluna nua (partições mensais no MySQL, índice de
+data no SQLite) a latência deve ficar estável. Por fim arquiva tudo antes do
+mês passado, mostra a vazão do arquivamento e mede outra vez, incluindo um
+relatório de um mês já arquivado.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_movimentacoes_lote import criar_produtos
+from benchmarks.carga_api import percentil
+from models.estoque_model import EstoqueModel
+
+TAMANHO_LOTE = 5000
+
+
+def gravar_historico(ids: list, quantidade: int, inicio: datetime, fim: datetime,
+                     rnd: random.Random):
+    """Entradas com data espalhada em [inicio, fim), pelo caminho de lote do modelo"""
+    passo = (fim - inicio).total_seconds() / max(quantidade, 1)
+    for base in range(0, quantidade, TAMANHO_LOTE):
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': rnd.choice(ids), 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1,
+             'observacao': 'benchmark', 'data_movimentacao': inicio + timedelta(seconds=i * passo)}
+            for i in range(base, min(base + TAMANHO_LOTE, quantidade))
+        ], usuario="benchmark")
+
+
+def medir(chamada, repeticoes: int) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        chamada()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {'p50_ms': percentil(tempos, 50), 'p95_ms': percentil(tempos, 95)}
+
+
+def rodada(repeticoes: int, periodo_arquivado: tuple = None) -> dict:
+    hoje = date.today()
+    inicio = (hoje - timedelta(days=29)).isoformat()
+    cenarios = {
+        'periodo_30d': lambda: EstoqueModel.relatorio_movimentacoes(inicio, hoje.isoformat()),
+        'recentes_500': lambda: EstoqueModel.relatorio_movimentacoes(limite=500),
+        'totais_30d': lambda: EstoqueModel.totais_periodo(inicio, hoje.isoformat()),
+    }
+    if periodo_arquivado:
+        cenarios['mes_arquivado'] = lambda: EstoqueModel.relatorio_movimentacoes(*periodo_arquivado)
+    return {nome: medir(chamada, repeticoes) for nome, chamada in cenarios.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--produtos', type=int, default=200)
+    parser.add_argument('--recentes', type=int, default=20000)
+    parser.add_argument('--etapas', type=int, default=4)
+    parser.add_argument('--por-etapa', type=int, default=200000)
+    parser.add_argument('--meses-por-etapa', type=int, default=6)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    print(f"📦 Criando {args.produtos} produtos e {args.recentes} movimentações recentes...")
+    ids = criar_produtos(args.produtos)
+    agora = datetime.now().replace(microsecond=0)
+    recente = datetime.combine(date.today() - timedelta(days=29), datetime.min.time())
+    gravar_historico(ids, args.recentes, recente, agora, rnd)
+
+    linhas = [("inicial", args.recentes, rodada(args.repeticoes))]
+    limite = datetime.combine(EstoqueModel._inicio_mes(date.today(), -1), datetime.min.time())
+    historico = args.recentes
+    for etapa in range(1, args.etapas + 1):
+        fim = datetime.combine(EstoqueModel._inicio_mes(limite.date(), -args.meses_por_etapa * (etapa - 1)),
+                               datetime.min.time())
+        inicio = datetime.combine(EstoqueModel._inicio_mes(fim.date(), -args.meses_por_etapa),
+                                  datetime.min.time())
+        print(f"📚 Etapa {etapa}: {args.por_etapa} movimentações de {inicio:%Y-%m} a {fim:%Y-%m}...")
+        gravar_historico(ids, args.por_etapa, inicio, fim, rnd)
+        historico += args.por_etapa
+        linhas.append((f"etapa {etapa}", historico, rodada(args.repeticoes)))
+
+    print(f"🗄️  Arquivando antes de {limite:%Y-%m-%d}...")
+    t0 = time.perf_counter()
+    arquivadas = EstoqueModel.arquivar_movimentacoes(limite.date().isoformat())
+    decorrido = time.perf_counter() - t0
+
+    mes = EstoqueModel._inicio_mes(limite.date(), -args.meses_por_etapa)
+    periodo = (mes.isoformat(), (EstoqueModel._inicio_mes(mes, 1) - timedelta(days=1)).isoformat())
+    linhas.append(("arquivado", historico - arquivadas, rodada(args.repeticoes, periodo)))
+
+    nomes = ['periodo_30d', 'recentes_500', 'totais_30d', 'mes_arquivado']
+    print("=" * 96)
+    print(f"{'Situação':<12} {'Na principal':>13} " + " ".join(f"{n + ' p50/p95':>22}" for n in nomes))
+    print("-" * 96)
+    for situacao, principal, medido in linhas:
+        colunas = []
+        for nome in nomes:
+            if nome in medido:
+                colunas.append(f"{medido[nome]['p50_ms']:>10.2f}/{medido[nome]['p95_ms']:<10.2f}")
+            else:
+                colunas.append(f"{'-':>22}")
+        print(f"{situacao:<12} {principal:>13} " + " ".join(f"{c:>22}" for c in colunas))
+    print("=" * 96)
+    taxa = arquivadas / decorrido if decorrido else 0.0
+    print(f"Arquivamento: {arquivadas} movimentações em {decorrido:.2f}s ({taxa:.0f}/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: latência da busca do autocompletar de produtos
+
+Uso:
+    python -m benchmarks.bench_busca [--produtos 50000] [--buscas 300]
+
+Importa um catálogo sintético e simula operadores digitando nomes e palavras
+da descrição, uma busca por tecla. Mede a latência de ``buscar_produtos``
+direto no banco e com o ``CacheBuscaProdutos`` do controller na frente
+(p50/p95/p99 em ms), e quantas buscas o cache respondeu sem ir ao banco.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.carga_api import percentil
+from controllers.busca_produtos import CacheBuscaProdutos
+from models.estoque_model import EstoqueModel
+
+TIPOS = ["Parafuso", "Porca", "Arruela", "Rebite", "Bucha", "Prego", "Abraçadeira", "Dobradiça"]
+ACABAMENTOS = ["galvanizado", "inox", "zincado", "latão", "bicromatizado", "polido"]
+
+
+def criar_catalogo(quantidade: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    produtos = []
+    for i in range(quantidade):
+        tipo = rnd.choice(TIPOS)
+        acabamento = rnd.choice(ACABAMENTOS)
+        produtos.append({
+            'nome_produto': f"{tipo} {rnd.randint(2, 20)}mm Bench {i:06d}",
+            'descricao': f"{tipo} {acabamento} para fixação, lote {rnd.randint(1, 999)}",
+            'qtd_minima': 0, 'preco_unitario': 1.0, 'qtd_estoque': 0,
+        })
+    EstoqueModel.importar_produtos(produtos, usuario="benchmark")
+    return produtos
+
+
+def digitacoes(produtos: list, buscas: int, seed: int) -> list:
+    """Textos que o operador teria no campo, tecla a tecla"""
+    rnd = random.Random(seed)
+    textos = []
+    for _ in range(buscas):
+        produto = rnd.choice(produtos)
+        if rnd.random() < 0.7:
+            alvo = produto['nome_produto']
+        else:
+            alvo = " ".join(produto['descricao'].split()[:2])
+        textos.extend(alvo[:n] for n in range(2, min(len(alvo), 14) + 1))
+    return textos
+
+
+def medir(textos: list, cache: CacheBuscaProdutos = None) -> dict:
+    latencias = []
+    inicio = time.perf_counter()
+    for texto in textos:
+        t0 = time.perf_counter()
+        produtos = cache.obter(texto) if cache else None
+        if produtos is None:
+            produtos = EstoqueModel.buscar_produtos(texto)
+            if cache:
+                cache.guardar(texto, produtos)
+        latencias.append((time.perf_counter() - t0) * 1000)
+    decorrido = time.perf_counter() - inicio
+
+    ordenadas = sorted(latencias)
+    return {
+        'buscas_s': len(ordenadas) / decorrido,
+        'p50_ms': percentil(ordenadas, 50),
+        'p95_ms': percentil(ordenadas, 95),
+        'p99_ms': percentil(ordenadas, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--produtos', type=int, default=50000)
+    parser.add_argument('--buscas', type=int, default=300, help="Produtos procurados (várias teclas cada)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"📦 Importando {args.produtos} produtos de teste...")
+    produtos = criar_catalogo(args.produtos, args.seed)
+    textos = digitacoes(produtos, args.buscas, args.seed)
+    EstoqueModel.buscar_produtos(textos[0])  # aquecimento
+
+    cache = CacheBuscaProdutos(10, min_palavra=EstoqueModel.MIN_PALAVRA_BUSCA)
+    resultados = [("Banco", medir(textos)), ("Com cache", medir(textos, cache))]
+
+    print("=" * 62)
+    print(f"{'Caminho':<12} {'Buscas/s':>10} {'p50 (ms)':>12} {'p95 (ms)':>12} {'p99 (ms)':>12}")
+    print("-" * 62)
+    for nome, medido in resultados:
+        print(f"{nome:<12} {medido['buscas_s']:>10.0f} {medido['p50_ms']:>12.3f} "
+              f"{medido['p95_ms']:>12.3f} {medido['p99_ms']:>12.3f}")
+    print("-" * 62)
+    print(f"{len(textos)} buscas; cache: {cache.acertos} acertos, "
+          f"{cache.refinamentos} refinadas localmente, {cache.falhas} no banco")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: diário local de movimentações vs. registro direto no banco
+
+Uso:
+    python -m benchmarks.bench_diario [--itens 2000] [--produtos 50]
+                                      [--lotes 1,10,50,200,1000] [--intervalo-ms 200]
+
+Mede a latência de confirmação ao operador (p50/p99) de ``registrar_entrada``
+direto no banco e de ``DiarioMovimentacoes.registrar`` (fsync local) e, para
+cada tamanho de lote, a vazão com que o diário aplica as movimentações no
+banco e o atraso entre a confirmação e o commit.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_movimentacoes_lote import criar_produtos
+from benchmarks.carga_api import percentil
+from models.diario_movimentacoes import DiarioMovimentacoes
+from models.estoque_model import EstoqueModel
+
+
+def medir_direto(ids: list, itens: int, rnd: random.Random) -> dict:
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(itens):
+        t0 = time.perf_counter()
+        EstoqueModel.registrar_entrada(rnd.choice(ids), 1, "benchmark", "benchmark")
+        latencias.append((time.perf_counter() - t0) * 1000)
+    return resumir(latencias, time.perf_counter() - inicio, itens)
+
+
+def medir_diario(ids: list, itens: int, tamanho_lote: int, intervalo_ms: float,
+                 rnd: random.Random) -> dict:
+    with tempfile.TemporaryDirectory() as pasta:
+        diario = DiarioMovimentacoes(os.path.join(pasta, "diario.jsonl"),
+                                     tamanho_lote=tamanho_lote, intervalo_ms=intervalo_ms)
+        latencias = []
+        inicio = time.perf_counter()
+        for _ in range(itens):
+            t0 = time.perf_counter()
+            diario.registrar(rnd.choice(ids), 'ENTRADA', 1, "benchmark", "benchmark")
+            latencias.append((time.perf_counter() - t0) * 1000)
+        diario.aguardar()
+        decorrido = time.perf_counter() - inicio
+        estatisticas = diario.estatisticas()
+        diario.fechar()
+
+    resultado = resumir(latencias, decorrido, itens)
+    resultado['lotes'] = estatisticas['lotes']
+    resultado['envio_p95_ms'] = estatisticas['latencia_envio']['p95_ms']
+    return resultado
+
+
+def resumir(latencias: list, decorrido: float, itens: int) -> dict:
+    ordenadas = sorted(latencias)
+    return {
+        'confirmacao_p50_ms': percentil(ordenadas, 50),
+        'confirmacao_p99_ms': percentil(ordenadas, 99),
+        'mov_s': itens / decorrido,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--itens', type=int, default=2000)
+    parser.add_argument('--produtos', type=int, default=50)
+    parser.add_argument('--lotes', default="1,10,50,200,1000", help="Tamanhos de lote separados por vírgula")
+    parser.add_argument('--intervalo-ms', type=float, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"📦 Criando {args.produtos} produtos de teste...")
+    ids = criar_produtos(args.produtos)
+    rnd = random.Random(args.seed)
+
+    linhas = [("Direto", medir_direto(ids, args.itens, rnd))]
+    for tamanho in (int(t) for t in args.lotes.split(",")):
+        linhas.append((f"Diário lote {tamanho}",
+                       medir_diario(ids, args.itens, tamanho, args.intervalo_ms, rnd)))
+
+    print("=" * 84)
+    print(f"{'Caminho':<20} {'Conf. p50 (ms)':>15} {'Conf. p99 (ms)':>15} {'Mov/s':>10} "
+          f"{'Lotes':>7} {'Envio p95 (ms)':>15}")
+    print("-" * 84)
+    for nome, medido in linhas:
+        lotes = f"{medido['lotes']}" if 'lotes' in medido else "-"
+        envio = f"{medido['envio_p95_ms']:.1f}" if 'envio_p95_ms' in medido else "-"
+        print(f"{nome:<20} {medido['confirmacao_p50_ms']:>15.3f} {medido['confirmacao_p99_ms']:>15.3f} "
+              f"{medido['mov_s']:>10.0f} {lotes:>7} {envio:>15}")
+    print("=" * 84)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: memória e tempo de leitura com linhas em dict vs. linhas compactas
+
+Uso:
+    python -m benchmarks.bench_memoria [--gerar --produtos 500000 --movimentacoes 5000000]
+                                       [--consultas produtos,movimentacoes]
+
+Com ``--gerar`` popula o banco pelo gerador determinístico antes de medir.
+Cada consulta (catálogo completo com ``listar_produtos`` e relatório de
+todas as movimentações com ``relatorio_movimentacoes``) roda em um processo
+separado para cada representação, já que o pico de RSS só cresce dentro de
+um processo. Imprime linhas lidas, tempo de leitura e pico de RSS (total e
+acima do processo já conectado).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CONSULTAS = ('produtos', 'movimentacoes')
+MODOS = (('dict', False), ('compacta', True))
+
+
+def rss_pico_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB no Linux, bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def medir(consulta: str, compacta: bool) -> dict:
+    """Executado no processo filho: uma leitura, com o resultado ainda vivo ao medir"""
+    from config.database import DatabaseConfig
+    from models.estoque_model import EstoqueModel
+
+    EstoqueModel.linhas_compactas = compacta
+    DatabaseConfig.test_connection()
+    base = rss_pico_mb()
+
+    inicio = time.perf_counter()
+    if consulta == 'produtos':
+        linhas = EstoqueModel.listar_produtos()
+    else:
+        linhas = EstoqueModel.relatorio_movimentacoes()
+    segundos = time.perf_counter() - inicio
+
+    pico = rss_pico_mb()
+    return {'linhas': len(linhas), 'segundos': segundos, 'base_mb': base, 'pico_mb': pico}
+
+
+def rodar_filho(consulta: str, modo: str) -> dict:
+    saida = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_memoria', '--filho', consulta, modo],
+        cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--gerar', action='store_true', help="Popula o banco antes de medir")
+    parser.add_argument('--produtos', type=int, default=500000)
+    parser.add_argument('--movimentacoes', type=int, default=5000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--consultas', default=",".join(CONSULTAS),
+                        help="Consultas separadas por vírgula (produtos, movimentacoes)")
+    parser.add_argument('--filho', nargs=2, metavar=('CONSULTA', 'MODO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        consulta, modo = args.filho
+        print(json.dumps(medir(consulta, dict(MODOS)[modo])))
+        return
+
+    if args.gerar:
+        from benchmarks.gerador import GeradorDados
+        print(f"📦 Gerando {args.produtos} produtos e {args.movimentacoes} movimentações...")
+        GeradorDados(args.produtos, args.movimentacoes, seed=args.seed).gerar()
+
+    print("=" * 80)
+    print(f"{'Consulta':<15} {'Modo':<10} {'Linhas':>10} {'Leitura (s)':>12} "
+          f"{'Pico RSS (MB)':>14} {'Acima da base':>14}")
+    print("-" * 80)
+    for consulta in args.consultas.split(","):
+        resultados = {}
+        for modo, _ in MODOS:
+            medido = resultados[modo] = rodar_filho(consulta, modo)
+            print(f"{consulta:<15} {modo:<10} {medido['linhas']:>10} {medido['segundos']:>12.2f} "
+                  f"{medido['pico_mb']:>14.1f} {medido['pico_mb'] - medido['base_mb']:>14.1f}")
+        dicts, compactas = resultados['dict'], resultados['compacta']
+        acima_dict = dicts['pico_mb'] - dicts['base_mb']
+        acima_compacta = compactas['pico_mb'] - compactas['base_mb']
+        if acima_compacta > 0:
+            print(f"{'':<15} memória {acima_dict / acima_compacta:.1f}x menor, "
+                  f"leitura {dicts['segundos'] / compactas['segundos']:.2f}x mais rápida")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
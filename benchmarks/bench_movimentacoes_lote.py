@@ -0,0 +1,90 @@
+"""
+Benchmark: lote de movimentações vs. registro item a item
+
+Uso:
+    python -m benchmarks.bench_movimentacoes_lote [--itens 300] [--produtos 50]
+
+Cria produtos de teste, registra ``--itens`` entradas pelo caminho item a
+item (registrar_entrada) e depois o mesmo volume via registrar_movimentacoes,
+imprimindo o tempo total e por item de cada caminho.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+
+def criar_produtos(quantidade: int) -> list:
+    return [
+        EstoqueModel.adicionar_produto(
+            nome=f"Bench Lote {i}",
+            descricao="Produto criado pelo benchmark de lote",
+            qtd_minima=0,
+            preco=1.0
+        )
+        for i in range(quantidade)
+    ]
+
+
+def gerar_itens(ids: list, quantidade: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    return [
+        {
+            'id_produto': rnd.choice(ids),
+            'tipo_movimentacao': 'ENTRADA',
+            'quantidade': rnd.randint(1, 50),
+            'observacao': 'benchmark'
+        }
+        for _ in range(quantidade)
+    ]
+
+
+def medir_item_a_item(itens: list) -> float:
+    inicio = time.perf_counter()
+    for item in itens:
+        EstoqueModel.registrar_entrada(
+            id_produto=item['id_produto'],
+            quantidade=item['quantidade'],
+            observacao=item['observacao'],
+            usuario='benchmark'
+        )
+    return time.perf_counter() - inicio
+
+
+def medir_lote(itens: list) -> float:
+    inicio = time.perf_counter()
+    EstoqueModel.registrar_movimentacoes(itens, usuario='benchmark')
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--itens', type=int, default=300)
+    parser.add_argument('--produtos', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📦 Criando {args.produtos} produtos de teste...")
+    ids = criar_produtos(args.produtos)
+    itens = gerar_itens(ids, args.itens)
+
+    t_item = medir_item_a_item(itens)
+    t_lote = medir_lote(itens)
+
+    print("=" * 60)
+    print(f"{'Caminho':<20} {'Total (s)':>12} {'Por item (ms)':>15}")
+    print("-" * 60)
+    print(f"{'Item a item':<20} {t_item:>12.3f} {t_item / args.itens * 1000:>15.3f}")
+    print(f"{'Lote':<20} {t_lote:>12.3f} {t_lote / args.itens * 1000:>15.3f}")
+    print("-" * 60)
+    print(f"Ganho: {t_item / t_lote:.1f}x")
+    print(f"Pool: {DatabaseConfig.estatisticas_pool()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Teste de carga da API HTTP
+
+Uso:
+    python -m benchmarks.carga_api [--url http://127.0.0.1:8080] [--conexoes 32]
+                                   [--duracao 20] [--cenario misto] [--saida carga.json]
+                                   [--subir]
+
+Abre ``--conexoes`` clientes keep-alive que disparam requisições sem pausa
+durante ``--duracao`` segundos e mede requisições por segundo e latência
+(p50/p95/p99/máximo) por rota. Com ``--subir``, inicia antes uma instância
+local (``python cli.py api``) na porta da URL e a encerra ao final.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Peso de cada rota em cada cenário
+CENARIOS = {
+    'leitura': {'produto': 6, 'pagina': 2, 'alertas': 1},
+    'escrita': {'entrada': 1},
+    'misto': {'produto': 5, 'pagina': 1, 'alertas': 1, 'entrada': 2, 'saida': 1},
+}
+
+
+class ClienteHTTP:
+    """Conexão HTTP/1.1 keep-alive mínima para o teste de carga"""
+
+    def __init__(self, host: str, porta: int):
+        self.host = host
+        self.porta = porta
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _conectar(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.porta)
+
+    async def requisitar(self, metodo: str, caminho: str, corpo: Optional[dict] = None) -> Tuple[int, bytes]:
+        if self._writer is None:
+            await self._conectar()
+
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b""
+        self._writer.write(
+            f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(dados)}\r\n\r\n".encode('latin-1')
+            + dados
+        )
+        try:
+            await self._writer.drain()
+            cabeca = await self._reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.fechar()
+            raise ConnectionError("Conexão encerrada pelo servidor")
+
+        linhas = cabeca.decode('latin-1').split("\r\n")
+        status = int(linhas[0].split(" ", 2)[1])
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if linha:
+                nome, _, valor = linha.partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if cabecalhos.get('transfer-encoding') == 'chunked':
+            partes = []
+            while True:
+                tamanho = int((await self._reader.readuntil(b"\r\n")).strip(), 16)
+                parte = await self._reader.readexactly(tamanho + 2)
+                if not tamanho:
+                    break
+                partes.append(parte[:-2])
+            resposta = b"".join(partes)
+        else:
+            resposta = await self._reader.readexactly(int(cabecalhos.get('content-length', 0)))
+
+        if cabecalhos.get('connection') == 'close':
+            self.fechar()
+        return status, resposta
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+async def carregar_ids(host: str, porta: int, maximo: int = 1000) -> List[int]:
+    cliente = ClienteHTTP(host, porta)
+    try:
+        status, corpo = await cliente.requisitar('GET', f"/produtos?limite={maximo}")
+    finally:
+        cliente.fechar()
+    if status != 200:
+        raise RuntimeError(f"GET /produtos respondeu {status}: {corpo[:200]!r}")
+    ids = [p['id_produto'] for p in json.loads(corpo)['produtos']]
+    if not ids:
+        raise RuntimeError("Nenhum produto cadastrado: rode antes python -m benchmarks.gerador")
+    return ids
+
+
+async def executar_carga(host: str, porta: int, conexoes: int, duracao: float,
+                         cenario: str, seed: int = 42) -> Dict:
+    ids = await carregar_ids(host, porta)
+    pesos = CENARIOS[cenario]
+    rotas, chances = list(pesos), list(pesos.values())
+
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    status_por_rota: Dict[str, Counter] = defaultdict(Counter)
+    falhas_conexao = 0
+    fim = time.perf_counter() + duracao
+
+    def montar(rota: str, rnd: random.Random) -> Tuple[str, str, Optional[dict]]:
+        if rota == 'produto':
+            return 'GET', f"/produtos/{rnd.choice(ids)}", None
+        if rota == 'pagina':
+            return 'GET', "/produtos?limite=50", None
+        if rota == 'alertas':
+            return 'GET', "/alertas", None
+        tipo = 'ENTRADA' if rota == 'entrada' else 'SAIDA'
+        return 'POST', "/movimentacoes", {'id_produto': rnd.choice(ids), 'tipo_movimentacao': tipo,
+                                          'quantidade': 1, 'observacao': 'carga', 'usuario': 'carga'}
+
+    async def cliente(numero: int):
+        nonlocal falhas_conexao
+        rnd = random.Random(seed + numero)
+        conexao = ClienteHTTP(host, porta)
+        try:
+            while time.perf_counter() < fim:
+                rota = rnd.choices(rotas, chances)[0]
+                metodo, caminho, corpo = montar(rota, rnd)
+                inicio = time.perf_counter()
+                try:
+                    status, _ = await conexao.requisitar(metodo, caminho, corpo)
+                except (ConnectionError, OSError):
+                    falhas_conexao += 1
+                    await asyncio.sleep(0.05)
+                    continue
+                latencias[rota].append((time.perf_counter() - inicio) * 1000)
+                status_por_rota[rota][status] += 1
+        finally:
+            conexao.fechar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(i) for i in range(conexoes)))
+    decorrido = time.perf_counter() - inicio
+
+    def resumir(valores: List[float]) -> Dict:
+        ordenados = sorted(valores)
+        return {
+            'requisicoes': len(ordenados),
+            'media_ms': round(statistics.fmean(ordenados), 3) if ordenados else 0.0,
+            'p50_ms': round(percentil(ordenados, 50), 3),
+            'p95_ms': round(percentil(ordenados, 95), 3),
+            'p99_ms': round(percentil(ordenados, 99), 3),
+            'max_ms': round(ordenados[-1], 3) if ordenados else 0.0,
+        }
+
+    todas = [ms for valores in latencias.values() for ms in valores]
+    total = resumir(todas)
+    total['req_s'] = round(len(todas) / decorrido, 1)
+    return {
+        'cenario': cenario,
+        'conexoes': conexoes,
+        'duracao_s': round(decorrido, 2),
+        'total': total,
+        'falhas_conexao': falhas_conexao,
+        'rotas': {rota: {**resumir(latencias[rota]),
+                         'status': {str(s): n for s, n in sorted(status_por_rota[rota].items())}}
+                  for rota in rotas},
+    }
+
+
+async def aguardar_instancia(host: str, porta: int, limite_s: float = 15.0):
+    prazo = time.perf_counter() + limite_s
+    while True:
+        cliente = ClienteHTTP(host, porta)
+        try:
+            status, _ = await cliente.requisitar('GET', "/saude")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            cliente.fechar()
+        if time.perf_counter() > prazo:
+            raise RuntimeError(f"API não respondeu em {host}:{porta} após {limite_s:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default="http://127.0.0.1:8080")
+    parser.add_argument('--conexoes', type=int, default=32, help="Clientes simultâneos (keep-alive)")
+    parser.add_argument('--duracao', type=float, default=20.0, help="Segundos de carga")
+    parser.add_argument('--cenario', choices=sorted(CENARIOS), default='misto')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', help="Arquivo JSON com os resultados")
+    parser.add_argument('--subir', action='store_true', help="Inicia uma instância local da API")
+    parser.add_argument('--workers', type=int, help="Workers da instância iniciada com --subir")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, porta = url.hostname or "127.0.0.1", url.port or 80
+
+    processo = None
+    if args.subir:
+        comando = [sys.executable, os.path.join(RAIZ, 'cli.py'), 'api', '--host', host, '--porta', str(porta)]
+        if args.workers:
+            comando += ['--workers', str(args.workers)]
+        processo = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.DEVNULL)
+
+    try:
+        if processo is not None:
+            asyncio.run(aguardar_instancia(host, porta))
+        print(f"🚀 {args.conexoes} conexões, cenário {args.cenario}, {args.duracao:.0f}s contra {args.url}")
+        resultado = asyncio.run(executar_carga(host, porta, args.conexoes, args.duracao,
+                                               args.cenario, args.seed))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=10)
+
+    total = resultado['total']
+    print("=" * 84)
+    print(f"{'Rota':<12} {'Req':>9} {'Média (ms)':>11} {'p50':>9} {'p95':>9} {'p99':>9} {'Máx':>9}  Status")
+    print("-" * 84)
+    for rota, medido in resultado['rotas'].items():
+        print(f"{rota:<12} {medido['requisicoes']:>9} {medido['media_ms']:>11.2f} {medido['p50_ms']:>9.2f} "
+              f"{medido['p95_ms']:>9.2f} {medido['p99_ms']:>9.2f} {medido['max_ms']:>9.2f}  {medido['status']}")
+    print("-" * 84)
+    print(f"{'total':<12} {total['requisicoes']:>9} {total['media_ms']:>11.2f} {total['p50_ms']:>9.2f} "
+          f"{total['p95_ms']:>9.2f} {total['p99_ms']:>9.2f} {total['max_ms']:>9.2f}")
+    print("=" * 84)
+    print(f"⚡ {total['req_s']:.0f} req/s | p99 {total['p99_ms']:.2f} ms | "
+          f"falhas de conexão: {resultado['falhas_conexao']}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados gravados em {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Cenários cronometrados dos caminhos do modelo e do controller
+
+Cada cenário é uma chamada representativa feita sobre os dados do banco
+(gerados por ``benchmarks.gerador``). ``preparar`` roda antes de cada
+repetição, fora da medição (ex.: esvaziar o cache para a leitura fria).
+"""
+import csv
+import io
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+
+class Cenario:
+    """Chamada medida pelo executor de benchmarks"""
+
+    def __init__(self, nome: str, executar: Callable, preparar: Callable = None,
+                 repeticoes: Optional[int] = None, escrita: bool = False):
+        self.nome = nome
+        self.executar = executar
+        self.preparar = preparar
+        self.repeticoes = repeticoes
+        self.escrita = escrita
+
+
+def contar(resultado) -> Optional[int]:
+    """Linhas produzidas pelo cenário (consome iteradores; texto conta linhas)"""
+    if resultado is None or isinstance(resultado, (bool, int)):
+        return None
+    if isinstance(resultado, (list, dict)):
+        return len(resultado)
+    if isinstance(resultado, str):
+        return resultado.count("\n")
+    return sum(1 for _ in resultado)
+
+
+def carregar_contexto() -> Dict:
+    """Lê do banco os ids e o período dos dados gerados"""
+    with DatabaseConfig.conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id_produto FROM produtos ORDER BY id_produto")
+            ids = [linha[0] for linha in cursor.fetchall()]
+            cursor.execute("SELECT dia FROM movimentacoes_diarias ORDER BY dia DESC LIMIT 1")
+            ultimo = cursor.fetchone()
+            ultimo_dia = ultimo[0] if ultimo else date.today()
+            cursor.execute("SELECT COUNT(*) FROM movimentacoes")
+            movimentacoes = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    if not ids:
+        raise RuntimeError("Banco sem produtos: rode antes python -m benchmarks.gerador")
+
+    return {'ids': ids, 'ultimo_dia': ultimo_dia, 'produtos': len(ids),
+            'movimentacoes': movimentacoes}
+
+
+def criar_cenarios(contexto: Dict, seed: int = 42) -> List[Cenario]:
+    """Monta a lista de cenários sobre o contexto carregado"""
+    # Importado aqui: o controller traz o tkinter junto com a view
+    from controllers.estoque_controller import EstoqueController
+    from controllers.exportacao import ExportadorDados
+    from controllers.importacao import ImportadorCSV
+
+    rnd = random.Random(seed)
+    ids = contexto['ids']
+    meio = ids[len(ids) // 2]
+    dia = contexto['ultimo_dia']
+    hoje = dia.isoformat()
+    mes = (dia - timedelta(days=29)).isoformat()
+    ano = (dia - timedelta(days=364)).isoformat()
+    meio_periodo = (dia - timedelta(days=180)).isoformat()
+    amostra = rnd.sample(ids, min(100, len(ids)))
+
+    produto_meio = EstoqueModel.obter_produto(meio)
+    chave_meio = (produto_meio['nome_produto'], meio)
+
+    def lote_movimentacoes():
+        return [{'id_produto': rnd.choice(amostra), 'tipo_movimentacao': 'ENTRADA',
+                 'quantidade': 1, 'observacao': 'benchmark'} for _ in range(100)]
+
+    def csv_importacao(linhas: int) -> io.StringIO:
+        arquivo = io.StringIO()
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['nome_produto', 'descricao', 'qtd_minima', 'preco_unitario', 'qtd_estoque'])
+        for i in range(linhas):
+            escritor.writerow([f"Bench Importado {rnd.random():.8f}", "benchmark", 10, "1.50", i % 7])
+        arquivo.seek(0)
+        return arquivo
+
+    def relatorio(inicio: str, fim: str, detalhar: bool) -> str:
+        totais = EstoqueModel.totais_periodo(inicio, fim)
+        resumo = EstoqueModel.resumo_por_produto(inicio, fim)
+        movimentacoes = EstoqueModel.iterar_movimentacoes(inicio, fim) if detalhar else None
+        saida = io.StringIO()
+        EstoqueController.escrever_relatorio(saida, movimentacoes, inicio, fim, resumo, totais)
+        return saida.getvalue()
+
+    def estoque_em(data: str) -> list:
+        # Devolve os produtos formatados: as linhas do cenário são eles
+        produtos = EstoqueModel.estoque_em(data)
+        EstoqueController.escrever_estoque_em(io.StringIO(), data, produtos)
+        return produtos
+
+    def exportar(linhas) -> int:
+        return ExportadorDados('jsonl').exportar(linhas, io.StringIO()).linhas
+
+    esvaziar_cache = lambda: EstoqueModel.cache.invalidar()
+
+    return [
+        # Leituras do modelo
+        Cenario('listar_produtos', EstoqueModel.listar_produtos, repeticoes=3),
+        Cenario('listar_produtos_pagina.primeira', lambda: EstoqueModel.listar_produtos_pagina(100)),
+        Cenario('listar_produtos_pagina.meio',
+                lambda: EstoqueModel.listar_produtos_pagina(100, apos=chave_meio)),
+        Cenario('obter_produtos.frio', lambda: EstoqueModel.obter_produtos(amostra),
+                preparar=esvaziar_cache),
+        Cenario('obter_produtos.cache', lambda: EstoqueModel.obter_produtos(amostra)),
+        Cenario('revalidar_cache', EstoqueModel.revalidar_cache),
+        Cenario('produtos_criticos', EstoqueModel.produtos_criticos),
+        Cenario('relatorio_movimentacoes.dia', lambda: EstoqueModel.relatorio_movimentacoes(hoje, hoje)),
+        Cenario('relatorio_movimentacoes.recentes_500',
+                lambda: EstoqueModel.relatorio_movimentacoes(limite=500)),
+        Cenario('iterar_movimentacoes.mes', lambda: EstoqueModel.iterar_movimentacoes(mes, hoje),
+                repeticoes=3),
+        Cenario('iterar_exportacao_movimentacoes.dia',
+                lambda: EstoqueModel.iterar_exportacao_movimentacoes(hoje, hoje)),
+        Cenario('iterar_produtos', EstoqueModel.iterar_produtos, repeticoes=3),
+        Cenario('totais_periodo.ano', lambda: EstoqueModel.totais_periodo(ano, hoje)),
+        Cenario('resumo_por_produto.mes', lambda: EstoqueModel.resumo_por_produto(mes, hoje)),
+        Cenario('estoque_em.produto', lambda: EstoqueModel.estoque_em(meio_periodo, [meio])),
+        Cenario('estoque_em.todos', lambda: EstoqueModel.estoque_em(meio_periodo), repeticoes=3),
+
+        # Escritas do modelo
+        Cenario('adicionar_produto', lambda: EstoqueModel.adicionar_produto(
+            "Bench Novo", "benchmark", 10, 1.0), escrita=True),
+        Cenario('registrar_entrada', lambda: EstoqueModel.registrar_entrada(
+            rnd.choice(amostra), 5, "benchmark", "benchmark"), escrita=True),
+        Cenario('registrar_saida', lambda: EstoqueModel.registrar_saida(
+            meio, 1, "benchmark", "benchmark"),
+            preparar=lambda: EstoqueModel.registrar_entrada(meio, 1, "benchmark", "benchmark"),
+            escrita=True),
+        Cenario('registrar_movimentacoes.100', lambda: EstoqueModel.registrar_movimentacoes(
+            lote_movimentacoes(), usuario="benchmark"), escrita=True),
+        Cenario('importar_produtos.1000', lambda: EstoqueModel.importar_produtos([
+            {'nome_produto': "Bench Lote", 'descricao': "", 'qtd_minima': 1,
+             'preco_unitario': 1.0, 'qtd_estoque': 1} for _ in range(1000)
+        ], usuario="benchmark"), repeticoes=3, escrita=True),
+        Cenario('reconstruir_resumo_diario.dia',
+                lambda: EstoqueModel.reconstruir_resumo_diario(hoje, hoje), repeticoes=3, escrita=True),
+        Cenario('registrar_fechamento', lambda: EstoqueModel.registrar_fechamento(
+            (min(dia, date.today()) - timedelta(days=1)).isoformat()), repeticoes=1, escrita=True),
+
+        # Caminhos do controller (sem interface)
+        Cenario('controller.relatorio_detalhado.dia', lambda: relatorio(hoje, hoje, True)),
+        Cenario('controller.relatorio_resumo.ano', lambda: relatorio(ano, hoje, False)),
+        Cenario('controller.estoque_em.todos', lambda: estoque_em(meio_periodo), repeticoes=3),
+        Cenario('controller.importar_csv.1000',
+                lambda: ImportadorCSV(usuario="benchmark").importar(csv_importacao(1000)).importadas,
+                repeticoes=3, escrita=True),
+        Cenario('controller.exportar_movimentacoes.dia',
+                lambda: exportar(EstoqueModel.iterar_exportacao_movimentacoes(hoje, hoje))),
+        Cenario('controller.exportar_produtos', lambda: exportar(EstoqueModel.iterar_produtos()),
+                repeticoes=3),
+    ]
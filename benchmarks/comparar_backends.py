@@ -0,0 +1,146 @@
+"""
+Compara os backends MySQL e SQLite com o mesmo volume de dados
+
+Uso:
+    python -m benchmarks.comparar_backends [--backends mysql,sqlite]
+                                           [--produtos 2000] [--movimentacoes 200000]
+                                           [--dias 365] [--seed 42] [--sqlite bench_backends.db]
+                                           [--repeticoes 5] [--filtro relatorio] [--sem-escrita]
+                                           [--sem-gerar] [--saida comparacao.json]
+
+Para cada backend, em um processo próprio (``DB_BACKEND`` é lido na
+importação), popula o banco com ``benchmarks.gerador`` (mesma seed, mesma
+data final) e mede os cenários com ``benchmarks.executar``. O arquivo
+SQLite é recriado a cada execução; o MySQL é o apontado pelas variáveis
+``DB_*`` e deve ser um banco vazio dedicado (ex.: ``DB_NAME=estoque_bench``).
+Imprime a mediana de cada cenário lado a lado e a razão em relação ao
+primeiro backend. Falha (código 1) se algum backend falhar ou se os
+volumes medidos diferirem, pois a comparação não valeria.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def rodar(modulo: str, argumentos: list, ambiente: dict):
+    subprocess.run([sys.executable, '-m', modulo] + argumentos, cwd=RAIZ, env=ambiente, check=True)
+
+
+def medir_backend(backend: str, args, pasta: str) -> dict:
+    ambiente = dict(os.environ, DB_BACKEND=backend)
+    if backend == 'sqlite':
+        ambiente['DB_SQLITE_PATH'] = os.path.abspath(args.sqlite)
+
+    if not args.sem_gerar:
+        if backend == 'sqlite':
+            for sufixo in ('', '-wal', '-shm'):
+                if os.path.exists(args.sqlite + sufixo):
+                    os.remove(args.sqlite + sufixo)
+        print(f"\n🏭 {backend}: gerando dados...")
+        rodar('benchmarks.gerador', [
+            '--produtos', str(args.produtos), '--movimentacoes', str(args.movimentacoes),
+            '--dias', str(args.dias), '--seed', str(args.seed), '--fim', args.fim.isoformat(),
+            '--fechamentos-a-cada', str(args.fechamentos_a_cada),
+        ], ambiente)
+
+    saida = os.path.join(pasta, f"{backend}.json")
+    medicao = ['--saida', saida, '--repeticoes', str(args.repeticoes), '--seed', str(args.seed)]
+    if args.filtro:
+        medicao += ['--filtro', args.filtro]
+    if args.sem_escrita:
+        medicao.append('--sem-escrita')
+    print(f"\n⏱️  {backend}: medindo cenários...")
+    rodar('benchmarks.executar', medicao, ambiente)
+
+    with open(saida, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def lado_a_lado(resultados: dict) -> list:
+    """
+    Medianas de cada cenário por backend, com a razão sobre o primeiro
+
+    Returns:
+        list: Uma linha por cenário medido em todos os backends
+    """
+    backends = list(resultados)
+    referencia = resultados[backends[0]]['cenarios']
+    linhas = []
+    for nome in referencia:
+        if not all(nome in resultados[b]['cenarios'] for b in backends):
+            continue
+        medianas = {b: resultados[b]['cenarios'][nome]['mediana_ms'] for b in backends}
+        base = medianas[backends[0]]
+        linhas.append({
+            'cenario': nome,
+            'mediana_ms': medianas,
+            'razao': {b: (m / base if base else None) for b, m in medianas.items()},
+        })
+    return linhas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', default="mysql,sqlite",
+                        help="Backends na ordem da tabela; o primeiro é a referência da razão")
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--movimentacoes', type=int, default=200000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fim', type=date.fromisoformat, default=date.today(),
+                        help="Último dia com movimentações, o mesmo nos dois backends (padrão: hoje)")
+    parser.add_argument('--fechamentos-a-cada', type=int, default=7)
+    parser.add_argument('--sqlite', default="bench_backends.db", help="Arquivo do banco SQLite")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--filtro', help="Mede só cenários cujo nome contém este texto")
+    parser.add_argument('--sem-escrita', action='store_true', help="Pula cenários que gravam no banco")
+    parser.add_argument('--sem-gerar', action='store_true',
+                        help="Mede os dados já gerados por uma execução anterior")
+    parser.add_argument('--saida', help="Arquivo JSON com os resultados dos backends e a comparação")
+    args = parser.parse_args()
+
+    backends = list(dict.fromkeys(b.strip() for b in args.backends.split(",") if b.strip()))
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for backend in backends:
+            try:
+                resultados[backend] = medir_backend(backend, args, pasta)
+            except subprocess.CalledProcessError as e:
+                print(f"\n❌ {backend}: {' '.join(e.cmd[2:3])} terminou com código {e.returncode}")
+                return 1
+
+    volumes = {b: r['dados'] for b, r in resultados.items()}
+    if len({json.dumps(v, sort_keys=True) for v in volumes.values()}) > 1:
+        print(f"\n❌ Volumes diferentes entre os backends (use um banco vazio dedicado): {volumes}")
+        return 1
+
+    linhas = lado_a_lado(resultados)
+    largura = 42 + 14 * len(backends) + 10 * (len(backends) - 1)
+    print("\n" + "=" * largura)
+    print(f"{'Cenário':<42}" + "".join(f"{b + ' (ms)':>14}" for b in backends)
+          + "".join(f"{b + ' ×':>10}" for b in backends[1:]))
+    print("-" * largura)
+    for linha in linhas:
+        medianas = "".join(f"{linha['mediana_ms'][b]:>14.2f}" for b in backends)
+        razoes = "".join(f"{linha['razao'][b]:>10.2f}" if linha['razao'][b] is not None else f"{'—':>10}"
+                         for b in backends[1:])
+        print(f"{linha['cenario']:<42}{medianas}{razoes}")
+    print("=" * largura)
+    print(f"{volumes[backends[0]]['produtos']} produtos, {volumes[backends[0]]['movimentacoes']} "
+          f"movimentações; razão = mediana / mediana do {backends[0]} (abaixo de 1: mais rápido)")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'backends': resultados, 'comparacao': linhas}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Comparação gravada em {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
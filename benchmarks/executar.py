@@ -0,0 +1,176 @@
+"""
+Executor dos benchmarks do modelo e do controller
+
+Uso:
+    python -m benchmarks.executar [--saida resultado.json] [--repeticoes 5]
+                                  [--filtro relatorio] [--sem-escrita]
+                                  [--comparar base.json --tolerancia 0.25 --minimo-ms 2]
+
+Mede cada cenário de ``benchmarks.cenarios`` sobre os dados já gerados no
+banco, grava os tempos (mínimo, mediana, p95 e média, em ms) em JSON e,
+com ``--comparar``, falha (código 1) se a mediana de algum cenário piorar
+mais que a tolerância em relação ao arquivo de base. Um cenário de leitura
+que não devolve nenhuma linha também falha (e nada é gravado): mediria um
+resultado vazio, não o caminho que deveria medir.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.cenarios import Cenario, carregar_contexto, contar, criar_cenarios
+from config.database import DatabaseConfig
+
+
+def medir(cenario: Cenario, repeticoes: int) -> Dict:
+    """Roda o cenário uma vez para aquecer e depois ``repeticoes`` vezes medindo"""
+    repeticoes = cenario.repeticoes or repeticoes
+    if cenario.preparar:
+        cenario.preparar()
+    contar(cenario.executar())
+
+    tempos = []
+    linhas = None
+    for _ in range(repeticoes):
+        if cenario.preparar:
+            cenario.preparar()
+        inicio = time.perf_counter()
+        linhas = contar(cenario.executar())
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    ordenados = sorted(tempos)
+    return {
+        'repeticoes': repeticoes,
+        'linhas': linhas,
+        'min_ms': round(ordenados[0], 3),
+        'mediana_ms': round(statistics.median(ordenados), 3),
+        'p95_ms': round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 3),
+        'media_ms': round(statistics.fmean(ordenados), 3),
+    }
+
+
+def comparar(base: Dict, atual: Dict, tolerancia: float, minimo_ms: float) -> List[Dict]:
+    """
+    Compara as medianas de dois resultados
+
+    Um cenário regride quando fica mais de ``tolerancia`` (fração) mais
+    lento que a base e a diferença passa de ``minimo_ms`` (ruído).
+
+    Returns:
+        List[Dict]: Uma linha por cenário comum, com ``regressao`` marcada
+    """
+    linhas = []
+    for nome, medido in atual['cenarios'].items():
+        anterior = base['cenarios'].get(nome)
+        if anterior is None:
+            continue
+        antes = anterior['mediana_ms']
+        depois = medido['mediana_ms']
+        variacao = (depois - antes) / antes if antes else 0.0
+        linhas.append({
+            'cenario': nome,
+            'base_ms': antes,
+            'atual_ms': depois,
+            'variacao': variacao,
+            'regressao': variacao > tolerancia and depois - antes > minimo_ms,
+        })
+    return linhas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--saida', help="Arquivo JSON com os resultados")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--filtro', help="Mede só cenários cujo nome contém este texto")
+    parser.add_argument('--sem-escrita', action='store_true', help="Pula cenários que gravam no banco")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--comparar', help="Resultado JSON de base para checar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Piora relativa aceita na mediana (0.25 = 25%%)")
+    parser.add_argument('--minimo-ms', type=float, default=2.0,
+                        help="Diferença absoluta abaixo da qual a variação é tratada como ruído")
+    args = parser.parse_args()
+
+    contexto = carregar_contexto()
+    print(f"⏱️  {contexto['produtos']} produtos, {contexto['movimentacoes']} movimentações "
+          f"(último dia {contexto['ultimo_dia']})")
+
+    cenarios = [c for c in criar_cenarios(contexto, args.seed)
+                if (not args.filtro or args.filtro in c.nome)
+                and not (args.sem_escrita and c.escrita)]
+
+    resultado = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'backend': DatabaseConfig.BACKEND,
+            'banco': (DatabaseConfig.SQLITE_CONFIG['caminho'] if DatabaseConfig.BACKEND == 'sqlite'
+                      else f"{DatabaseConfig.DB_CONFIG['host']}/{DatabaseConfig.DB_CONFIG['database']}"),
+        },
+        'dados': {'produtos': contexto['produtos'], 'movimentacoes': contexto['movimentacoes']},
+        'cenarios': {},
+    }
+
+    print("=" * 80)
+    print(f"{'Cenário':<42} {'Mediana (ms)':>12} {'p95 (ms)':>10} {'Linhas':>12}")
+    print("-" * 80)
+    vazios = []
+    for cenario in cenarios:
+        medido = medir(cenario, args.repeticoes)
+        resultado['cenarios'][cenario.nome] = medido
+        linhas = '' if medido['linhas'] is None else medido['linhas']
+        if medido['linhas'] == 0:
+            vazios.append(cenario.nome)
+        marca = "❌" if medido['linhas'] == 0 else ""
+        print(f"{cenario.nome:<42} {medido['mediana_ms']:>12.2f} {medido['p95_ms']:>10.2f} {linhas:>12} {marca}")
+    print("=" * 80)
+    print(f"Pool: {DatabaseConfig.estatisticas_pool()}")
+
+    if vazios:
+        print(f"\n❌ Cenário(s) sem nenhuma linha (dados gerados não cobrem a consulta): "
+              f"{', '.join(vazios)}")
+        return 1
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados gravados em {args.saida}")
+
+    if not args.comparar:
+        return 0
+
+    with open(args.comparar, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    if base['ambiente'].get('backend', 'mysql') != DatabaseConfig.BACKEND:
+        print(f"ℹ️  Comparando backends: {base['ambiente'].get('backend', 'mysql')} (base) x "
+              f"{DatabaseConfig.BACKEND} (atual)")
+    if base.get('dados') != resultado['dados']:
+        print(f"⚠️  Volumes diferentes da base: {base.get('dados')} x {resultado['dados']}")
+
+    linhas = comparar(base, resultado, args.tolerancia, args.minimo_ms)
+    regressoes = [l for l in linhas if l['regressao']]
+
+    print(f"\n📊 Comparação com {args.comparar} (tolerância {args.tolerancia:.0%})")
+    for linha in linhas:
+        marca = "❌" if linha['regressao'] else "  "
+        print(f"{marca} {linha['cenario']:<42} {linha['base_ms']:>10.2f} → {linha['atual_ms']:>10.2f} ms "
+              f"({linha['variacao']:+.0%})")
+
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} cenário(s) acima da tolerância")
+        return 1
+    print("\n✅ Nenhuma regressão acima da tolerância")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
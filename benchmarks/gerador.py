@@ -0,0 +1,246 @@
+"""
+Gerador determinístico de dados sintéticos para benchmarks
+
+Uso:
+    python -m benchmarks.gerador [--produtos 100000] [--movimentacoes 10000000]
+                                 [--dias 365] [--seed 42] [--fim AAAA-MM-DD]
+                                 [--fechamentos-a-cada 7]
+
+Com a mesma seed (e a mesma data final) gera sempre o mesmo catálogo e a
+mesma sequência de movimentações. As movimentações são distribuídas em
+ordem cronológica ao longo de ``--dias`` dias, com produtos mais populares
+que outros, e uma saída só é gerada quando há saldo, então o estoque
+final de cada produto é a soma do seu histórico.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+
+class GeradorDados:
+    """Popula produtos, movimentações e fechamentos com volume configurável"""
+
+    PREFIXO = "Bench"
+    USUARIO = "benchmark"
+
+    def __init__(self, produtos: int = 1000, movimentacoes: int = 100000, dias: int = 365,
+                 seed: int = 42, fim: Optional[date] = None, tamanho_lote: int = 5000,
+                 fechamentos_a_cada: int = 0):
+        self.produtos = produtos
+        self.movimentacoes = movimentacoes
+        self.dias = dias
+        self.seed = seed
+        self.fim = fim or date.today()
+        self.tamanho_lote = tamanho_lote
+        self.fechamentos_a_cada = fechamentos_a_cada
+
+    def inicio(self) -> datetime:
+        """Início do primeiro dia do histórico gerado"""
+        return datetime.combine(self.fim - timedelta(days=self.dias - 1), datetime.min.time())
+
+    def produtos_sinteticos(self) -> Iterator[Dict]:
+        """Catálogo gerado a partir da seed; o saldo vem das movimentações"""
+        rnd = random.Random(self.seed)
+        for i in range(self.produtos):
+            yield {
+                'nome_produto': f"{self.PREFIXO} {rnd.choice('ABCDEFGHIJ')}{i:07d}",
+                'descricao': f"Produto sintético {i}",
+                'qtd_minima': rnd.randint(0, 200),
+                'preco_unitario': round(rnd.uniform(0.1, 500.0), 2),
+                'qtd_estoque': 0,
+            }
+
+    def movimentacoes_sinteticas(self, ids: List[int]) -> Iterator[Tuple]:
+        """
+        Movimentações em ordem cronológica, prontas para o INSERT
+
+        Yields:
+            Tuple: (id_produto, tipo, quantidade, data_movimentacao, observacao, usuario)
+        """
+        rnd = random.Random(self.seed + 1)
+        estoques = [0] * len(ids)
+        inicio = self.inicio()
+        passo = self.dias * 86400 / max(self.movimentacoes, 1)
+
+        for i in range(self.movimentacoes):
+            # Distribuição enviesada: poucos produtos concentram o movimento
+            indice = int(len(ids) * rnd.random() ** 2)
+            quantidade = rnd.randint(1, 50)
+            if rnd.random() < 0.45 and estoques[indice] >= quantidade:
+                tipo = 'SAIDA'
+                estoques[indice] -= quantidade
+            else:
+                tipo = 'ENTRADA'
+                estoques[indice] += quantidade
+
+            yield (ids[indice], tipo, quantidade, inicio + timedelta(seconds=i * passo),
+                   'benchmark', self.USUARIO)
+
+    def _gravar_movimentacoes(self, lote: List[Tuple]):
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany("""
+                    INSERT INTO movimentacoes
+                    (id_produto, tipo_movimentacao, quantidade, data_movimentacao, observacao, usuario)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, lote)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    def _executar(self, *comandos: Tuple[str, tuple]):
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                for sql, params in comandos:
+                    cursor.execute(sql, params)
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def gerar(self, ao_progredir: Callable[[str, int, int], None] = None) -> Dict:
+        """
+        Grava o conjunto de dados no banco configurado
+
+        Returns:
+            Dict: Volumes gerados e tempo de cada etapa (s)
+        """
+        progredir = ao_progredir or (lambda etapa, feito, total: None)
+        tempos = {}
+
+        # Produtos pelo caminho de importação do modelo (INSERT multi-linhas)
+        inicio = time.perf_counter()
+        ids = []
+        pendentes = []
+        for produto in self.produtos_sinteticos():
+            pendentes.append(produto)
+            if len(pendentes) >= self.tamanho_lote:
+                ids.extend(self._importar(pendentes))
+                pendentes = []
+                progredir('produtos', len(ids), self.produtos)
+        if pendentes:
+            ids.extend(self._importar(pendentes))
+            progredir('produtos', len(ids), self.produtos)
+
+        # estoque_em só conta produtos cadastrados até a data consultada:
+        # o cadastro recua para o início do histórico gerado
+        self._executar(("UPDATE produtos SET data_cadastro = %s WHERE id_produto BETWEEN %s AND %s",
+                        (self.inicio(), min(ids), max(ids))))
+        tempos['produtos'] = time.perf_counter() - inicio
+
+        # Movimentações com data explícita; o trigger mantém o resumo diário
+        inicio = time.perf_counter()
+        lote = []
+        gravadas = 0
+        for movimentacao in self.movimentacoes_sinteticas(ids):
+            lote.append(movimentacao)
+            if len(lote) >= self.tamanho_lote:
+                self._gravar_movimentacoes(lote)
+                gravadas += len(lote)
+                lote = []
+                if gravadas % (self.tamanho_lote * 20) == 0:
+                    progredir('movimentacoes', gravadas, self.movimentacoes)
+        if lote:
+            self._gravar_movimentacoes(lote)
+            gravadas += len(lote)
+        progredir('movimentacoes', gravadas, self.movimentacoes)
+        tempos['movimentacoes'] = time.perf_counter() - inicio
+
+        # Saldo final de cada produto = soma do seu histórico
+        inicio = time.perf_counter()
+        self._executar(("""
+            UPDATE produtos
+            SET qtd_estoque = COALESCE((
+                    SELECT SUM(CASE WHEN d.tipo_movimentacao = 'ENTRADA'
+                                    THEN d.quantidade ELSE -d.quantidade END)
+                    FROM movimentacoes_diarias d
+                    WHERE d.id_produto = produtos.id_produto
+                ), qtd_estoque)
+            WHERE id_produto BETWEEN %s AND %s
+        """, (min(ids), max(ids))), ("ANALYZE TABLE produtos, movimentacoes, movimentacoes_diarias", ()))
+        EstoqueModel.cache.invalidar()
+        tempos['saldos'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        fechamentos = 0
+        if self.fechamentos_a_cada > 0:
+            dia = min(self.fim, date.today() - timedelta(days=1))
+            primeiro = self.fim - timedelta(days=self.dias - 1)
+            while dia >= primeiro:
+                EstoqueModel.registrar_fechamento(dia.isoformat())
+                fechamentos += 1
+                progredir('fechamentos', fechamentos, 0)
+                dia -= timedelta(days=self.fechamentos_a_cada)
+        tempos['fechamentos'] = time.perf_counter() - inicio
+
+        return {
+            'produtos': len(ids),
+            'movimentacoes': gravadas,
+            'fechamentos': fechamentos,
+            'primeiro_id': min(ids),
+            'ultimo_id': max(ids),
+            'tempos_s': tempos,
+        }
+
+    def _importar(self, produtos: List[Dict]) -> List[int]:
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                conn.start_transaction()
+                ids = EstoqueModel._inserir_lote_produtos(cursor, produtos)
+                conn.commit()
+                return ids
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--produtos', type=int, default=1000)
+    parser.add_argument('--movimentacoes', type=int, default=100000)
+    parser.add_argument('--dias', type=int, default=365, help="Dias cobertos pelas movimentações")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fim', type=date.fromisoformat, default=None,
+                        help="Último dia com movimentações (padrão: hoje)")
+    parser.add_argument('--tamanho-lote', type=int, default=5000, help="Linhas por INSERT")
+    parser.add_argument('--fechamentos-a-cada', type=int, default=7,
+                        help="Intervalo em dias entre fechamentos (0 desativa)")
+    args = parser.parse_args()
+
+    gerador = GeradorDados(args.produtos, args.movimentacoes, args.dias, args.seed,
+                           args.fim, args.tamanho_lote, args.fechamentos_a_cada)
+
+    def progresso(etapa: str, feito: int, total: int):
+        print(f"   {etapa:<14} {feito:>12}" + (f" / {total}" if total else ""))
+
+    print(f"🏭 Gerando {args.produtos} produtos e {args.movimentacoes} movimentações "
+          f"em {args.dias} dias (seed {args.seed})...")
+    resultado = gerador.gerar(progresso)
+
+    print("=" * 60)
+    for etapa, segundos in resultado['tempos_s'].items():
+        print(f"{etapa:<20} {segundos:>10.2f}s")
+    print("=" * 60)
+    print(f"Produtos: ids {resultado['primeiro_id']}..{resultado['ultimo_id']}")
+
+
+if __name__ == '__main__':
+    main()
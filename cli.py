@@ -0,0 +1,265 @@
+"""
+Ferramentas de linha de comando do sistema de estoque (sem interface gráfica)
+
+Uso:
+    python cli.py importar produtos.csv [--rejeitados rejeitados.csv]
+    python cli.py exportar movimentacoes --formato jsonl --gzip --saida mov.jsonl.gz
+    python cli.py resumo-diario [--inicio 2024-01-01 --fim 2024-12-31]
+    python cli.py fechamento [--dia 2024-12-31]
+    python cli.py particoes [--meses 3]
+    python cli.py arquivar [--manter-meses 12 | --antes-de 2024-01-01]
+    python cli.py api [--host 0.0.0.0 --porta 8080 --workers 8]
+"""
+import argparse
+import sys
+import time
+
+
+def comando_importar(args) -> int:
+    from controllers.importacao import ImportadorCSV
+
+    def progresso(importador: ImportadorCSV):
+        print(f"   {importador.importadas:>10} importadas | "
+              f"{len(importador.rejeitadas):>8} rejeitadas | "
+              f"{importador.linhas_por_segundo:>10.0f} linhas/s")
+
+    importador = ImportadorCSV(
+        usuario=args.usuario,
+        tamanho_lote=args.tamanho_lote,
+        linhas_por_transacao=args.linhas_por_transacao,
+        ao_progredir=progresso
+    )
+
+    print(f"📥 Importando {args.arquivo}...")
+    try:
+        with open(args.arquivo, 'r', encoding='utf-8-sig', newline='') as arquivo:
+            importador.importar(arquivo, args.delimitador)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print("=" * 60)
+    print(f"Linhas lidas:      {importador.lidas}")
+    print(f"Importadas:        {importador.importadas}")
+    print(f"Rejeitadas:        {len(importador.rejeitadas)}")
+    print(f"Tempo:             {importador.duracao:.2f}s")
+    print(f"Taxa:              {importador.linhas_por_segundo:.0f} linhas/s")
+    print("=" * 60)
+
+    if importador.rejeitadas:
+        if args.rejeitados:
+            with open(args.rejeitados, 'w', encoding='utf-8', newline='') as saida:
+                importador.escrever_rejeitadas(saida)
+            print(f"⚠️  Linhas rejeitadas gravadas em {args.rejeitados}")
+        else:
+            for numero, motivo, _ in importador.rejeitadas[:20]:
+                print(f"⚠️  Linha {numero}: {motivo}")
+            if len(importador.rejeitadas) > 20:
+                print(f"   ... e mais {len(importador.rejeitadas) - 20} (use --rejeitados)")
+
+    return 0 if not importador.rejeitadas else 2
+
+
+def comando_exportar(args) -> int:
+    from controllers.exportacao import ExportadorDados
+    from models.estoque_model import EstoqueModel
+
+    apos_id = args.desde_id
+    lacunas = []
+    if apos_id is None and args.estado:
+        apos_id = ExportadorDados.ler_marca(args.estado)
+        lacunas = ExportadorDados.ler_lacunas(args.estado)
+
+    try:
+        if args.tabela == 'movimentacoes':
+            linhas = EstoqueModel.iterar_exportacao_movimentacoes(
+                args.inicio, args.fim, apos_id=apos_id, lacunas=lacunas)
+            exportador = ExportadorDados(args.formato, campo_id='id_movimentacao',
+                                         sobreposicao=args.sobreposicao if args.estado else 0)
+        else:
+            linhas = EstoqueModel.iterar_produtos(apos_id=apos_id)
+            exportador = ExportadorDados(args.formato, campo_id='id_produto')
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    saida = ExportadorDados.abrir_saida(args.saida, args.gzip)
+    try:
+        exportador.exportar(linhas, saida, apos_id, lacunas)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    if args.estado and exportador.ultimo_id is not None:
+        ExportadorDados.gravar_marca(args.estado, exportador.ultimo_id, exportador.lacunas)
+
+    taxa = exportador.linhas / exportador.duracao if exportador.duracao else 0.0
+    print(f"📤 {exportador.linhas} linhas exportadas em {exportador.duracao:.2f}s "
+          f"({taxa:.0f} linhas/s); último id: {exportador.ultimo_id}", file=sys.stderr)
+    return 0
+
+
+def comando_resumo_diario(args) -> int:
+    from models.estoque_model import EstoqueModel
+
+    print("🧮 Reconstruindo resumo diário de movimentações...")
+    inicio = time.perf_counter()
+    try:
+        linhas = EstoqueModel.reconstruir_resumo_diario(args.inicio, args.fim)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ {linhas} linhas (dia, produto, tipo) gravadas em {time.perf_counter() - inicio:.2f}s")
+    return 0
+
+
+def comando_fechamento(args) -> int:
+    from models.estoque_model import EstoqueModel
+
+    print(f"📦 Registrando fechamento de estoque ({args.dia or 'ontem'})...")
+    inicio = time.perf_counter()
+    try:
+        produtos = EstoqueModel.registrar_fechamento(args.dia)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ Saldo de {produtos} produtos gravado em {time.perf_counter() - inicio:.2f}s")
+    return 0
+
+
+def comando_particoes(args) -> int:
+    from models.estoque_model import EstoqueModel
+
+    try:
+        criadas = EstoqueModel.criar_particoes(args.meses)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+
+    if criadas:
+        print(f"✅ Partições criadas: {', '.join(criadas)}")
+    else:
+        print("✅ Nenhuma partição a criar")
+    return 0
+
+
+def comando_arquivar(args) -> int:
+    from models.estoque_model import EstoqueModel
+
+    meses = set()
+
+    def progresso(dia, arquivadas: int):
+        # Uma linha por mês concluído basta como acompanhamento
+        if (dia.year, dia.month) not in meses:
+            meses.add((dia.year, dia.month))
+            print(f"   {dia:%Y-%m}: {arquivadas:>12} arquivadas até aqui")
+
+    print("🗄️  Arquivando movimentações de meses encerrados...")
+    inicio = time.perf_counter()
+    try:
+        arquivadas = EstoqueModel.arquivar_movimentacoes(args.antes_de, args.manter_meses,
+                                                         ao_progredir=progresso)
+        criadas = EstoqueModel.criar_particoes()
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    decorrido = time.perf_counter() - inicio
+    print(f"✅ {arquivadas} movimentações arquivadas em {decorrido:.2f}s "
+          f"({arquivadas / decorrido if decorrido else 0:.0f}/s)")
+    if criadas:
+        print(f"   Partições criadas: {', '.join(criadas)}")
+    return 0
+
+
+def comando_api(args) -> int:
+    import asyncio
+    import logging
+    from api.servidor import servir
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    def iniciado(servidor):
+        print(f"🌐 API ouvindo em http://{servidor.host}:{servidor.porta} (Ctrl+C para encerrar)")
+
+    try:
+        asyncio.run(servir(args.host, args.porta, args.workers, args.fila, ao_iniciar=iniciado))
+    except KeyboardInterrupt:
+        print("\n👋 API encerrada")
+    except OSError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Ferramentas do sistema de estoque")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('importar', help="Importa produtos e saldos iniciais de um CSV")
+    p.add_argument('arquivo', help="CSV com nome_produto, descricao, qtd_minima, preco_unitario, qtd_estoque")
+    p.add_argument('--delimitador', default=None, help="Separador de campos (padrão: detectar)")
+    p.add_argument('--tamanho-lote', type=int, default=1000, help="Linhas por INSERT multi-linhas")
+    p.add_argument('--linhas-por-transacao', type=int, default=10000, help="Linhas por commit")
+    p.add_argument('--usuario', default='importacao', help="Usuário gravado nas movimentações")
+    p.add_argument('--rejeitados', help="Arquivo CSV para as linhas rejeitadas")
+    p.set_defaults(funcao=comando_importar)
+
+    p = sub.add_parser('exportar', help="Exporta movimentações ou produtos em CSV/JSON Lines")
+    p.add_argument('tabela', choices=('movimentacoes', 'produtos'))
+    p.add_argument('--formato', choices=('csv', 'jsonl'), default='csv')
+    p.add_argument('--saida', default='-', help="Arquivo de destino ('-' para a saída padrão)")
+    p.add_argument('--gzip', action='store_true', help="Compacta a saída com gzip")
+    p.add_argument('--inicio', help="Data inicial AAAA-MM-DD (movimentações)")
+    p.add_argument('--fim', help="Data final AAAA-MM-DD, inclusiva (movimentações)")
+    p.add_argument('--desde-id', type=int, help="Exporta só ids maiores que este")
+    p.add_argument('--estado', help="Arquivo com a marca d'água; lido antes e atualizado após exportar")
+    p.add_argument('--sobreposicao', type=int, default=5000,
+                   help="Ids abaixo da marca em que lacunas são relidas na próxima exportação "
+                        "(commits atrasados; 0 desativa)")
+    p.set_defaults(funcao=comando_exportar)
+
+    p = sub.add_parser('resumo-diario',
+                       help="Reconstrói o resumo diário usado nos totais dos relatórios")
+    p.add_argument('--inicio', help="Data inicial AAAA-MM-DD (padrão: desde o início)")
+    p.add_argument('--fim', help="Data final AAAA-MM-DD, inclusiva (padrão: até hoje)")
+    p.set_defaults(funcao=comando_resumo_diario)
+
+    p = sub.add_parser('fechamento',
+                       help="Grava o saldo de todos os produtos ao fim de um dia (agendar diariamente)")
+    p.add_argument('--dia', help="Dia AAAA-MM-DD já encerrado (padrão: ontem)")
+    p.set_defaults(funcao=comando_fechamento)
+
+    p = sub.add_parser('particoes',
+                       help="Cria as partições mensais de movimentações dos próximos meses (MySQL)")
+    p.add_argument('--meses', type=int, default=3, help="Meses à frente com partição própria")
+    p.set_defaults(funcao=comando_particoes)
+
+    p = sub.add_parser('arquivar',
+                       help="Move movimentações de meses encerrados para movimentacoes_arquivo")
+    p.add_argument('--manter-meses', type=int, default=12,
+                   help="Meses encerrados mantidos na tabela principal (padrão: 12)")
+    p.add_argument('--antes-de', help="Arquiva tudo antes do mês desta data AAAA-MM-DD")
+    p.set_defaults(funcao=comando_arquivar)
+
+    p = sub.add_parser('api', help="Sobe a API HTTP (JSON) para coletores e outros sistemas")
+    p.add_argument('--host', default='127.0.0.1', help="Endereço de escuta (0.0.0.0 para a rede)")
+    p.add_argument('--porta', type=int, default=8080)
+    p.add_argument('--workers', type=int, default=None,
+                   help="Threads para chamadas ao banco (padrão: DB_POOL_SIZE menos a reserva dos fluxos)")
+    p.add_argument('--fila', type=int, default=64,
+                   help="Requisições aguardando worker antes de responder 503")
+    p.set_defaults(funcao=comando_api)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
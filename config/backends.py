@@ -0,0 +1,498 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import List, Tuple
+
+
+class CursorPreparado:
+    """
+    Cursor que executa cada comando pela instrução preparada da conexão
+
+    Tem a interface do cursor do mysql-connector usada pelo modelo. As
+    linhas do resultado são lidas logo após a execução, então a conexão
+    nunca fica com resultado pendente; ``close`` não desfaz as instruções,
+    que continuam preparadas para o próximo uso da conexão.
+    """
+
+    def __init__(self, conexao: 'ConexaoMySQL', dictionary: bool = False):
+        self._conexao = conexao
+        self._dicionario = dictionary
+        self._linhas = []
+        self._posicao = 0
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    @property
+    def with_rows(self) -> bool:
+        return self.description is not None
+
+    def execute(self, operation, params=None):
+        cursor = self._conexao._instrucao(operation)
+        cursor.execute(operation, params or ())
+        self.description = cursor.description
+        self._linhas = cursor.fetchall() if cursor.with_rows else []
+        self._posicao = 0
+        self.rowcount = len(self._linhas) if self.description is not None else cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+
+    def executemany(self, operation, seq_params):
+        total = 0
+        for params in seq_params:
+            self.execute(operation, params)
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+
+    def _linha(self, linha):
+        if linha is None or not self._dicionario:
+            return linha
+        return dict(zip((d[0] for d in self.description), linha))
+
+    def fetchone(self):
+        if self._posicao >= len(self._linhas):
+            return None
+        self._posicao += 1
+        return self._linha(self._linhas[self._posicao - 1])
+
+    def fetchmany(self, size: int = 1):
+        linhas = self._linhas[self._posicao:self._posicao + size]
+        self._posicao += len(linhas)
+        return [self._linha(linha) for linha in linhas]
+
+    def fetchall(self):
+        return self.fetchmany(len(self._linhas))
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._linhas = []
+
+
+class ConexaoMySQL:
+    """
+    Conexão do mysql-connector que reaproveita instruções preparadas
+
+    ``cursor(prepared=True)`` devolve um ``CursorPreparado``: o texto de
+    cada comando é preparado no servidor na primeira execução e a
+    instrução fica guardada na conexão (até ``limite`` por conexão,
+    descartando a usada há mais tempo). Como as conexões vivem no pool,
+    o mesmo INSERT/UPDATE é analisado uma vez por conexão, não por
+    chamada. Com o backend em ``preparar = False`` o mesmo pedido usa um
+    cursor comum (protocolo de texto). O resto é repassado à conexão.
+    """
+
+    def __init__(self, conn, backend: 'BackendMySQL'):
+        self._conn = conn
+        self._backend = backend
+        self._preparadas = OrderedDict()
+
+    def cursor(self, prepared: bool = False, dictionary: bool = False, **kwargs):
+        if prepared and self._backend.preparar:
+            return CursorPreparado(self, dictionary)
+        if prepared:
+            kwargs.setdefault('buffered', True)
+        return self._conn.cursor(dictionary=dictionary, **kwargs)
+
+    def _instrucao(self, sql: str):
+        """Cursor preparado do comando, criado (e preparado) no primeiro uso"""
+        cursor = self._preparadas.pop(sql, None)
+        if cursor is None:
+            while len(self._preparadas) >= self._backend.limite_preparadas:
+                _, antiga = self._preparadas.popitem(last=False)
+                antiga.close()
+            cursor = self._conn.cursor(prepared=True)
+            self._backend.registrar_preparacao()
+        self._preparadas[sql] = cursor
+        return cursor
+
+    @property
+    def preparadas(self) -> int:
+        return len(self._preparadas)
+
+    def close(self):
+        for cursor in self._preparadas.values():
+            try:
+                cursor.close()
+            except self._backend.Error:
+                pass
+        self._preparadas.clear()
+        self._conn.close()
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+class BackendMySQL:
+    """Servidor MySQL via mysql-connector (importado só quando usado)"""
+
+    nome = 'mysql'
+    consulta_versao = "SELECT VERSION()"
+
+    def __init__(self, config: dict, preparar: bool = True, limite_preparadas: int = 64):
+        self.config = config
+        self.preparar = preparar
+        self.limite_preparadas = limite_preparadas
+        self._lock = threading.Lock()
+        self.preparacoes = 0
+
+    @property
+    def Error(self):
+        import mysql.connector
+        return mysql.connector.Error
+
+    # Ids de produtos cuja descrição tem todas as palavras (índice FULLTEXT)
+    BUSCA_DESCRICAO = """
+        SELECT id_produto FROM produtos
+        WHERE MATCH(descricao) AGAINST (%s IN BOOLEAN MODE)
+        LIMIT %s
+    """
+
+    @staticmethod
+    def termos_busca(palavras: List[str]) -> str:
+        """Cada palavra obrigatória e como prefixo (modo booleano)"""
+        return " ".join(f"+{palavra}*" for palavra in palavras)
+
+    # movimentacoes tem partições mensais (RANGE em data_movimentacao)
+    particiona_movimentacoes = True
+
+    # Limite superior de cada partição de movimentacoes (NULL na p_futuro)
+    LIMITES_PARTICOES = """
+        SELECT PARTITION_NAME AS nome,
+               CASE WHEN PARTITION_DESCRIPTION = 'MAXVALUE' THEN NULL
+                    ELSE FROM_UNIXTIME(PARTITION_DESCRIPTION) END AS limite
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'movimentacoes'
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """
+
+    @staticmethod
+    def dividir_particao_final(meses: List[date]) -> str:
+        """
+        ALTER que divide p_futuro em uma partição por mês (``meses``: dia 1 de cada um)
+
+        Os limites são calculados pelo servidor no fuso da sessão, o mesmo
+        usado para gravar e filtrar data_movimentacao.
+        """
+        particoes = []
+        for i, mes in enumerate(meses):
+            seguinte = meses[i + 1] if i + 1 < len(meses) else date(
+                mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+            particoes.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN "
+                             f"(UNIX_TIMESTAMP('{seguinte:%Y-%m-%d} 00:00:00'))")
+        particoes.append("PARTITION p_futuro VALUES LESS THAN MAXVALUE")
+        return ("ALTER TABLE movimentacoes REORGANIZE PARTITION p_futuro INTO (\n    "
+                + ",\n    ".join(particoes) + "\n)")
+
+    def conectar(self) -> ConexaoMySQL:
+        import mysql.connector
+        return ConexaoMySQL(mysql.connector.connect(**self.config), self)
+
+    def registrar_preparacao(self):
+        with self._lock:
+            self.preparacoes += 1
+
+    def inicializar(self) -> bool:
+        """Executa o script de criação do banco"""
+        import mysql.connector
+        conn = None
+        cursor = None
+        try:
+            conn = self.conectar()
+            cursor = conn.cursor()
+
+            # Lê e executa o script SQL
+            with open('sql/database.sql', 'r', encoding='utf-8') as f:
+                sql_script = f.read()
+
+            # Executa cada comando SQL separadamente
+            for statement in sql_script.split(';'):
+                if statement.strip():
+                    cursor.execute(statement)
+
+            conn.commit()
+            print("✅ Banco de dados inicializado com sucesso!")
+            return True
+
+        except mysql.connector.Error as err:
+            print(f"❌ Erro ao inicializar banco: {err}")
+            if conn:
+                conn.rollback()
+            return False
+        except FileNotFoundError:
+            print("❌ Arquivo sql/database.sql não encontrado!")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+
+# Tipos de data na ida e na volta, como o mysql-connector entrega
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(" "))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("TIMESTAMP", lambda valor: datetime.fromisoformat(valor.decode()))
+sqlite3.register_converter("DATE", lambda valor: date.fromisoformat(valor.decode()))
+sqlite3.register_converter("DECIMAL", lambda valor: Decimal(valor.decode()))
+
+
+@lru_cache(maxsize=512)
+def _traduzir(sql: str) -> Tuple[str, bool]:
+    """
+    Adapta um comando escrito para o MySQL ao dialeto do SQLite
+
+    - ``%s`` vira ``?``
+    - ``FOR UPDATE``/``FOR SHARE`` saem: a transação de escrita já tem o
+      banco inteiro travado (BEGIN IMMEDIATE)
+    - ``SET col = LAST_INSERT_ID(expr)`` vira ``SET col = expr ... RETURNING
+      col``, e o valor retornado é exposto em ``lastrowid`` como no MySQL
+    - ``ANALYZE TABLE ...`` vira ``ANALYZE``
+
+    Returns:
+        Tuple[str, bool]: (comando traduzido, se retorna o valor de LAST_INSERT_ID)
+    """
+    traduzido = re.sub(r"%(s|%)", lambda m: "?" if m.group(1) == "s" else "%", sql)
+    traduzido = re.sub(r"\s+FOR\s+(UPDATE|SHARE)\b", "", traduzido, flags=re.IGNORECASE)
+    traduzido = re.sub(r"^\s*ANALYZE\s+TABLE\b.*$", "ANALYZE", traduzido,
+                       flags=re.IGNORECASE | re.DOTALL)
+
+    retorno = re.search(r"(\w+)\s*=\s*LAST_INSERT_ID\(", traduzido, re.IGNORECASE)
+    if not retorno:
+        return traduzido, False
+
+    # Acha o parêntese que fecha LAST_INSERT_ID( e troca por uma expressão simples
+    abertura = retorno.end()
+    profundidade = 1
+    fim = abertura
+    while profundidade:
+        profundidade += {'(': 1, ')': -1}.get(traduzido[fim], 0)
+        fim += 1
+    expressao = traduzido[abertura:fim - 1]
+    traduzido = (traduzido[:retorno.start()] + f"{retorno.group(1)} = ({expressao})"
+                 + traduzido[fim:].rstrip() + f" RETURNING {retorno.group(1)}")
+    # Sob EXPLAIN as linhas lidas são as do plano, não o valor retornado
+    return traduzido, not re.match(r"\s*EXPLAIN\b", traduzido, re.IGNORECASE)
+
+
+class CursorSQLite:
+    """Cursor sqlite3 com a interface do mysql-connector usada pelo modelo"""
+
+    def __init__(self, conexao: 'ConexaoSQLite', dictionary: bool = False):
+        self._conexao = conexao
+        self._cursor = conexao._conn.cursor()
+        self._dicionario = dictionary
+        self._retornou = False
+        self.lastrowid = None
+        self.rowcount = -1
+
+    @property
+    def with_rows(self) -> bool:
+        return self._cursor.description is not None and not self._retornou
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation, params=None):
+        sql, self._retornou = _traduzir(operation)
+        self._cursor.execute(sql, params or ())
+
+        if self._retornou:
+            valores = self._cursor.fetchall()
+            self.rowcount = len(valores)
+            if valores:
+                self.lastrowid = valores[-1][0]
+            return
+
+        self.rowcount = self._cursor.rowcount
+        if self._cursor.lastrowid and sql.lstrip()[:6].upper() == "INSERT":
+            self.lastrowid = self._cursor.lastrowid
+
+    def executemany(self, operation, seq_params):
+        sql, self._retornou = _traduzir(operation)
+        self._cursor.executemany(sql, seq_params)
+        self.rowcount = self._cursor.rowcount
+
+        # Como no INSERT multi-linhas do MySQL: lastrowid é o primeiro id
+        # gerado (consecutivos, pois a transação de escrita é exclusiva)
+        if self.rowcount > 0 and sql.lstrip()[:6].upper() == "INSERT":
+            ultimo = self._conexao._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self.lastrowid = ultimo - self.rowcount + 1
+
+    def _linha(self, linha):
+        if linha is None or not self._dicionario:
+            return linha
+        return dict(zip((d[0] for d in self._cursor.description), linha))
+
+    def fetchone(self):
+        return self._linha(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1):
+        return [self._linha(linha) for linha in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        if self._retornou:
+            return []
+        return [self._linha(linha) for linha in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for linha in self._cursor:
+            yield self._linha(linha)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexaoSQLite:
+    """Conexão sqlite3 com a interface do mysql-connector usada pelo modelo e pelo pool"""
+
+    # Nunca há resultado pendente no protocolo: o cursor pode ser abandonado
+    unread_result = False
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cursor(self, dictionary: bool = False, buffered: bool = True, prepared: bool = False):
+        # O sqlite3 já guarda os comandos compilados por conexão (cached_statements)
+        return CursorSQLite(self, dictionary)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn.in_transaction
+
+    def start_transaction(self, consistent_snapshot: bool = False, readonly: bool = False, **kwargs):
+        # IMMEDIATE trava a escrita desde o início, como o FOR UPDATE
+        self._conn.execute("BEGIN" if readonly else "BEGIN IMMEDIATE")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect: bool = False):
+        self._conn.execute("SELECT 1").fetchone()
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+class BackendSQLite:
+    """
+    Banco SQLite embutido em um arquivo local (instalações de um só posto)
+
+    Usa WAL (leituras não esperam a escrita em andamento) e pragmas de
+    desempenho; as transações de escrita começam com BEGIN IMMEDIATE e
+    esperam até ``timeout`` segundos pelo travamento. O esquema de
+    ``sql/create_database_sqlite.sql`` é criado na primeira conexão.
+    """
+
+    nome = 'sqlite'
+    consulta_versao = "SELECT sqlite_version()"
+    Error = sqlite3.Error
+    SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql',
+                          'create_database_sqlite.sql')
+
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",   # com WAL, durável a cada checkpoint
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -65536",    # 64 MB por conexão
+        "PRAGMA mmap_size = 268435456",  # 256 MB
+    )
+
+    # Ids de produtos cuja descrição tem todas as palavras (tabela FTS5)
+    BUSCA_DESCRICAO = """
+        SELECT rowid AS id_produto FROM produtos_fts
+        WHERE produtos_fts MATCH %s
+        ORDER BY rank
+        LIMIT %s
+    """
+
+    @staticmethod
+    def termos_busca(palavras: List[str]) -> str:
+        """Cada palavra entre aspas (sem operadores do FTS5) e como prefixo"""
+        return " ".join('"' + palavra.replace('"', '') + '"*' for palavra in palavras)
+
+    # Sem particionamento: o arquivamento só reduz a tabela principal
+    particiona_movimentacoes = False
+
+    # Comandos compilados mantidos por conexão (o padrão do sqlite3 é 128)
+    COMANDOS_COMPILADOS = 256
+
+    def __init__(self, caminho: str, timeout: float = 10.0):
+        self.caminho = caminho
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._inicializado = False
+
+    def conectar(self) -> ConexaoSQLite:
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level="IMMEDIATE",
+            check_same_thread=False,  # o pool garante um usuário por vez
+            cached_statements=self.COMANDOS_COMPILADOS,
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma).fetchall()
+
+        if not self._inicializado:
+            with self._lock:
+                if not self._inicializado:
+                    existe = conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produtos'"
+                    ).fetchone()
+                    if not existe:
+                        self._criar_esquema(conn)
+                    else:
+                        self._atualizar_esquema(conn)
+                    self._inicializado = True
+        return ConexaoSQLite(conn)
+
+    # A partir desta linha o script só insere dados de exemplo
+    MARCA_EXEMPLOS = "-- Inserir dados de exemplo"
+
+    def _criar_esquema(self, conn: sqlite3.Connection, com_exemplos: bool = True):
+        with open(self.SCRIPT, 'r', encoding='utf-8') as f:
+            script = f.read()
+        if not com_exemplos:
+            script = script.split(self.MARCA_EXEMPLOS)[0]
+        conn.executescript(script)
+        conn.commit()
+
+    def _atualizar_esquema(self, conn: sqlite3.Connection):
+        """Cria em arquivos antigos as tabelas e índices adicionados depois (tudo IF NOT EXISTS)"""
+        busca_existia = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'produtos_fts'"
+        ).fetchone()
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(produtos)")}
+        if 'versao' not in colunas:
+            conn.execute("ALTER TABLE produtos ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+        self._criar_esquema(conn, com_exemplos=False)
+        if not busca_existia:
+            conn.execute("INSERT INTO produtos_fts (produtos_fts) VALUES ('rebuild')")
+            conn.commit()
+
+    def inicializar(self) -> bool:
+        """Cria as tabelas se o arquivo ainda não as tiver"""
+        try:
+            self.conectar().close()
+            print(f"✅ Banco de dados SQLite pronto em {self.caminho}")
+            return True
+        except (sqlite3.Error, OSError) as err:
+            print(f"❌ Erro ao inicializar banco: {err}")
+            return False
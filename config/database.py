@@ -1,12 +1,174 @@
-import mysql.connector
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from config.backends import BackendMySQL, BackendSQLite
+from config.instrumentacao import ConexaoInstrumentada, Instrumentacao
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+
+class PoolEsgotadoError(Exception):
+    """Nenhuma conexão do pool ficou livre dentro do tempo de espera"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexões reaproveitadas entre chamadas do modelo.
+    
+    As conexões são criadas sob demanda até o limite ``tamanho``. No
+    checkout a conexão é validada (ping apenas se ficou ociosa por mais de
+    ``intervalo_ping`` segundos) e qualquer transação pendente é desfeita,
+    de modo que cada chamador recebe uma sessão limpa. As conexões são
+    abertas pelo ``backend`` (MySQL ou SQLite).
+    """
+    
+    def __init__(self, backend, tamanho: int = 5, timeout: float = 10.0,
+                 intervalo_ping: float = 30.0):
+        self.backend = backend
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.intervalo_ping = intervalo_ping
+        
+        # Fila de (conexão, instante do último uso) ociosas
+        self._ociosas = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._abertas = 0
+        
+        # Estatísticas
+        self._checkouts = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._conexoes_criadas = 0
+        self._conexoes_descartadas = 0
+    
+    def _criar_conexao(self):
+        conn = self.backend.conectar()
+        with self._lock:
+            self._conexoes_criadas += 1
+        return conn
+    
+    def _reservar_vaga(self) -> bool:
+        """Reserva espaço para abrir uma nova conexão, se o limite permitir"""
+        with self._lock:
+            if self._abertas < self.tamanho:
+                self._abertas += 1
+                return True
+            return False
+    
+    def _liberar_vaga(self):
+        with self._lock:
+            self._abertas -= 1
+    
+    def _validar(self, conn, ultimo_uso: float) -> bool:
+        """Health check e reset da sessão no checkout"""
+        try:
+            if time.monotonic() - ultimo_uso > self.intervalo_ping:
+                conn.ping(reconnect=False)
+            if conn.in_transaction:
+                conn.rollback()
+            return True
+        except self.backend.Error:
+            return False
+    
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except self.backend.Error:
+            pass
+        self._liberar_vaga()
+        with self._lock:
+            self._conexoes_descartadas += 1
+    
+    def obter(self):
+        """
+        Retira uma conexão do pool
+        
+        Returns:
+            Conexão pronta para uso
+            
+        Raises:
+            PoolEsgotadoError: Se nenhuma conexão ficar livre a tempo
+            backend.Error: Se falhar ao abrir nova conexão
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        
+        while True:
+            try:
+                conn, ultimo_uso = self._ociosas.get_nowait()
+            except queue.Empty:
+                if self._reservar_vaga():
+                    try:
+                        conn = self._criar_conexao()
+                    except self.backend.Error:
+                        self._liberar_vaga()
+                        raise
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolEsgotadoError(
+                        f"Nenhuma conexão livre após {self.timeout:.1f}s "
+                        f"(tamanho do pool: {self.tamanho})"
+                    )
+                try:
+                    conn, ultimo_uso = self._ociosas.get(timeout=restante)
+                except queue.Empty:
+                    continue
+            
+            if self._validar(conn, ultimo_uso):
+                break
+            self._descartar(conn)
+        
+        espera = time.monotonic() - inicio
+        with self._lock:
+            self._checkouts += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+        return conn
+    
+    def devolver(self, conn, descartar: bool = False):
+        """Devolve a conexão ao pool (ou a fecha, se ``descartar``)"""
+        # Resultados não lidos deixariam a sessão inutilizável para o próximo
+        if descartar or conn.unread_result:
+            self._descartar(conn)
+            return
+        self._ociosas.put((conn, time.monotonic()))
+    
+    def fechar(self):
+        """Fecha todas as conexões ociosas"""
+        while True:
+            try:
+                conn, _ = self._ociosas.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+    
+    def estatisticas(self) -> dict:
+        """Retorna contadores de uso do pool"""
+        with self._lock:
+            return {
+                'tamanho': self.tamanho,
+                'abertas': self._abertas,
+                'ociosas': self._ociosas.qsize(),
+                'checkouts': self._checkouts,
+                'espera_total_s': self._espera_total,
+                'espera_media_ms': (self._espera_total / self._checkouts * 1000
+                                    if self._checkouts else 0.0),
+                'espera_max_ms': self._espera_max * 1000,
+                'conexoes_criadas': self._conexoes_criadas,
+                'conexoes_descartadas': self._conexoes_descartadas,
+            }
+
+
 class DatabaseConfig:
-    """Configuração centralizada do banco de dados MySQL"""
+    """Configuração centralizada do banco de dados (MySQL ou SQLite embutido)"""
+    
+    # 'mysql' (servidor) ou 'sqlite' (arquivo local, instalação de um só posto)
+    BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
     
     DB_CONFIG = {
         'host': os.getenv('DB_HOST', 'localhost'),
@@ -16,26 +178,173 @@ class DatabaseConfig:
         'auth_plugin': 'mysql_native_password'
     }
     
+    # Instruções preparadas no servidor MySQL, reaproveitadas por conexão do pool
+    PREPARADAS_CONFIG = {
+        'preparar': os.getenv('DB_INSTRUCOES_PREPARADAS', '1') == '1',
+        'limite_preparadas': int(os.getenv('DB_MAX_PREPARADAS', '64')),
+    }
+    
+    SQLITE_CONFIG = {
+        'caminho': os.getenv('DB_SQLITE_PATH', 'estoque.db'),
+        'timeout': float(os.getenv('DB_SQLITE_TIMEOUT', '10')),
+    }
+    
+    # Configuração do pool de conexões
+    POOL_CONFIG = {
+        'tamanho': int(os.getenv('DB_POOL_SIZE', '5')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'intervalo_ping': float(os.getenv('DB_POOL_PING_INTERVAL', '30')),
+    }
+    
+    # Cache de produtos do modelo
+    CACHE_CONFIG = {
+        'tamanho_max': int(os.getenv('CACHE_PRODUTOS_MAX', '10000')),
+        'intervalo_validacao': float(os.getenv('CACHE_PRODUTOS_VALIDACAO', '2')),
+        'janela': float(os.getenv('CACHE_PRODUTOS_JANELA', '5')),
+    }
+    
+    # Leituras do modelo em linhas compactas (__slots__) em vez de dicts
+    LINHAS_COMPACTAS = os.getenv('LINHAS_COMPACTAS', '0') == '1'
+    
+    # Instrumentação dos comandos SQL (desligada por padrão)
+    INSTRUMENTACAO_CONFIG = {
+        'ativa': os.getenv('DB_INSTRUMENTACAO', '0') == '1',
+        'limite_lenta_ms': float(os.getenv('DB_CONSULTA_LENTA_MS', '200')),
+        'arquivo_log': os.getenv('DB_LOG_CONSULTAS_LENTAS') or None,
+    }
+    
+    # Diário local de movimentações (desligado sem arquivo)
+    DIARIO_CONFIG = {
+        'caminho': os.getenv('DIARIO_MOVIMENTACOES') or None,
+        'tamanho_lote': int(os.getenv('DIARIO_TAMANHO_LOTE', '200')),
+        'intervalo_ms': float(os.getenv('DIARIO_INTERVALO_MS', '200')),
+    }
+
+    # Acompanhamento, pela interface, das alterações de outros clientes
+    ALTERACOES_CONFIG = {
+        'intervalo': float(os.getenv('ALTERACOES_INTERVALO', '2')),
+        'intervalo_max': float(os.getenv('ALTERACOES_INTERVALO_MAX', '30')),
+        'janela': float(os.getenv('ALTERACOES_JANELA', '5')),
+        'limite': int(os.getenv('ALTERACOES_LIMITE', '500')),
+    }
+
+    _backend = None
+    _pool = None
+    _pool_lock = threading.Lock()
+    
+    @staticmethod
+    def get_backend():
+        """Retorna o backend escolhido por DB_BACKEND, criando-o no primeiro uso"""
+        if DatabaseConfig._backend is None:
+            with DatabaseConfig._pool_lock:
+                if DatabaseConfig._backend is None:
+                    if DatabaseConfig.BACKEND == 'sqlite':
+                        backend = BackendSQLite(**DatabaseConfig.SQLITE_CONFIG)
+                    elif DatabaseConfig.BACKEND == 'mysql':
+                        backend = BackendMySQL(DatabaseConfig.DB_CONFIG, **DatabaseConfig.PREPARADAS_CONFIG)
+                    else:
+                        raise ValueError(f"DB_BACKEND inválido: {DatabaseConfig.BACKEND!r} "
+                                         "(use mysql ou sqlite)")
+                    DatabaseConfig._backend = backend
+        return DatabaseConfig._backend
+    
+    @staticmethod
+    def get_pool() -> ConnectionPool:
+        """Retorna o pool de conexões, criando-o no primeiro uso"""
+        if DatabaseConfig._pool is None:
+            backend = DatabaseConfig.get_backend()
+            with DatabaseConfig._pool_lock:
+                if DatabaseConfig._pool is None:
+                    DatabaseConfig._pool = ConnectionPool(
+                        backend, **DatabaseConfig.POOL_CONFIG
+                    )
+        return DatabaseConfig._pool
+    
+    @staticmethod
+    @contextmanager
+    def conexao():
+        """
+        Empresta uma conexão do pool durante o bloco ``with``
+        
+        A conexão volta ao pool ao final do bloco. Se o bloco terminar com
+        erro de banco, a conexão é descartada em vez de reaproveitada.
+        Com a instrumentação ativa, a espera pela conexão é medida e a
+        conexão entregue registra cada comando executado.
+        
+        Yields:
+            Conexão do pool
+        """
+        pool = DatabaseConfig.get_pool()
+        erro_banco = pool.backend.Error
+        medir = Instrumentacao.ativa
+        if medir:
+            inicio = time.perf_counter()
+        try:
+            conn = pool.obter()
+        except erro_banco as err:
+            DatabaseConfig._log_erro_conexao(err)
+            raise
+        if medir:
+            Instrumentacao.registrar_aquisicao(time.perf_counter() - inicio)
+        
+        descartar = False
+        try:
+            yield ConexaoInstrumentada(conn) if medir else conn
+        except erro_banco:
+            descartar = True
+            raise
+        finally:
+            pool.devolver(conn, descartar=descartar)
+    
+    @staticmethod
+    def estatisticas_pool() -> dict:
+        """Retorna estatísticas do pool (checkouts, espera, conexões criadas)"""
+        return DatabaseConfig.get_pool().estatisticas()
+    
+    @staticmethod
+    def estatisticas_consultas() -> dict:
+        """
+        Retorna as medições dos comandos SQL
+        
+        Inclui, por rótulo ``função:COMANDO tabela``, chamadas, erros, linhas
+        e latência (média, p50/p95/p99, máximo e histograma por faixa), além
+        do tempo de aquisição de conexão e das consultas lentas recentes.
+        """
+        return Instrumentacao.estatisticas()
+    
+    @staticmethod
+    def instrumentar(ativa: bool = True, limite_lenta_ms: float = None):
+        """Liga ou desliga a instrumentação em tempo de execução"""
+        Instrumentacao.configurar(ativa, limite_lenta_ms)
+    
+    @staticmethod
+    def _log_erro_conexao(err):
+        if DatabaseConfig.BACKEND == 'sqlite':
+            config_seguro = DatabaseConfig.SQLITE_CONFIG
+        else:
+            config_seguro = DatabaseConfig.DB_CONFIG.copy()
+            config_seguro['password'] = '***OCULTO***'
+        print(f"❌ Erro ao conectar ao banco de dados:")
+        print(f"   Configuração: {config_seguro}")
+        print(f"   Erro: {err}")
+    
     @staticmethod
     def get_connection():
         """
         Estabelece conexão com o banco de dados
         
         Returns:
-            mysql.connector.connection: Objeto de conexão
+            Objeto de conexão (fora do pool)
             
         Raises:
-            mysql.connector.Error: Se falhar ao conectar
+            backend.Error: Se falhar ao conectar
         """
+        backend = DatabaseConfig.get_backend()
         try:
-            conn = mysql.connector.connect(**DatabaseConfig.DB_CONFIG)
+            conn = backend.conectar()
             return conn
-        except mysql.connector.Error as err:
-            config_seguro = DatabaseConfig.DB_CONFIG.copy()
-            config_seguro['password'] = '***OCULTO***'
-            print(f"❌ Erro ao conectar ao banco de dados:")
-            print(f"   Configuração: {config_seguro}")
-            print(f"   Erro: {err}")
+        except backend.Error as err:
+            DatabaseConfig._log_erro_conexao(err)
             raise
     
     @staticmethod
@@ -46,23 +355,20 @@ class DatabaseConfig:
         Returns:
             bool: True se conexão bem sucedida, False caso contrário
         """
-        conn = None
-        cursor = None
+        backend = DatabaseConfig.get_backend()
         try:
-            conn = DatabaseConfig.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT VERSION()")
-            version = cursor.fetchone()
-            print(f"✅ Conexão bem sucedida! MySQL versão: {version[0]}")
+            with DatabaseConfig.conexao() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(backend.consulta_versao)
+                    version = cursor.fetchone()
+                finally:
+                    cursor.close()
+            print(f"✅ Conexão bem sucedida! {backend.nome} versão: {version[0]}")
             return True
-        except mysql.connector.Error as err:
+        except (backend.Error, PoolEsgotadoError) as err:
             print(f"❌ Falha no teste de conexão: {err}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
     
     @staticmethod
     def init_database():
@@ -72,35 +378,6 @@ class DatabaseConfig:
         Returns:
             bool: True se inicialização bem sucedida
         """
-        conn = None
-        cursor = None
-        try:
-            conn = DatabaseConfig.get_connection()
-            cursor = conn.cursor()
-            
-            # Lê e executa o script SQL
-            with open('sql/database.sql', 'r', encoding='utf-8') as f:
-                sql_script = f.read()
-                
-            # Executa cada comando SQL separadamente
-            for statement in sql_script.split(';'):
-                if statement.strip():
-                    cursor.execute(statement)
-            
-            conn.commit()
-            print("✅ Banco de dados inicializado com sucesso!")
-            return True
-            
-        except mysql.connector.Error as err:
-            print(f"❌ Erro ao inicializar banco: {err}")
-            if conn:
-                conn.rollback()
-            return False
-        except FileNotFoundError:
-            print("❌ Arquivo sql/database.sql não encontrado!")
-            return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
\ No newline at end of file
+        return DatabaseConfig.get_backend().inicializar()
+
+Instrumentacao.configurar(**DatabaseConfig.INSTRUMENTACAO_CONFIG)
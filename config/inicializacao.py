@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class TemposInicializacao:
+    """
+    Marcos de tempo da abertura do aplicativo, contados do início do processo
+
+    ``main.py`` registra o instante inicial antes dos demais imports e cada
+    etapa chama ``marcar`` uma única vez (chamadas repetidas são ignoradas).
+    Com ``ESTOQUE_TEMPOS_INICIALIZACAO=1`` (ou ``python main.py --tempos``) o
+    relatório é impresso assim que os dados iniciais aparecem na tela; ele
+    também fica na aba de diagnóstico.
+    """
+
+    exibir = os.getenv('ESTOQUE_TEMPOS_INICIALIZACAO', '0') == '1'
+
+    _lock = threading.Lock()
+    _inicio = time.perf_counter()
+    _etapas: List[Tuple[str, float, str]] = []
+
+    @classmethod
+    def iniciar(cls, inicio: Optional[float] = None):
+        """Zera os marcos; ``inicio`` é o perf_counter() do começo do processo"""
+        with cls._lock:
+            cls._inicio = inicio if inicio is not None else time.perf_counter()
+            cls._etapas = []
+
+    @classmethod
+    def marcar(cls, etapa: str):
+        agora = time.perf_counter()
+        with cls._lock:
+            if any(nome == etapa for nome, _, _ in cls._etapas):
+                return
+            cls._etapas.append((etapa, (agora - cls._inicio) * 1000, threading.current_thread().name))
+
+    @classmethod
+    def etapas(cls) -> List[Tuple[str, float, str]]:
+        """(etapa, ms desde o início, thread), na ordem em que ocorreram"""
+        with cls._lock:
+            return list(cls._etapas)
+
+    @classmethod
+    def relatorio(cls) -> str:
+        linhas = [f"{'Etapa':<28} {'Desde o início':>15} {'Delta':>10}  Thread"]
+        anterior = 0.0
+        for etapa, ms, thread in cls.etapas():
+            linhas.append(f"{etapa:<28} {ms:>12.1f} ms {ms - anterior:>7.1f} ms  {thread}")
+            anterior = ms
+        return "\n".join(linhas)
@@ -0,0 +1,303 @@
+import bisect
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional
+
+logger_lentas = logging.getLogger("estoque.consultas_lentas")
+
+
+class HistogramaLatencia:
+    """Histograma de latências (ms) em faixas fixas, com contagem e soma"""
+
+    # Limites superiores das faixas, em ms; a última faixa é aberta
+    LIMITES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.faixas = [0] * (len(self.LIMITES_MS) + 1)
+        self.chamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms: float):
+        self.faixas[bisect.bisect_left(self.LIMITES_MS, ms)] += 1
+        self.chamadas += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentil(self, p: float) -> float:
+        """Estimativa do percentil ``p`` (0-100): limite superior da faixa que o contém"""
+        if not self.chamadas:
+            return 0.0
+        alvo = self.chamadas * p / 100
+        acumulado = 0
+        for indice, quantidade in enumerate(self.faixas):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                if indice < len(self.LIMITES_MS):
+                    return min(float(self.LIMITES_MS[indice]), self.max_ms)
+                break
+        return self.max_ms
+
+    def resumo(self) -> dict:
+        return {
+            'chamadas': self.chamadas,
+            'total_ms': round(self.total_ms, 3),
+            'media_ms': round(self.total_ms / self.chamadas, 3) if self.chamadas else 0.0,
+            'p50_ms': self.percentil(50),
+            'p95_ms': self.percentil(95),
+            'p99_ms': self.percentil(99),
+            'max_ms': round(self.max_ms, 3),
+            'faixas': dict(zip([f"<={l}" for l in self.LIMITES_MS] + ['>5000'], self.faixas)),
+        }
+
+
+class _EstatisticaComando:
+    """Latência, linhas e erros acumulados de um rótulo de comando"""
+
+    def __init__(self):
+        self.latencia = HistogramaLatencia()
+        self.linhas = 0
+        self.erros = 0
+
+    def resumo(self) -> dict:
+        dados = self.latencia.resumo()
+        dados['linhas'] = self.linhas
+        dados['erros'] = self.erros
+        return dados
+
+
+@lru_cache(maxsize=1024)
+def _descrever_sql(sql: str) -> str:
+    """'SELECT produtos', 'INSERT movimentacoes'... a partir do texto do comando"""
+    comando = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "?"
+    tabela = re.search(r"\b(?:FROM|INTO|UPDATE)\s+`?(\w+)", sql, re.IGNORECASE)
+    return f"{comando} {tabela.group(1)}" if tabela else comando
+
+
+class Instrumentacao:
+    """
+    Medição dos comandos SQL executados pelas conexões do pool
+
+    Desativada, ``DatabaseConfig.conexao`` entrega a conexão original e o
+    único custo é testar ``ativa``. Ativada, os cursores são embrulhados
+    e cada execução é registrada sob um rótulo ``função:COMANDO tabela``
+    (ex.: ``registrar_saida:UPDATE produtos``), com histograma de
+    latência, linhas afetadas/lidas e erros. Em SELECT a latência vai do
+    execute até o resultado se esgotar (ou o cursor fechar), somando o
+    tempo gasto nos fetch*. Execuções acima de ``limite_lenta_ms`` vão
+    para o log de consultas lentas.
+    """
+
+    ativa = False
+    limite_lenta_ms = 200.0
+    MAX_LENTAS = 200
+
+    _lock = threading.Lock()
+    _comandos: Dict[str, _EstatisticaComando] = {}
+    _aquisicao = HistogramaLatencia()
+    _lentas = deque(maxlen=MAX_LENTAS)
+    _local = threading.local()
+
+    @classmethod
+    def configurar(cls, ativa: bool, limite_lenta_ms: float = None, arquivo_log: Optional[str] = None):
+        """Liga/desliga a medição e, opcionalmente, grava consultas lentas em arquivo"""
+        cls.ativa = ativa
+        if limite_lenta_ms is not None:
+            cls.limite_lenta_ms = limite_lenta_ms
+        if arquivo_log:
+            handler = logging.FileHandler(arquivo_log, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger_lentas.addHandler(handler)
+            logger_lentas.setLevel(logging.WARNING)
+
+    @classmethod
+    def zerar(cls):
+        with cls._lock:
+            cls._comandos = {}
+            cls._aquisicao = HistogramaLatencia()
+            cls._lentas.clear()
+
+    @classmethod
+    def registrar_aquisicao(cls, segundos: float):
+        with cls._lock:
+            cls._aquisicao.registrar(segundos * 1000)
+
+    @classmethod
+    def registrar_execucao(cls, rotulo: str, sql: str, params, segundos: float,
+                           linhas: int, erro: bool = False):
+        ms = segundos * 1000
+        with cls._lock:
+            estatistica = cls._comandos.get(rotulo)
+            if estatistica is None:
+                estatistica = cls._comandos[rotulo] = _EstatisticaComando()
+            estatistica.latencia.registrar(ms)
+            if linhas > 0:
+                estatistica.linhas += linhas
+            if erro:
+                estatistica.erros += 1
+
+        if ms >= cls.limite_lenta_ms:
+            texto = " ".join(sql.split())
+            parametros = repr(params)[:200] if params is not None else ""
+            with cls._lock:
+                cls._lentas.append({
+                    'quando': datetime.now().isoformat(timespec='seconds'),
+                    'rotulo': rotulo,
+                    'ms': round(ms, 3),
+                    'sql': texto[:500],
+                    'parametros': parametros,
+                })
+            logger_lentas.warning("%.1fms %s | %s | %s", ms, rotulo, texto, parametros)
+
+    @classmethod
+    def rotulo_fluxo(cls, funcao: str) -> str:
+        """
+        Rótulo ``origem/funcao`` para uma consulta lida em fluxo
+
+        O gerador só executa quando alguém o consome, longe de quem o
+        pediu; a origem (quem chamou ``funcao``) é capturada aqui, na
+        criação, para separar relatório, exportação e API.
+        """
+        if not cls.ativa:
+            return funcao
+        return f"{sys._getframe(2).f_code.co_name}/{funcao}"
+
+    @classmethod
+    @contextmanager
+    def chamador(cls, nome: str):
+        """Rotula com ``nome`` as execuções do bloco, no lugar da função que chamou execute"""
+        anterior = getattr(cls._local, 'chamador', None)
+        cls._local.chamador = nome
+        try:
+            yield
+        finally:
+            cls._local.chamador = anterior
+
+    @classmethod
+    def estatisticas(cls) -> dict:
+        """Resumo por rótulo, tempo de aquisição de conexão e consultas lentas recentes"""
+        with cls._lock:
+            return {
+                'ativa': cls.ativa,
+                'limite_lenta_ms': cls.limite_lenta_ms,
+                'aquisicao_conexao': cls._aquisicao.resumo(),
+                'comandos': {rotulo: e.resumo() for rotulo, e in sorted(cls._comandos.items())},
+                'lentas': list(cls._lentas),
+            }
+
+
+class CursorInstrumentado:
+    """Cursor que mede cada execução e conta as linhas lidas"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._rotulo = None
+        # SELECT em leitura: [sql, params, segundos, linhas], registrado ao esgotar
+        self._pendente = None
+
+    def _medir(self, metodo, operation, params, *args, **kwargs):
+        self._concluir()
+        # Função do modelo que chamou execute/executemany, salvo rótulo explícito
+        chamador = getattr(Instrumentacao._local, 'chamador', None) or sys._getframe(2).f_code.co_name
+        self._rotulo = rotulo = f"{chamador}:{_descrever_sql(operation)}"
+
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(operation, params, *args, **kwargs)
+        except Exception:
+            Instrumentacao.registrar_execucao(rotulo, operation, params,
+                                              time.perf_counter() - inicio, 0, erro=True)
+            raise
+        duracao = time.perf_counter() - inicio
+
+        # Em SELECT o tempo e as linhas da leitura (fetch*) entram na mesma
+        # execução; em cursor não bufferizado é ali que o tempo é gasto
+        if self._cursor.with_rows:
+            self._pendente = [operation, params, duracao, 0]
+        else:
+            Instrumentacao.registrar_execucao(rotulo, operation, params, duracao, self._cursor.rowcount)
+        return resultado
+
+    def _concluir(self):
+        if self._pendente is not None:
+            operation, params, segundos, linhas = self._pendente
+            self._pendente = None
+            Instrumentacao.registrar_execucao(self._rotulo, operation, params, segundos, linhas)
+
+    def _ler(self, metodo, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = metodo(*args, **kwargs)
+        if self._pendente is not None:
+            self._pendente[2] += time.perf_counter() - inicio
+        return resultado
+
+    def _contar(self, linhas: int, esgotou: bool):
+        if self._pendente is not None:
+            self._pendente[3] += linhas
+            if esgotou:
+                self._concluir()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._medir(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._medir(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def fetchone(self):
+        linha = self._ler(self._cursor.fetchone)
+        self._contar(1 if linha is not None else 0, linha is None)
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        linhas = self._ler(self._cursor.fetchmany, *args, **kwargs)
+        self._contar(len(linhas), not linhas)
+        return linhas
+
+    def fetchall(self):
+        linhas = self._ler(self._cursor.fetchall)
+        self._contar(len(linhas), True)
+        return linhas
+
+    def __iter__(self):
+        iterador = iter(self._cursor)
+        while True:
+            try:
+                linha = self._ler(next, iterador)
+            except StopIteration:
+                self._contar(0, True)
+                return
+            self._contar(1, False)
+            yield linha
+
+    def close(self):
+        self._concluir()
+        return self._cursor.close()
+
+    def __del__(self):
+        # Cursor abandonado com resultado pendente (consumidor parou no meio)
+        self._concluir()
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class ConexaoInstrumentada:
+    """Conexão cujos cursores são instrumentados; o resto é repassado"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
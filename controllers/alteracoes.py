@@ -0,0 +1,133 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+class AcompanhamentoAlteracoes:
+    """
+    Estado do acompanhamento de alterações feitas por outros clientes
+
+    A marca é o maior ``atualizado_em`` já lido e só avança. Cada consulta
+    relê a partir de ``marca - janela`` (transações que gravaram antes da
+    marca mas confirmaram depois dela) e a ``versao`` de cada produto
+    separa o que mudou do que só foi relido. Com mais alterações que
+    ``limite``, a tela é recarregada por inteiro e a marca passa à atual,
+    mantendo a janela: o que confirmar depois da recarga com data anterior
+    a ela ainda é lido (uma carga maior que ``limite`` dentro da janela
+    pode pedir mais de uma recarga até sair dela). Sem alterações, o intervalo
+    entre consultas dobra até ``intervalo_max``; qualquer alteração (ou
+    atividade local) o devolve ao ``intervalo`` base. Intervalo 0 desliga.
+    """
+
+    # Marca quando a tabela de produtos ainda estava vazia
+    INICIO = datetime(1970, 1, 2)
+
+    def __init__(self, intervalo: float = 2.0, intervalo_max: float = 30.0,
+                 janela: float = 5.0, limite: int = 500, variacao: float = 0.1):
+        self.intervalo_base = intervalo
+        self.intervalo_max = max(intervalo_max, intervalo)
+        self.janela = janela
+        self.limite = limite
+        # Espalha as consultas de clientes abertos ao mesmo tempo
+        self.variacao = variacao
+
+        self.intervalo = intervalo
+        self.iniciado = False
+        self.marca: Optional[datetime] = None
+        # id_produto -> (versao, atualizado_em), só dentro da janela
+        self._versoes: Dict[int, Tuple[int, datetime]] = {}
+
+        # Estatísticas
+        self.consultas = 0
+        self.vazias = 0
+        self.linhas_lidas = 0
+        self.entregues = 0
+        self.recargas = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.intervalo_base > 0
+
+    def desde(self) -> Optional[datetime]:
+        """Início da próxima consulta (None: só obter a marca inicial)"""
+        if not self.iniciado:
+            return None
+        if self.marca is None:
+            return self.INICIO
+        return self.marca - timedelta(seconds=self.janela)
+
+    def iniciar(self, marca: Optional[datetime]):
+        """Ponto de partida, lido antes da carga completa da tela"""
+        self.iniciado = True
+        self.marca = marca
+        self._versoes.clear()
+        self.intervalo = self.intervalo_base
+
+    def aplicar(self, linhas: List[Dict], marca: Optional[datetime]) -> Tuple[List[Dict], bool]:
+        """
+        Separa, das linhas lidas, os produtos realmente alterados
+
+        Returns:
+            Tuple: (produtos alterados, True se houve mais alterações que
+                    ``limite`` e a tela deve ser recarregada por completo)
+        """
+        if not self.iniciado:
+            self.iniciar(marca)
+            return [], False
+
+        self.consultas += 1
+        self.linhas_lidas += len(linhas)
+        if len(linhas) >= self.limite:
+            # A marca já é a atual (lida antes da recarga que vai seguir);
+            # a janela anterior a ela continua sendo relida
+            self.recargas += 1
+            self.marca = marca
+            self._versoes.clear()
+            self.intervalo = self.intervalo_base
+            return [], True
+
+        alterados = []
+        for produto in linhas:
+            id_produto = produto['id_produto']
+            visto = self._versoes.get(id_produto)
+            if visto is None or visto[0] != produto['versao']:
+                alterados.append(produto)
+            self._versoes[id_produto] = (produto['versao'], produto['atualizado_em'])
+
+        if marca is not None and (self.marca is None or marca > self.marca):
+            self.marca = marca
+        if self.marca is not None:
+            limite_janela = self.marca - timedelta(seconds=self.janela)
+            self._versoes = {i: v for i, v in self._versoes.items() if v[1] >= limite_janela}
+
+        if alterados:
+            self.entregues += len(alterados)
+            self.intervalo = self.intervalo_base
+        else:
+            self.vazias += 1
+            self.intervalo = min(self.intervalo * 2, self.intervalo_max)
+        return alterados, False
+
+    def falhou(self):
+        """Erro na consulta: espera como se estivesse ocioso"""
+        self.intervalo = min(self.intervalo * 2, self.intervalo_max)
+
+    def atividade(self):
+        """Atividade local: volta ao intervalo base"""
+        self.intervalo = self.intervalo_base
+
+    def proximo_ms(self) -> int:
+        """Espera até a próxima consulta, com variação aleatória"""
+        fator = 1 + random.uniform(-self.variacao, self.variacao)
+        return max(1, int(self.intervalo * fator * 1000))
+
+    def estatisticas(self) -> dict:
+        return {
+            'consultas': self.consultas,
+            'vazias': self.vazias,
+            'linhas_lidas': self.linhas_lidas,
+            'entregues': self.entregues,
+            'recargas': self.recargas,
+            'intervalo': self.intervalo,
+            'marca': self.marca,
+        }
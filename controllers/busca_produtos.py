@@ -0,0 +1,87 @@
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class CacheBuscaProdutos:
+    """
+    Cache das buscas recentes do autocompletar de produtos
+
+    Guarda o resultado de cada texto buscado por ``validade`` segundos (até
+    ``tamanho_max`` textos). Se um texto mais curto que é prefixo do atual
+    trouxe menos que ``limite`` produtos, o resultado dele já contém todos os
+    que o texto atual encontraria; nesse caso a resposta é filtrada aqui, sem
+    ir ao banco. Textos só de dígitos (busca por id) não são refinados assim.
+    """
+
+    def __init__(self, limite: int, tamanho_max: int = 64, validade: float = 30.0,
+                 min_palavra: int = 3):
+        self.limite = limite
+        self.tamanho_max = tamanho_max
+        self.validade = validade
+        self.min_palavra = min_palavra
+        # texto normalizado -> (instante, produtos)
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self.acertos = 0
+        self.refinamentos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def normalizar(texto: str) -> str:
+        """Minúsculas e sem acentos, como as colações/tokenizadores do banco"""
+        decomposto = unicodedata.normalize('NFKD', texto.strip().casefold())
+        return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+    def _palavras(self, texto: str) -> List[str]:
+        return [p for p in re.findall(r"\w+", texto) if len(p) >= self.min_palavra]
+
+    def _atende(self, produto: Dict, texto: str, palavras: List[str]) -> bool:
+        """Mesmo critério da busca no banco: prefixo do nome ou palavras da descrição"""
+        if self.normalizar(produto['nome_produto']).startswith(texto):
+            return True
+        if not palavras:
+            return False
+        descricao = re.findall(r"\w+", self.normalizar(produto.get('descricao') or ""))
+        return all(any(d.startswith(p) for d in descricao) for p in palavras)
+
+    def obter(self, texto: str) -> Optional[List[Dict]]:
+        """Resultado em cache (direto ou refinado de um prefixo), ou None"""
+        chave = self.normalizar(texto)
+        agora = time.monotonic()
+
+        item = self._itens.get(chave)
+        if item is not None and agora - item[0] <= self.validade:
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[1]
+
+        if not chave.isdigit():
+            palavras = self._palavras(chave)
+            for tamanho in range(len(chave) - 1, 0, -1):
+                prefixo = self._itens.get(chave[:tamanho])
+                if prefixo is None or agora - prefixo[0] > self.validade:
+                    continue
+                # Prefixo sem palavra de busca não consultou a descrição
+                if len(prefixo[1]) >= self.limite or chave[:tamanho].isdigit() or (
+                        palavras and not self._palavras(chave[:tamanho])):
+                    break
+                produtos = [p for p in prefixo[1] if self._atende(p, chave, palavras)]
+                self.refinamentos += 1
+                self.guardar(texto, produtos, instante=prefixo[0])
+                return produtos
+
+        self.falhas += 1
+        return None
+
+    def guardar(self, texto: str, produtos: List[Dict], instante: Optional[float] = None):
+        chave = self.normalizar(texto)
+        self._itens[chave] = (instante if instante is not None else time.monotonic(), produtos)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho_max:
+            self._itens.popitem(last=False)
+
+    def invalidar(self):
+        """Descarta tudo (ex.: depois de cadastrar um produto)"""
+        self._itens.clear()
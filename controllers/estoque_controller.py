@@ -1,12 +1,31 @@
+import io
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+from config.database import DatabaseConfig
+from config.inicializacao import TemposInicializacao
 from models.estoque_model import EstoqueModel
+from models.diario_movimentacoes import DiarioMovimentacoes
 from views.estoque_view import EstoqueView
+from controllers.tarefas import ExecutorTarefas
+from controllers.busca_produtos import CacheBuscaProdutos
+from controllers.alteracoes import AcompanhamentoAlteracoes
 
 class EstoqueController:
     """Controller para gerenciar lógica de negócio"""
     
+    # Sugestões por busca no autocompletar de produtos
+    LIMITE_SUGESTOES = 10
+    
     def __init__(self, view: EstoqueView):
         self.view = view
         self.usuario_atual = "admin"
+        self.cache_buscas = CacheBuscaProdutos(self.LIMITE_SUGESTOES,
+                                               min_palavra=EstoqueModel.MIN_PALAVRA_BUSCA)
+        self.alteracoes = AcompanhamentoAlteracoes(**DatabaseConfig.ALTERACOES_CONFIG)
+        self._timer_alteracoes = None
+        
+        # Chamadas ao banco rodam fora da thread do Tk
+        self.tarefas = ExecutorTarefas(view.root, ao_mudar_ocupado=self.view.definir_ocupado)
+        self.view.root.protocol("WM_DELETE_WINDOW", self.encerrar)
         
         # Conecta callbacks da view
         self.view.on_adicionar_produto = self.adicionar_produto
@@ -15,10 +34,169 @@ class EstoqueController:
         self.view.on_gerar_relatorio = self.gerar_relatorio
         self.view.on_listar_produtos = self.listar_produtos
         self.view.on_atualizar_alertas = self.atualizar_alertas
+        self.view.on_pagina_produtos = self.carregar_pagina_produtos
+        self.view.on_estoque_em = self.gerar_estoque_em
+        self.view.on_diagnostico = self.atualizar_diagnostico
+        self.view.on_instrumentar = self.instrumentar
+        self.view.on_buscar_produtos = self.buscar_produtos
+        
+        # Com DIARIO_MOVIMENTACOES, entradas/saídas vão para o diário local
+        self.diario = None
+        config_diario = DatabaseConfig.DIARIO_CONFIG
+        if config_diario['caminho']:
+            try:
+                self.diario = DiarioMovimentacoes(**config_diario)
+            except (OSError, ValueError) as e:
+                self.view.mostrar_mensagem("Diário de movimentações",
+                    f"Não foi possível abrir o diário local ({e}); as movimentações irão direto ao banco.",
+                    "warning")
+            else:
+                self._acompanhar_diario()
         
-        # Carrega dados iniciais
-        self.listar_produtos()
-        self.atualizar_alertas()
+        # A janela pinta antes: banco e dados iniciais vêm em segundo plano
+        self.view.root.after_idle(TemposInicializacao.marcar, "janela exibida")
+        self.iniciar()
+    
+    def iniciar(self):
+        """Verifica a conexão e carrega produtos e alertas sem bloquear a janela"""
+        apos, limite = self.view.janela_produtos()
+        self.tarefas.submeter(
+            'inicializacao', self._carregar_inicial, apos, limite,
+            ao_concluir=self._exibir_inicial,
+            ao_falhar=self._falha_inicial
+        )
+        self.view.definir_status("🔌 Conectando ao banco de dados...")
+    
+    @staticmethod
+    def _carregar_inicial(apos: Optional[tuple], limite: int) -> dict:
+        """
+        Roda em segundo plano; as três etapas reaproveitam, em sequência, a
+        mesma conexão do pool aberta pelo teste (uma só abertura de conexão)
+        """
+        if not DatabaseConfig.test_connection():
+            raise ConnectionError("Não foi possível conectar ao banco de dados")
+        TemposInicializacao.marcar("banco conectado")
+        
+        # Marca das alterações antes da carga: nada entre as duas se perde
+        _, marca = EstoqueModel.alteracoes_produtos()
+        produtos = EstoqueModel.listar_produtos_pagina(limite, apos=apos)
+        TemposInicializacao.marcar("produtos lidos")
+        criticos = EstoqueModel.produtos_criticos()
+        TemposInicializacao.marcar("alertas lidos")
+        return {'produtos': produtos, 'criticos': criticos, 'marca': marca}
+    
+    def _exibir_inicial(self, dados: dict):
+        self.view.anexar_pagina_produtos(dados['produtos'], 'recarregar')
+        self.view.atualizar_alertas(dados['criticos'])
+        TemposInicializacao.marcar("dados exibidos")
+        if TemposInicializacao.exibir:
+            print(f"\n⏱️  Tempos de inicialização\n{TemposInicializacao.relatorio()}")
+        
+        if self.alteracoes.ativo:
+            self.alteracoes.iniciar(dados['marca'])
+            self._agendar_alteracoes()
+    
+    def _falha_inicial(self, e: Exception):
+        mensagem = (f"{e}\n\nVerifique:\n"
+                    "  1. O servidor do banco está no ar e acessível\n"
+                    "  2. As credenciais nas variáveis DB_* (ou no arquivo .env)\n"
+                    "  3. O banco 'sistema_estoque' foi criado")
+        if self.view.perguntar_nova_tentativa("Sem conexão com o banco", mensagem):
+            self.iniciar()
+        else:
+            self.encerrar()
+    
+    def encerrar(self):
+        """Cancela tarefas pendentes, envia o que der do diário e fecha a janela"""
+        if self._timer_alteracoes is not None:
+            self.view.root.after_cancel(self._timer_alteracoes)
+            self._timer_alteracoes = None
+        self.tarefas.encerrar()
+        if self.diario is not None:
+            self.diario.fechar(timeout=5)
+        self.view.root.destroy()
+    
+    # Intervalo de atualização do indicador do diário (ms)
+    INTERVALO_DIARIO_MS = 500
+    
+    def _acompanhar_diario(self):
+        """Atualiza o indicador de pendentes e reflete na tela o que já foi aplicado"""
+        estatisticas = self.diario.estatisticas()
+        self.view.exibir_pendentes_diario(estatisticas['pendentes'], estatisticas['ultimo_erro'])
+        
+        ids, recusas = self.diario.retirar_eventos()
+        if ids:
+            self.atualizar_produtos(sorted(ids))
+        if recusas:
+            linhas = [f"Seq {r['seq']} — {r['tipo_movimentacao']} de {r['quantidade']} "
+                      f"(produto {r['id_produto']}): {motivo}" for r, motivo in recusas[:10]]
+            if len(recusas) > 10:
+                linhas.append(f"... e mais {len(recusas) - 10}")
+            self.view.mostrar_mensagem("Movimentações recusadas pelo banco",
+                                       "\n".join(linhas), "warning")
+        
+        self.view.root.after(self.INTERVALO_DIARIO_MS, self._acompanhar_diario)
+    
+    def _agendar_alteracoes(self):
+        self._timer_alteracoes = self.view.root.after(self.alteracoes.proximo_ms(),
+                                                      self._consultar_alteracoes)
+    
+    def _consultar_alteracoes(self):
+        """Busca só os produtos alterados desde a marca (outros postos, API, diário)"""
+        self._timer_alteracoes = None
+        self.tarefas.submeter(
+            'alteracoes', EstoqueModel.alteracoes_produtos,
+            self.alteracoes.desde(), self.alteracoes.limite,
+            ao_concluir=self._aplicar_alteracoes,
+            ao_falhar=self._falha_alteracoes,
+            silenciosa=True
+        )
+    
+    def _aplicar_alteracoes(self, resultado: tuple):
+        alterados, recarregar = self.alteracoes.aplicar(*resultado)
+        if recarregar:
+            self.listar_produtos()
+            self.atualizar_alertas()
+        elif alterados:
+            # Produto novo ou renomeado no intervalo da janela: recarrega
+            # a janela, na ordem do banco, aplicando só as diferenças
+            if self.view.atualizar_produtos(alterados):
+                self.listar_produtos()
+            self.view.atualizar_alertas_produtos(alterados)
+        self._agendar_alteracoes()
+    
+    def _falha_alteracoes(self, e: Exception):
+        self.alteracoes.falhou()
+        self.view.definir_status(f"⚠️ Erro ao buscar alterações: {e}")
+        self._agendar_alteracoes()
+    
+    def _retomar_alteracoes(self):
+        """Atividade local: volta a consultar no intervalo base"""
+        self.alteracoes.atividade()
+        if self._timer_alteracoes is not None:
+            self.view.root.after_cancel(self._timer_alteracoes)
+            self._agendar_alteracoes()
+    
+    def _registrar_no_diario(self, tipo: str, id_produto: int, quantidade: int, observacao: str):
+        """Grava no diário local; o envio ao banco acontece em segundo plano"""
+        try:
+            self.diario.registrar(id_produto, tipo, quantidade, observacao, self.usuario_atual)
+        except (OSError, ValueError) as e:
+            self.view.mostrar_mensagem("Erro", f"Erro ao gravar no diário: {e}", "error")
+            return
+        descricao = "Entrada" if tipo == 'ENTRADA' else "Saída"
+        self.view.mostrar_mensagem("Sucesso",
+            f"{descricao} de {quantidade} unidades registrada (envio ao banco em segundo plano)!", "info")
+        self.view.exibir_pendentes_diario(self.diario.pendentes())
+    
+    def _falha(self, contexto: str) -> Callable[[Exception], None]:
+        """Callback de erro padrão para tarefas em segundo plano"""
+        def mostrar(e: Exception):
+            if isinstance(e, ValueError):
+                self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
+            else:
+                self.view.mostrar_mensagem("Erro", f"{contexto}: {e}", "error")
+        return mostrar
     
     def adicionar_produto(self, dados: dict):
         """Adiciona novo produto"""
@@ -29,134 +207,389 @@ class EstoqueController:
             
             qtd_minima = int(dados['qtd_minima'])
             preco = float(dados['preco'].replace(',', '.'))
-            
-            id_novo = EstoqueModel.adicionar_produto(
-                nome=nome,
-                descricao=dados['descricao'].strip(),
-                qtd_minima=qtd_minima,
-                preco=preco
-            )
-            
+            descricao = dados['descricao'].strip()
+        except ValueError as e:
+            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
+            return
+        
+        def concluir(id_novo: int):
+            self.cache_buscas.invalidar()
             self.view.mostrar_mensagem("Sucesso", 
                 f"Produto cadastrado com ID: {id_novo}", "info")
             self.listar_produtos()
-            
-        except ValueError as e:
-            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
-        except Exception as e:
-            self.view.mostrar_mensagem("Erro", f"Erro ao adicionar produto: {e}", "error")
+        
+        self.tarefas.submeter(
+            'adicionar_produto',
+            lambda: EstoqueModel.adicionar_produto(
+                nome=nome,
+                descricao=descricao,
+                qtd_minima=qtd_minima,
+                preco=preco
+            ),
+            ao_concluir=concluir,
+            ao_falhar=self._falha("Erro ao adicionar produto")
+        )
+    
+    def buscar_produtos(self, campo: str, texto: str):
+        """Sugestões do autocompletar: do cache de buscas recentes ou do banco"""
+        produtos = self.cache_buscas.obter(texto)
+        if produtos is not None:
+            self.view.exibir_sugestoes(campo, texto, produtos)
+            return
+        
+        def concluir(encontrados: list):
+            self.cache_buscas.guardar(texto, encontrados)
+            self.view.exibir_sugestoes(campo, texto, encontrados)
+        
+        # Só a busca mais recente de cada campo interessa
+        self.tarefas.submeter(
+            f'busca:{campo}', EstoqueModel.buscar_produtos, texto, self.LIMITE_SUGESTOES,
+            ao_concluir=concluir,
+            ao_falhar=lambda e: self.view.definir_status(f"⚠️ Erro na busca de produtos: {e}"),
+            substituir=True,
+            silenciosa=True
+        )
+    
+    def _resolver_produto(self, texto: str) -> int:
+        """
+        ID do produto digitado no campo "Produto (ID ou nome)"
+        
+        Um nome só é aceito sem escolher a sugestão se a busca já feita pelo
+        autocompletar (em cache) trouxe um único produto, ou um só com
+        exatamente esse nome; do contrário o operador escolhe na lista.
+        """
+        texto = texto.strip()
+        if not texto:
+            raise ValueError("Informe o produto (ID ou nome)")
+        if texto.isdigit():
+            return int(texto)
+        
+        produtos = self.cache_buscas.obter(texto) or []
+        if len(produtos) != 1:
+            nome = CacheBuscaProdutos.normalizar(texto)
+            produtos = [p for p in produtos if CacheBuscaProdutos.normalizar(p['nome_produto']) == nome]
+        if len(produtos) != 1:
+            raise ValueError(f"Produto '{texto}' não identificado: selecione um produto da lista")
+        return produtos[0]['id_produto']
+    
+    def _validar_movimentacao(self, dados: dict) -> Tuple[int, int]:
+        id_produto = self._resolver_produto(dados['id_produto'])
+        try:
+            quantidade = int(dados['quantidade'])
+        except ValueError:
+            raise ValueError("Quantidade deve ser um número inteiro")
+        
+        if quantidade <= 0:
+            raise ValueError("Quantidade deve ser maior que zero")
+        return id_produto, quantidade
     
     def registrar_entrada(self, dados: dict):
         """Registra entrada de insumos"""
         try:
-            id_produto = int(dados['id_produto'])
-            quantidade = int(dados['quantidade'])
-            
-            if quantidade <= 0:
-                raise ValueError("Quantidade deve ser maior que zero")
-            
-            EstoqueModel.registrar_entrada(
+            id_produto, quantidade = self._validar_movimentacao(dados)
+        except ValueError as e:
+            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
+            return
+        
+        self._retomar_alteracoes()
+        if self.diario is not None:
+            self._registrar_no_diario('ENTRADA', id_produto, quantidade, dados['observacao'])
+            return
+        
+        def concluir(_):
+            self.view.mostrar_mensagem("Sucesso", 
+                f"Entrada de {quantidade} unidades registrada!", "info")
+            self.atualizar_produtos([id_produto])
+        
+        self.tarefas.submeter(
+            'entrada',
+            lambda: EstoqueModel.registrar_entrada(
                 id_produto=id_produto,
                 quantidade=quantidade,
                 observacao=dados['observacao'],
                 usuario=self.usuario_atual
-            )
-            
-            self.view.mostrar_mensagem("Sucesso", 
-                f"Entrada de {quantidade} unidades registrada!", "info")
-            self.listar_produtos()
-            self.atualizar_alertas()
-            
-        except ValueError as e:
-            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
-        except Exception as e:
-            self.view.mostrar_mensagem("Erro", f"Erro ao registrar entrada: {e}", "error")
+            ),
+            ao_concluir=concluir,
+            ao_falhar=self._falha("Erro ao registrar entrada")
+        )
     
     def registrar_saida(self, dados: dict):
         """Registra saída de insumos"""
         try:
-            id_produto = int(dados['id_produto'])
-            quantidade = int(dados['quantidade'])
-            
-            if quantidade <= 0:
-                raise ValueError("Quantidade deve ser maior que zero")
-            
-            EstoqueModel.registrar_saida(
+            id_produto, quantidade = self._validar_movimentacao(dados)
+        except ValueError as e:
+            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
+            return
+        
+        self._retomar_alteracoes()
+        if self.diario is not None:
+            self._registrar_no_diario('SAIDA', id_produto, quantidade, dados['observacao'])
+            return
+        
+        def concluir(_):
+            self.view.mostrar_mensagem("Sucesso", 
+                f"Saída de {quantidade} unidades registrada!", "info")
+            self.atualizar_produtos([id_produto])
+        
+        self.tarefas.submeter(
+            'saida',
+            lambda: EstoqueModel.registrar_saida(
                 id_produto=id_produto,
                 quantidade=quantidade,
                 observacao=dados['observacao'],
                 usuario=self.usuario_atual
-            )
-            
-            self.view.mostrar_mensagem("Sucesso", 
-                f"Saída de {quantidade} unidades registrada!", "info")
-            self.listar_produtos()
-            self.atualizar_alertas()
-            
-        except ValueError as e:
-            self.view.mostrar_mensagem("Erro de Validação", str(e), "error")
-        except Exception as e:
-            self.view.mostrar_mensagem("Erro", f"Erro ao registrar saída: {e}", "error")
+            ),
+            ao_concluir=concluir,
+            ao_falhar=self._falha("Erro ao registrar saída")
+        )
     
     def listar_produtos(self):
-        """Atualiza lista de produtos na interface"""
-        try:
-            produtos = EstoqueModel.listar_produtos()
-            self.view.atualizar_lista_produtos(produtos)
-        except Exception as e:
+        """Recarrega a janela de produtos visível na interface"""
+        self.carregar_pagina_produtos('recarregar', None)
+    
+    def carregar_pagina_produtos(self, direcao: str, chave: tuple):
+        """Carrega a página de produtos vizinha à chave (nome, id) informada"""
+        limite = self.view.TAMANHO_PAGINA_PRODUTOS
+        if direcao == 'proxima':
+            consulta = lambda: EstoqueModel.listar_produtos_pagina(limite, apos=chave)
+        elif direcao == 'anterior':
+            consulta = lambda: EstoqueModel.listar_produtos_pagina(limite, antes=chave)
+        else:
+            apos, limite = self.view.janela_produtos()
+            consulta = lambda: EstoqueModel.listar_produtos_pagina(limite, apos=apos)
+        
+        def falhar(e: Exception):
+            self.view.cancelar_pagina_produtos()
             self.view.mostrar_mensagem("Erro", f"Erro ao listar produtos: {e}", "error")
+        
+        # Recarregar a janela torna obsoleta qualquer página em andamento
+        self.tarefas.submeter(
+            'pagina_produtos', consulta,
+            ao_concluir=lambda produtos: self.view.anexar_pagina_produtos(produtos, direcao),
+            ao_falhar=falhar,
+            substituir=(direcao == 'recarregar')
+        )
+    
+    def atualizar_produtos(self, ids: list):
+        """
+        Atualiza na lista e nos alertas só os produtos informados
+        
+        Os produtos vêm do cache do modelo, então o alerta de cada um é
+        reavaliado sem consultar de novo a lista completa de críticos.
+        """
+        def concluir(produtos: list):
+            if self.view.atualizar_produtos(produtos):
+                self.listar_produtos()
+            self.view.atualizar_alertas_produtos(produtos)
+        
+        self.tarefas.submeter(
+            f"produtos:{','.join(map(str, ids))}",
+            lambda: list(EstoqueModel.obter_produtos(ids).values()),
+            ao_concluir=concluir,
+            ao_falhar=self._falha("Erro ao atualizar produtos"),
+            substituir=True
+        )
     
     def atualizar_alertas(self):
         """Atualiza alertas de estoque crítico"""
-        try:
-            produtos_criticos = EstoqueModel.produtos_criticos()
-            self.view.atualizar_alertas(produtos_criticos)
-        except Exception as e:
-            self.view.mostrar_mensagem("Erro", f"Erro ao carregar alertas: {e}", "error")
+        self.tarefas.submeter(
+            'alertas', EstoqueModel.produtos_criticos,
+            ao_concluir=self.view.atualizar_alertas,
+            ao_falhar=self._falha("Erro ao carregar alertas"),
+            substituir=True
+        )
+    
+    def atualizar_diagnostico(self):
+        """Envia à aba de diagnóstico as medições atuais (só leitura de memória)"""
+        self.view.exibir_diagnostico({
+            'consultas': DatabaseConfig.estatisticas_consultas(),
+            'pool': DatabaseConfig.estatisticas_pool(),
+            'cache': EstoqueModel.estatisticas_cache(),
+            'inicializacao': TemposInicializacao.etapas(),
+            'diario': self.diario.estatisticas() if self.diario is not None else None,
+            'alteracoes': self.alteracoes.estatisticas() if self.alteracoes.ativo else None,
+        })
+    
+    def instrumentar(self, ativa: bool):
+        """Liga/desliga a medição dos comandos SQL"""
+        DatabaseConfig.instrumentar(ativa)
+        self.atualizar_diagnostico()
     
     def gerar_relatorio(self, filtros: dict):
-        """Gera relatório de movimentações"""
+        """Gera relatório de movimentações (um novo pedido cancela o anterior)"""
+        data_inicio = filtros['data_inicio'] if filtros['data_inicio'] != "AAAA-MM-DD" else None
+        data_fim = filtros['data_fim'] if filtros['data_fim'] != "AAAA-MM-DD" else None
+        detalhar = filtros.get('detalhar', True)
+        
+        self.tarefas.submeter(
+            'relatorio', self._montar_relatorio, data_inicio, data_fim, detalhar,
+            ao_concluir=self.view.exibir_relatorio,
+            ao_falhar=self._falha("Erro ao gerar relatório"),
+            substituir=True,
+            cancelavel=True
+        )
+    
+    def _montar_relatorio(self, data_inicio: str, data_fim: str, detalhar: bool, cancelado) -> str:
+        """
+        Monta o texto do relatório (roda em segundo plano)
+        
+        Totais e resumo por produto vêm do resumo diário; as movimentações
+        só são percorridas quando o relatório é detalhado.
+        """
+        totais = EstoqueModel.totais_periodo(data_inicio, data_fim)
+        resumo = EstoqueModel.resumo_por_produto(data_inicio, data_fim)
+        saida = io.StringIO()
+        
+        if not detalhar:
+            self.escrever_relatorio(saida, None, data_inicio, data_fim, resumo, totais)
+            return saida.getvalue()
+        
+        movimentacoes = EstoqueModel.iterar_movimentacoes(data_inicio, data_fim)
         try:
-            data_inicio = filtros['data_inicio'] if filtros['data_inicio'] != "AAAA-MM-DD" else None
-            data_fim = filtros['data_fim'] if filtros['data_fim'] != "AAAA-MM-DD" else None
-            
-            movimentacoes = EstoqueModel.relatorio_movimentacoes(data_inicio, data_fim)
-            
-            # Formata relatório
-            relatorio = "=" * 100 + "\n"
-            relatorio += " " * 30 + "RELATÓRIO DE MOVIMENTAÇÕES DE ESTOQUE\n"
-            relatorio += "=" * 100 + "\n\n"
-            
-            if data_inicio or data_fim:
-                relatorio += f"Período: {data_inicio or 'Início'} até {data_fim or 'Hoje'}\n\n"
-            
-            total_entradas = 0
-            total_saidas = 0
-            
-            relatorio += f"{'ID':<6} {'Data/Hora':<20} {'Tipo':<10} {'Produto':<35} {'Qtd':<8} {'Usuário':<12}\n"
-            relatorio += "-" * 100 + "\n"
+            self.escrever_relatorio(saida, self._ate_cancelar(movimentacoes, cancelado),
+                                    data_inicio, data_fim, resumo, totais)
+        finally:
+            movimentacoes.close()
+        return saida.getvalue()
+    
+    def gerar_estoque_em(self, filtros: dict):
+        """Gera relatório do estoque ao fim de um dia (um produto ou todos)"""
+        data = filtros['data'].strip()
+        try:
+            id_texto = filtros['id_produto'].strip()
+            ids = [int(id_texto)] if id_texto else None
+        except ValueError:
+            self.view.mostrar_mensagem("Erro de Validação", "ID do produto deve ser um número", "error")
+            return
+        
+        def montar() -> str:
+            produtos = EstoqueModel.estoque_em(data, ids)
+            saida = io.StringIO()
+            self.escrever_estoque_em(saida, data, produtos)
+            return saida.getvalue()
+        
+        # Divide a área de resultado com o relatório de movimentações
+        self.tarefas.submeter(
+            'relatorio', montar,
+            ao_concluir=self.view.exibir_relatorio,
+            ao_falhar=self._falha("Erro ao calcular estoque na data"),
+            substituir=True
+        )
+    
+    @staticmethod
+    def escrever_estoque_em(saida: TextIO, data: str, produtos: Iterable[dict]) -> int:
+        """
+        Formata o estoque na data em ``saida``
+        
+        Returns:
+            int: Quantidade total em estoque na data
+        """
+        escrever = saida.write
+        
+        escrever("=" * 100 + "\n")
+        escrever(" " * 30 + "ESTOQUE EM " + data + " (FIM DO DIA)\n")
+        escrever("=" * 100 + "\n\n")
+        escrever(f"{'ID':<6} {'Produto':<50} {'Estoque':>10}\n")
+        escrever("-" * 100 + "\n")
+        
+        total = 0
+        quantidade = 0
+        for produto in produtos:
+            escrever(
+                f"{produto['id_produto']:<6} "
+                f"{produto['nome_produto'][:50]:<50} "
+                f"{produto['qtd_estoque']:>10}\n"
+            )
+            total += produto['qtd_estoque']
+            quantidade += 1
+        
+        escrever("\n" + "=" * 100 + "\n")
+        escrever(f"PRODUTOS: {quantidade}\n")
+        escrever(f"UNIDADES EM ESTOQUE: {total}\n")
+        escrever("=" * 100)
+        
+        return total
+    
+    @staticmethod
+    def _ate_cancelar(linhas: Iterable, cancelado) -> Iterator:
+        """Repassa as linhas até a tarefa ser cancelada"""
+        for linha in linhas:
+            if cancelado.is_set():
+                return
+            yield linha
+    
+    @staticmethod
+    def escrever_relatorio(saida: TextIO, movimentacoes: Optional[Iterable[dict]],
+                           data_inicio: str = None, data_fim: str = None,
+                           resumo: Optional[List[dict]] = None,
+                           totais: Optional[dict] = None) -> Tuple[int, int]:
+        """
+        Formata o relatório de movimentações em ``saida`` à medida que as linhas chegam
+        
+        Com ``totais`` (de ``EstoqueModel.totais_periodo``) os totais não
+        dependem das movimentações; sem eles, são acumulados durante a
+        iteração. ``resumo`` acrescenta a seção por produto e
+        ``movimentacoes=None`` omite a listagem detalhada.
+        
+        Returns:
+            Tuple[int, int]: (total de entradas, total de saídas)
+        """
+        escrever = saida.write
+        
+        escrever("=" * 100 + "\n")
+        escrever(" " * 30 + "RELATÓRIO DE MOVIMENTAÇÕES DE ESTOQUE\n")
+        escrever("=" * 100 + "\n\n")
+        
+        if data_inicio or data_fim:
+            escrever(f"Período: {data_inicio or 'Início'} até {data_fim or 'Hoje'}\n\n")
+        
+        if resumo is not None:
+            escrever("RESUMO POR PRODUTO\n")
+            escrever(f"{'ID':<6} {'Produto':<35} {'Entradas':>10} {'Saídas':>10} {'Saldo':>10} {'Movim.':>8}\n")
+            escrever("-" * 100 + "\n")
+            for item in resumo:
+                escrever(
+                    f"{item['id_produto']:<6} "
+                    f"{item['nome_produto'][:35]:<35} "
+                    f"{item['entradas']:>10} "
+                    f"{item['saidas']:>10} "
+                    f"{item['entradas'] - item['saidas']:>10} "
+                    f"{item['movimentacoes']:>8}\n"
+                )
+            escrever("\n")
+        
+        total_entradas = 0
+        total_saidas = 0
+        
+        if movimentacoes is not None:
+            escrever(f"{'ID':<6} {'Data/Hora':<20} {'Tipo':<10} {'Produto':<35} {'Qtd':<8} {'Usuário':<12}\n")
+            escrever("-" * 100 + "\n")
             
             for mov in movimentacoes:
                 data_formatada = mov['data_movimentacao'].strftime("%d/%m/%Y %H:%M:%S")
-                relatorio += f"{mov['id_movimentacao']:<6} "
-                relatorio += f"{data_formatada:<20} "
-                relatorio += f"{mov['tipo_movimentacao']:<10} "
-                relatorio += f"{mov['nome_produto'][:35]:<35} "
-                relatorio += f"{mov['quantidade']:<8} "
-                relatorio += f"{mov['usuario']:<12}\n"
+                escrever(
+                    f"{mov['id_movimentacao']:<6} "
+                    f"{data_formatada:<20} "
+                    f"{mov['tipo_movimentacao']:<10} "
+                    f"{mov['nome_produto'][:35]:<35} "
+                    f"{mov['quantidade']:<8} "
+                    f"{mov['usuario']:<12}\n"
+                )
                 
-                if mov['tipo_movimentacao'] == 'ENTRADA':
-                    total_entradas += mov['quantidade']
-                else:
-                    total_saidas += mov['quantidade']
-            
-            relatorio += "\n" + "=" * 100 + "\n"
-            relatorio += f"TOTAL DE ENTRADAS: {total_entradas}\n"
-            relatorio += f"TOTAL DE SAÍDAS: {total_saidas}\n"
-            relatorio += f"SALDO LÍQUIDO: {total_entradas - total_saidas}\n"
-            relatorio += "=" * 100
-            
-            self.view.exibir_relatorio(relatorio)
-            
-        except Exception as e:
-            self.view.mostrar_mensagem("Erro", f"Erro ao gerar relatório: {e}", "error")
\ No newline at end of file
+                if totais is None:
+                    if mov['tipo_movimentacao'] == 'ENTRADA':
+                        total_entradas += mov['quantidade']
+                    else:
+                        total_saidas += mov['quantidade']
+        
+        if totais is not None:
+            total_entradas = totais['total_entradas']
+            total_saidas = totais['total_saidas']
+        
+        escrever("\n" + "=" * 100 + "\n")
+        escrever(f"TOTAL DE ENTRADAS: {total_entradas}\n")
+        escrever(f"TOTAL DE SAÍDAS: {total_saidas}\n")
+        escrever(f"SALDO LÍQUIDO: {total_entradas - total_saidas}\n")
+        escrever("=" * 100)
+        
+        return total_entradas, total_saidas
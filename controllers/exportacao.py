@@ -0,0 +1,150 @@
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from models.linhas import Linha
+
+
+class ExportadorDados:
+    """
+    Exportação em fluxo de linhas do modelo para CSV ou JSON Lines
+
+    As linhas são escritas à medida que chegam do cursor do banco, então a
+    memória usada não depende do volume exportado. O último id escrito
+    fica em ``ultimo_id`` para servir de marca d'água na próxima exportação
+    incremental.
+
+    Um id só aparece quando a transação que o reservou confirma, então uma
+    transação longa pode confirmar abaixo da marca já gravada. Com
+    ``sobreposicao`` > 0, os ids que faltaram entre os exportados (até
+    ``sobreposicao`` ids abaixo da marca) ficam em ``lacunas`` para serem
+    relidos na próxima exportação. Uma linha confirmada depois que a marca
+    avançou mais que isso (ou uma lacuna de transação desfeita) não é mais
+    procurada.
+    """
+
+    FORMATOS = ('csv', 'jsonl')
+
+    def __init__(self, formato: str = 'csv', campo_id: str = 'id_movimentacao',
+                 sobreposicao: int = 0):
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato inválido: {formato!r} (use {' ou '.join(self.FORMATOS)})")
+        self.formato = formato
+        self.campo_id = campo_id
+        self.sobreposicao = sobreposicao
+
+        self.linhas = 0
+        self.ultimo_id: Optional[int] = None
+        self.lacunas: List[int] = []
+        self.duracao = 0.0
+
+    @staticmethod
+    def _valor_json(valor):
+        if isinstance(valor, (datetime, date)):
+            return valor.isoformat()
+        if isinstance(valor, Decimal):
+            return str(valor)
+        if isinstance(valor, Linha):
+            return dict(valor)
+        raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+    @staticmethod
+    def abrir_saida(caminho: str, compactar: bool = False) -> TextIO:
+        """Abre o destino da exportação ('-' para a saída padrão), com gzip opcional"""
+        if caminho == '-':
+            if compactar:
+                return gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8', newline='')
+            return sys.stdout
+        if compactar:
+            return gzip.open(caminho, 'wt', encoding='utf-8', newline='')
+        return open(caminho, 'w', encoding='utf-8', newline='')
+
+    def exportar(self, linhas: Iterable[Dict], saida: TextIO, apos_id: Optional[int] = None,
+                 lacunas: Iterable[int] = ()) -> 'ExportadorDados':
+        """
+        Escreve as linhas em ``saida`` no formato configurado
+
+        Args:
+            linhas: Linhas em ordem crescente de id (as relidas de
+                    ``lacunas`` antes das novas)
+            apos_id: Marca d'água com que as linhas foram lidas
+            lacunas: Ids abaixo da marca relidos nesta exportação
+
+        Returns:
+            ExportadorDados: O próprio exportador, com contadores preenchidos
+        """
+        inicio = time.perf_counter()
+        escrever = saida.write
+        escritor = None
+        campo_id = self.campo_id
+        sobreposicao = self.sobreposicao
+        pendentes = set(lacunas)
+        novas: List[int] = []
+        anterior = apos_id
+        if apos_id is not None:
+            self.ultimo_id = apos_id
+
+        for linha in linhas:
+            if self.formato == 'jsonl':
+                escrever(json.dumps(linha, ensure_ascii=False, default=self._valor_json))
+                escrever("\n")
+            else:
+                if escritor is None:
+                    escritor = csv.DictWriter(saida, fieldnames=list(linha))
+                    escritor.writeheader()
+                escritor.writerow(linha)
+
+            self.linhas += 1
+            id_linha = linha.get(campo_id)
+            if id_linha is None:
+                continue
+            if apos_id is not None and id_linha <= apos_id:
+                # Lacuna preenchida por um commit atrasado
+                pendentes.discard(id_linha)
+                continue
+            if sobreposicao and anterior is not None and id_linha > anterior + 1:
+                novas.extend(range(max(anterior + 1, id_linha - sobreposicao), id_linha))
+                if len(novas) > 2 * sobreposicao:
+                    novas = [i for i in novas if i > id_linha - sobreposicao]
+            anterior = self.ultimo_id = id_linha
+
+        if sobreposicao and self.ultimo_id is not None:
+            limite = self.ultimo_id - sobreposicao
+            self.lacunas = sorted(i for i in pendentes.union(novas) if i > limite)
+        self.duracao = time.perf_counter() - inicio
+        return self
+
+    @staticmethod
+    def _ler_estado(caminho: str) -> Dict:
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def ler_marca(caminho: str) -> Optional[int]:
+        """Lê o último id exportado de um arquivo de estado (None se não existir)"""
+        return ExportadorDados._ler_estado(caminho).get('ultimo_id')
+
+    @staticmethod
+    def ler_lacunas(caminho: str) -> List[int]:
+        """Lê os ids abaixo da marca ainda não vistos (vazio se não houver estado)"""
+        return ExportadorDados._ler_estado(caminho).get('lacunas', [])
+
+    @staticmethod
+    def gravar_marca(caminho: str, ultimo_id: int, lacunas: Iterable[int] = ()):
+        """Grava a marca d'água e as lacunas de forma atômica (arquivo temporário + rename)"""
+        temporario = caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'ultimo_id': ultimo_id, 'lacunas': list(lacunas),
+                       'exportado_em': datetime.now().isoformat()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
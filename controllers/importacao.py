@@ -0,0 +1,150 @@
+import csv
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from models.estoque_model import EstoqueModel
+
+
+class ImportadorCSV:
+    """
+    Importação em massa de produtos (com saldo inicial) a partir de CSV
+
+    O arquivo é lido em fluxo: as linhas válidas são acumuladas até
+    ``linhas_por_transacao`` e gravadas pelo modelo em uma transação, com
+    INSERTs multi-linhas de ``tamanho_lote``. Linhas inválidas são
+    rejeitadas individualmente, com o número da linha e o motivo.
+
+    Colunas esperadas (cabeçalho): nome_produto, descricao, qtd_minima,
+    preco_unitario e qtd_estoque (saldo inicial, opcional).
+    """
+
+    COLUNAS_OBRIGATORIAS = ('nome_produto',)
+    TAMANHO_MAX_NOME = 100
+
+    def __init__(self, usuario: str = "importacao", tamanho_lote: int = 1000,
+                 linhas_por_transacao: int = 10000, ao_progredir=None):
+        self.usuario = usuario
+        self.tamanho_lote = tamanho_lote
+        self.linhas_por_transacao = linhas_por_transacao
+        self.ao_progredir = ao_progredir
+
+        self.lidas = 0
+        self.importadas = 0
+        self.rejeitadas: List[Tuple[int, str, Dict]] = []
+        self.inicio: Optional[float] = None
+        self.fim: Optional[float] = None
+
+    @property
+    def duracao(self) -> float:
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.importadas / self.duracao if self.duracao else 0.0
+
+    @staticmethod
+    def _converter_linha(linha: Dict) -> Dict:
+        """
+        Valida e converte uma linha do CSV
+
+        Raises:
+            ValueError: Com o motivo da rejeição
+        """
+        nome = (linha.get('nome_produto') or '').strip()
+        if not nome:
+            raise ValueError("Nome do produto é obrigatório")
+        if len(nome) > ImportadorCSV.TAMANHO_MAX_NOME:
+            raise ValueError(f"Nome excede {ImportadorCSV.TAMANHO_MAX_NOME} caracteres")
+
+        def inteiro(coluna: str, padrao: int) -> int:
+            valor = (linha.get(coluna) or '').strip()
+            if not valor:
+                return padrao
+            try:
+                numero = int(valor)
+            except ValueError:
+                raise ValueError(f"{coluna} inválido: {valor!r}")
+            if numero < 0:
+                raise ValueError(f"{coluna} não pode ser negativo")
+            return numero
+
+        preco_texto = (linha.get('preco_unitario') or '').strip()
+        try:
+            preco = float(preco_texto.replace(',', '.')) if preco_texto else None
+        except ValueError:
+            raise ValueError(f"preco_unitario inválido: {preco_texto!r}")
+
+        return {
+            'nome_produto': nome,
+            'descricao': (linha.get('descricao') or '').strip(),
+            'qtd_minima': inteiro('qtd_minima', 10),
+            'preco_unitario': preco,
+            'qtd_estoque': inteiro('qtd_estoque', 0),
+        }
+
+    def _ler(self, arquivo: TextIO, delimitador: Optional[str]) -> Iterator[Tuple[int, Dict]]:
+        if delimitador is None:
+            amostra = arquivo.readline()
+            arquivo.seek(0)
+            try:
+                delimitador = csv.Sniffer().sniff(amostra, delimiters=',;\t').delimiter
+            except csv.Error:
+                delimitador = ','
+
+        leitor = csv.DictReader(arquivo, delimiter=delimitador)
+        faltando = [c for c in self.COLUNAS_OBRIGATORIAS if c not in (leitor.fieldnames or [])]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no cabeçalho: {', '.join(faltando)}")
+
+        for linha in leitor:
+            # Número da linha no arquivo (cabeçalho é a linha 1)
+            yield leitor.line_num, linha
+
+    def _gravar(self, pendentes: List[Tuple[int, Dict]]):
+        produtos = [produto for _, produto in pendentes]
+        try:
+            self.importadas += EstoqueModel.importar_produtos(
+                produtos, self.usuario, self.tamanho_lote)
+        except Exception as e:
+            # Transação inteira desfeita: todas as linhas dela são rejeitadas
+            for numero, produto in pendentes:
+                self.rejeitadas.append((numero, f"Erro ao gravar transação: {e}", produto))
+
+        if self.ao_progredir:
+            self.ao_progredir(self)
+
+    def importar(self, arquivo: TextIO, delimitador: Optional[str] = None) -> 'ImportadorCSV':
+        """
+        Importa o CSV aberto em ``arquivo``
+
+        Returns:
+            ImportadorCSV: O próprio importador, com os contadores preenchidos
+        """
+        self.inicio = time.perf_counter()
+        pendentes = []
+
+        for numero, linha in self._ler(arquivo, delimitador):
+            self.lidas += 1
+            try:
+                pendentes.append((numero, self._converter_linha(linha)))
+            except ValueError as e:
+                self.rejeitadas.append((numero, str(e), linha))
+                continue
+
+            if len(pendentes) >= self.linhas_por_transacao:
+                self._gravar(pendentes)
+                pendentes = []
+
+        if pendentes:
+            self._gravar(pendentes)
+
+        self.fim = time.perf_counter()
+        return self
+
+    def escrever_rejeitadas(self, saida: TextIO):
+        """Grava as linhas rejeitadas em CSV (linha, motivo, conteúdo original)"""
+        escritor = csv.writer(saida)
+        escritor.writerow(['linha', 'motivo', 'conteudo'])
+        for numero, motivo, linha in self.rejeitadas:
+            escritor.writerow([numero, motivo, repr(dict(linha))])
@@ -0,0 +1,148 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class Tarefa:
+    """Chamada ao modelo em execução em segundo plano"""
+
+    def __init__(self, chave: str, ao_concluir: Callable = None, ao_falhar: Callable = None,
+                 silenciosa: bool = False):
+        self.chave = chave
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.silenciosa = silenciosa
+        self.cancelado = threading.Event()
+
+    def cancelar(self):
+        """Marca a tarefa como obsoleta; o resultado dela será descartado"""
+        self.cancelado.set()
+
+
+class ExecutorTarefas:
+    """
+    Executa chamadas ao banco fora da thread do Tk
+
+    As funções rodam em um pool de threads e o resultado volta para a
+    thread principal por uma fila lida com ``root.after``, onde os
+    callbacks ``ao_concluir``/``ao_falhar`` podem mexer na interface.
+
+    Cada tarefa tem uma chave. Enquanto houver uma tarefa com a mesma chave
+    em andamento, um novo pedido é ignorado (clique duplo) ou, com
+    ``substituir=True``, cancela o anterior e passa a valer no lugar dele.
+    """
+
+    def __init__(self, root, max_workers: int = 2, intervalo_ms: int = 30,
+                 ao_mudar_ocupado: Callable[[bool], None] = None):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.ao_mudar_ocupado = ao_mudar_ocupado
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="estoque-db")
+        self._concluidas = queue.Queue()
+        self._em_andamento: Dict[str, Tarefa] = {}
+        self._pendentes = 0
+        self._visiveis = 0  # pendentes que acionam o indicador de ocupado
+        self._agendado = False
+        self._encerrado = False
+
+    @property
+    def ocupado(self) -> bool:
+        return self._visiveis > 0
+
+    def em_andamento(self, chave: str) -> bool:
+        return chave in self._em_andamento
+
+    def submeter(self, chave: str, funcao: Callable, *args,
+                 ao_concluir: Callable = None, ao_falhar: Callable = None,
+                 substituir: bool = False, cancelavel: bool = False,
+                 silenciosa: bool = False) -> Optional[Tarefa]:
+        """
+        Agenda ``funcao(*args)`` em segundo plano (chamar da thread do Tk)
+
+        Args:
+            chave: Identifica pedidos equivalentes (ex.: 'relatorio')
+            ao_concluir: Recebe o retorno da função, na thread do Tk
+            ao_falhar: Recebe a exceção levantada, na thread do Tk
+            substituir: Cancela a tarefa em andamento com a mesma chave
+            cancelavel: Passa ``cancelado`` (threading.Event) para a função,
+                        que pode consultá-lo para abandonar o trabalho cedo
+            silenciosa: Não aciona o indicador de ocupado (ex.: autocompletar)
+
+        Returns:
+            Optional[Tarefa]: A tarefa criada, ou None se o pedido foi ignorado
+        """
+        if self._encerrado:
+            return None
+
+        anterior = self._em_andamento.get(chave)
+        if anterior is not None:
+            if not substituir:
+                return None
+            anterior.cancelar()
+
+        tarefa = Tarefa(chave, ao_concluir, ao_falhar, silenciosa)
+        self._em_andamento[chave] = tarefa
+        kwargs = {'cancelado': tarefa.cancelado} if cancelavel else {}
+
+        self._pendentes += 1
+        if not silenciosa:
+            self._visiveis += 1
+            if self._visiveis == 1 and self.ao_mudar_ocupado:
+                self.ao_mudar_ocupado(True)
+
+        self._executor.submit(self._executar, tarefa, funcao, args, kwargs)
+        self._agendar_verificacao()
+        return tarefa
+
+    def _executar(self, tarefa: Tarefa, funcao: Callable, args: tuple, kwargs: dict):
+        """Roda na thread de trabalho: nunca toca na interface"""
+        try:
+            resultado = funcao(*args, **kwargs)
+            self._concluidas.put((tarefa, True, resultado))
+        except Exception as e:
+            self._concluidas.put((tarefa, False, e))
+
+    def _agendar_verificacao(self):
+        if not self._agendado and not self._encerrado:
+            self._agendado = True
+            self.root.after(self.intervalo_ms, self._verificar_concluidas)
+
+    def _verificar_concluidas(self):
+        """Entrega os resultados prontos na thread do Tk"""
+        self._agendado = False
+        liberou = False
+
+        while True:
+            try:
+                tarefa, sucesso, resultado = self._concluidas.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pendentes -= 1
+            if not tarefa.silenciosa:
+                self._visiveis -= 1
+                liberou = True
+            if self._em_andamento.get(tarefa.chave) is tarefa:
+                del self._em_andamento[tarefa.chave]
+
+            if tarefa.cancelado.is_set() or self._encerrado:
+                continue
+
+            callback = tarefa.ao_concluir if sucesso else tarefa.ao_falhar
+            if callback:
+                callback(resultado)
+
+        if liberou and self._visiveis == 0 and self.ao_mudar_ocupado and not self._encerrado:
+            self.ao_mudar_ocupado(False)
+        if self._pendentes:
+            self._agendar_verificacao()
+
+    def encerrar(self):
+        """Cancela o que estiver em andamento e libera as threads"""
+        self._encerrado = True
+        for tarefa in self._em_andamento.values():
+            tarefa.cancelar()
+        self._executor.shutdown(wait=False, cancel_futures=True)
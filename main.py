@@ -1,35 +1,36 @@
-import tkinter as tk
-from views.estoque_view import EstoqueView
-from controllers.estoque_controller import EstoqueController
-from config.database import DatabaseConfig
+import time
+
+# Marco zero dos tempos de inicialização, antes de qualquer outro import
+_INICIO = time.perf_counter()
+
+import sys
+from config.inicializacao import TemposInicializacao
 
 def main():
     """Ponto de entrada da aplicação"""
-    
+    TemposInicializacao.iniciar(_INICIO)
+    if '--tempos' in sys.argv[1:]:
+        TemposInicializacao.exibir = True
+
     print("=" * 60)
     print(" SISTEMA DE CONTROLE DE ESTOQUE")
     print("=" * 60)
-    
-    # Testa conexão com BD
-    print("\n🔍 Testando conexão com banco de dados...")
-    if not DatabaseConfig.test_connection():
-        print("\nERRO: Não foi possível conectar ao banco de dados!")
-        print("Verifique:")
-        print("  1. MySQL está rodando")
-        print("  2. Credenciais em config/database.py")
-        print("  3. Banco 'sistema_estoque' foi criado")
-        input("\nPressione ENTER para sair...")
-        return
-    
-    print("\nSistema iniciado com sucesso!")
-    print("=" * 60)
-    
-    # Inicializa aplicação
+
+    # A janela aparece primeiro; a conexão com o banco e os dados iniciais
+    # são carregados em segundo plano pelo controller
+    import tkinter as tk
     root = tk.Tk()
+    TemposInicializacao.marcar("janela criada")
+
+    from views.estoque_view import EstoqueView
+    from controllers.estoque_controller import EstoqueController
+    TemposInicializacao.marcar("módulos carregados")
+
     view = EstoqueView(root)
+    TemposInicializacao.marcar("interface montada")
     controller = EstoqueController(view)
-    
+
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class CacheProdutos:
+    """
+    Cache em memória de produtos, indexado por id_produto
+
+    Limitado a ``tamanho_max`` itens (descarta os menos usados), guardados
+    como cópias no formato recebido (dict ou Linha compacta). As gravações
+    feitas pelo próprio modelo atualizam os itens no lugar; as feitas por
+    outros clientes são detectadas na revalidação, que busca apenas os
+    produtos com ``atualizado_em`` posterior à última marca vista.
+    """
+
+    def __init__(self, tamanho_max: int = 10000, intervalo_validacao: float = 2.0,
+                 janela: float = 5.0):
+        self.tamanho_max = tamanho_max
+        self.intervalo_validacao = intervalo_validacao
+        # Sobreposição (s) na busca de alterados, para cobrir transações
+        # que gravaram antes da marca mas só confirmaram depois dela
+        self.janela = janela
+
+        self._itens: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._marca: Optional[datetime] = None
+        self._validado_em = 0.0
+
+        # Estatísticas
+        self._acertos = 0
+        self._falhas = 0
+        self._despejos = 0
+        self._revalidacoes = 0
+        self._invalidados = 0
+
+    @property
+    def marca(self) -> Optional[datetime]:
+        return self._marca
+
+    def obter(self, ids: Iterable[int]) -> Tuple[Dict[int, Dict], List[int]]:
+        """
+        Busca produtos no cache
+
+        Returns:
+            Tuple[Dict[int, Dict], List[int]]: (encontrados por id, ids ausentes)
+        """
+        encontrados = {}
+        faltantes = []
+        with self._lock:
+            for id_produto in ids:
+                produto = self._itens.get(id_produto)
+                if produto is None:
+                    faltantes.append(id_produto)
+                else:
+                    self._itens.move_to_end(id_produto)
+                    encontrados[id_produto] = produto.copy()
+            self._acertos += len(encontrados)
+            self._falhas += len(faltantes)
+        return encontrados, faltantes
+
+    def guardar(self, produtos: Iterable[Dict]):
+        """Insere ou substitui produtos lidos do banco"""
+        with self._lock:
+            for produto in produtos:
+                self._itens[produto['id_produto']] = produto.copy()
+                self._itens.move_to_end(produto['id_produto'])
+            while len(self._itens) > self.tamanho_max:
+                self._itens.popitem(last=False)
+                self._despejos += 1
+
+    def definir_estoque(self, estoques: Dict[int, int]):
+        """Grava no lugar o estoque resultante de uma escrita feita pelo modelo"""
+        with self._lock:
+            for id_produto, qtd_estoque in estoques.items():
+                produto = self._itens.get(id_produto)
+                if produto is not None:
+                    produto['qtd_estoque'] = qtd_estoque
+
+    def invalidar(self, ids: Iterable[int] = None):
+        """Remove produtos do cache (todos, se ``ids`` for None)"""
+        with self._lock:
+            if ids is None:
+                self._invalidados += len(self._itens)
+                self._itens.clear()
+                self._marca = None
+                return
+            for id_produto in ids:
+                if self._itens.pop(id_produto, None) is not None:
+                    self._invalidados += 1
+
+    def precisa_validar(self) -> bool:
+        return time.monotonic() - self._validado_em >= self.intervalo_validacao
+
+    def aplicar_alteracoes(self, alterados: List[Dict], marca: Optional[datetime]):
+        """
+        Registra o resultado de uma revalidação
+
+        Produtos alterados que estão em cache são substituídos pela versão
+        lida; os demais não entram (serão buscados quando pedidos).
+        """
+        with self._lock:
+            for produto in alterados:
+                if produto['id_produto'] in self._itens:
+                    self._itens[produto['id_produto']] = produto.copy()
+                    self._invalidados += 1
+            if marca is not None and (self._marca is None or marca > self._marca):
+                self._marca = marca
+            self._validado_em = time.monotonic()
+            self._revalidacoes += 1
+
+    def estatisticas(self) -> dict:
+        """Retorna contadores de acertos/falhas e ocupação do cache"""
+        with self._lock:
+            consultas = self._acertos + self._falhas
+            return {
+                'itens': len(self._itens),
+                'tamanho_max': self.tamanho_max,
+                'acertos': self._acertos,
+                'falhas': self._falhas,
+                'taxa_acerto': self._acertos / consultas if consultas else 0.0,
+                'despejos': self._despejos,
+                'revalidacoes': self._revalidacoes,
+                'invalidados': self._invalidados,
+            }
@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from config.instrumentacao import HistogramaLatencia
+
+
+class DiarioMovimentacoes:
+    """
+    Diário local (write-ahead) de movimentações com envio em lote ao banco
+
+    ``registrar`` grava a movimentação em um arquivo JSON Lines, faz
+    ``fsync`` e só então confirma; a partir daí ela sobrevive a uma queda
+    do aplicativo ou do banco. Uma thread de envio junta as pendentes e as
+    aplica com ``EstoqueModel.aplicar_diario`` quando há ``tamanho_lote``
+    registros ou quando o mais antigo espera há ``intervalo_ms``.
+
+    Cada diário tem uma ``origem`` (gravada no cabeçalho do arquivo) e
+    numera os registros com ``seq`` crescente. O banco guarda a maior
+    ``seq`` aplicada de cada origem na mesma transação das movimentações,
+    então reenviar um lote (queda entre o commit e o checkpoint local) não
+    duplica nada. Formato das linhas do arquivo::
+
+        {"origem": "<hex>", "seq": 0}              cabeçalho
+        {"seq": 1, "id_produto": 7, ...}           movimentação
+        {"aplicado_ate": 1}                        checkpoint
+
+    Uma última linha incompleta (queda no meio da escrita) é descartada ao
+    abrir; ela nunca foi confirmada ao operador.
+    """
+
+    # Acima deste tamanho o arquivo é compactado quando não há pendentes
+    COMPACTAR_BYTES = 4 * 1024 * 1024
+    # Espera máxima entre tentativas com o banco indisponível
+    MAX_ESPERA_ERRO_S = 30.0
+    # Recusas guardadas para a interface
+    MAX_RECUSAS = 200
+
+    def __init__(self, caminho: str, tamanho_lote: int = 200, intervalo_ms: float = 200,
+                 aplicar: Optional[Callable[[str, List[Dict]], Tuple[int, List[Tuple[Dict, str]]]]] = None,
+                 iniciar_envio: bool = True):
+        if tamanho_lote <= 0:
+            raise ValueError("Tamanho do lote deve ser maior que zero")
+        if aplicar is None:
+            from models.estoque_model import EstoqueModel
+            aplicar = EstoqueModel.aplicar_diario
+
+        self.caminho = os.path.abspath(caminho)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo_ms / 1000
+        self._aplicar = aplicar
+
+        self._cond = threading.Condition()
+        self._fechando = False
+        # (registro, instante da confirmação) ainda não aplicados no banco
+        self._pendentes = deque()
+        self._ids_aplicados: Set[int] = set()
+        self._recusas: List[Tuple[Dict, str]] = []
+        self._aplicadas = 0
+        self._recusadas = 0
+        self._lotes = 0
+        self._falhas_seguidas = 0
+        self.ultimo_erro: Optional[str] = None
+        self.latencia_envio = HistogramaLatencia()
+
+        self.origem, self._seq = self._recuperar()
+        self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+        self._thread = threading.Thread(target=self._enviar_continuamente, name="diario-envio", daemon=True)
+        if iniciar_envio:
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Arquivo
+    # ------------------------------------------------------------------
+
+    def _recuperar(self) -> Tuple[str, int]:
+        """Lê o diário existente (ou cria um novo) e recoloca as pendentes na fila"""
+        if not os.path.exists(self.caminho):
+            origem = uuid.uuid4().hex
+            self._reescrever(origem, 0, [])
+            return origem, 0
+
+        origem, seq, aplicado_ate = None, 0, 0
+        registros = []
+        valido_ate = 0
+        with open(self.caminho, 'rb') as f:
+            for linha in f:
+                try:
+                    if not linha.endswith(b"\n"):
+                        raise ValueError("linha incompleta")
+                    dado = json.loads(linha)
+                except ValueError:
+                    break  # escrita interrompida: o resto nunca foi confirmado
+                valido_ate += len(linha)
+                if 'origem' in dado:
+                    origem, seq = dado['origem'], dado['seq']
+                elif 'aplicado_ate' in dado:
+                    aplicado_ate = max(aplicado_ate, dado['aplicado_ate'])
+                else:
+                    registros.append(dado)
+                    seq = max(seq, dado['seq'])
+
+        if origem is None:
+            raise ValueError(f"Diário sem cabeçalho de origem: {self.caminho}")
+        if valido_ate < os.path.getsize(self.caminho):
+            with open(self.caminho, 'r+b') as f:
+                f.truncate(valido_ate)
+                f.flush()
+                os.fsync(f.fileno())
+
+        agora = time.monotonic()
+        self._pendentes.extend((r, agora) for r in registros if r['seq'] > aplicado_ate)
+        return origem, seq
+
+    def _reescrever(self, origem: str, seq: int, registros: List[Dict]):
+        """Troca o arquivo de forma atômica (temporário + fsync + rename)"""
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'origem': origem, 'seq': seq}) + "\n")
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+        self._sincronizar_diretorio()
+
+    def _sincronizar_diretorio(self):
+        if os.name != 'posix':
+            return
+        fd = os.open(os.path.dirname(self.caminho), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _compactar(self):
+        """Reescreve o arquivo só com o cabeçalho e as pendentes (chamado com o lock)"""
+        self._arquivo.close()
+        self._reescrever(self.origem, self._seq, [r for r, _ in self._pendentes])
+        self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def registrar(self, id_produto: int, tipo: str, quantidade: int,
+                  observacao: str = "", usuario: str = "Sistema") -> int:
+        """
+        Grava a movimentação no diário (com fsync) para envio posterior
+
+        Returns:
+            int: Sequência do registro no diário
+        """
+        if tipo not in ('ENTRADA', 'SAIDA'):
+            raise ValueError(f"Tipo inválido: {tipo!r}")
+        if not isinstance(quantidade, int) or quantidade <= 0:
+            raise ValueError("Quantidade deve ser maior que zero")
+
+        with self._cond:
+            if self._fechando:
+                raise ValueError("Diário de movimentações encerrado")
+            registro = {
+                'seq': self._seq + 1,
+                'id_produto': id_produto,
+                'tipo_movimentacao': tipo,
+                'quantidade': quantidade,
+                'observacao': observacao,
+                'usuario': usuario,
+                'data_movimentacao': datetime.now().isoformat(sep=' '),
+            }
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+
+            self._seq = registro['seq']
+            self._pendentes.append((registro, time.monotonic()))
+            if len(self._pendentes) == 1 or len(self._pendentes) >= self.tamanho_lote:
+                self._cond.notify_all()
+            return registro['seq']
+
+    # ------------------------------------------------------------------
+    # Envio
+    # ------------------------------------------------------------------
+
+    def _proximo_lote(self) -> Optional[List[Tuple[Dict, float]]]:
+        """Espera o lote encher (ou o mais antigo vencer o intervalo); None ao encerrar"""
+        with self._cond:
+            while True:
+                if self._fechando:
+                    return list(self._pendentes)[:self.tamanho_lote] or None
+                if len(self._pendentes) >= self.tamanho_lote:
+                    break
+                if self._pendentes:
+                    restante = self._pendentes[0][1] + self.intervalo - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+                else:
+                    self._cond.wait()
+            return list(self._pendentes)[:self.tamanho_lote]
+
+    def _enviar_continuamente(self):
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+
+            registros = [{**r, 'data_movimentacao': datetime.fromisoformat(r['data_movimentacao'])}
+                         for r, _ in lote]
+            try:
+                _, recusados = self._aplicar(self.origem, registros)
+            except Exception as e:
+                with self._cond:
+                    self._falhas_seguidas += 1
+                    self.ultimo_erro = str(e)
+                    if self._fechando:
+                        return
+                    self._cond.wait(min(self.MAX_ESPERA_ERRO_S, 0.5 * 2 ** (self._falhas_seguidas - 1)))
+                continue
+
+            self._concluir_lote(lote, [({**r, 'data_movimentacao': r['data_movimentacao'].isoformat(sep=' ')},
+                                        motivo) for r, motivo in recusados])
+
+    def _concluir_lote(self, lote: List[Tuple[Dict, float]], recusados: List[Tuple[Dict, str]]):
+        agora = time.monotonic()
+        recusadas = {r['seq'] for r, _ in recusados}
+        with self._cond:
+            if self._arquivo.closed:
+                return  # fechado no meio do envio: o banco já descarta o reenvio
+            self._arquivo.write(json.dumps({'aplicado_ate': lote[-1][0]['seq']}) + "\n")
+            self._arquivo.flush()
+            for _ in lote:
+                self._pendentes.popleft()
+            for registro, instante in lote:
+                self.latencia_envio.registrar((agora - instante) * 1000)
+                if registro['seq'] not in recusadas:
+                    self._aplicadas += 1
+                    self._ids_aplicados.add(registro['id_produto'])
+            for registro, motivo in recusados:
+                self._recusadas += 1
+                self._recusas.append((registro, motivo))
+            del self._recusas[:-self.MAX_RECUSAS]
+            self._lotes += 1
+            self._falhas_seguidas = 0
+            self.ultimo_erro = None
+
+            if recusados:
+                with open(self.caminho + ".recusadas", 'a', encoding='utf-8') as f:
+                    for registro, motivo in recusados:
+                        f.write(json.dumps({**registro, 'motivo': motivo}, ensure_ascii=False) + "\n")
+            if not self._pendentes and self._arquivo.tell() > self.COMPACTAR_BYTES:
+                self._compactar()
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Consulta e encerramento
+    # ------------------------------------------------------------------
+
+    def pendentes(self) -> int:
+        with self._cond:
+            return len(self._pendentes)
+
+    def retirar_eventos(self) -> Tuple[Set[int], List[Tuple[Dict, str]]]:
+        """Produtos alterados e recusas desde a última chamada (para a interface)"""
+        with self._cond:
+            ids, self._ids_aplicados = self._ids_aplicados, set()
+            recusas, self._recusas = self._recusas, []
+            return ids, recusas
+
+    def estatisticas(self) -> dict:
+        with self._cond:
+            atraso = time.monotonic() - self._pendentes[0][1] if self._pendentes else 0.0
+            return {
+                'origem': self.origem,
+                'ultima_seq': self._seq,
+                'pendentes': len(self._pendentes),
+                'atraso_s': round(atraso, 3),
+                'aplicadas': self._aplicadas,
+                'recusadas': self._recusadas,
+                'lotes': self._lotes,
+                'tamanho_lote': self.tamanho_lote,
+                'intervalo_ms': self.intervalo * 1000,
+                'ultimo_erro': self.ultimo_erro,
+                'latencia_envio': self.latencia_envio.resumo(),
+            }
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a fila esvaziar; retorna False se o prazo acabar antes"""
+        prazo = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pendentes:
+                restante = None if prazo is None else prazo - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def fechar(self, timeout: float = 5.0) -> int:
+        """
+        Tenta enviar as pendentes por até ``timeout`` segundos e fecha o arquivo
+
+        O que não for enviado continua no arquivo e é reenviado na próxima
+        abertura.
+
+        Returns:
+            int: Movimentações que ficaram pendentes
+        """
+        if self._thread.is_alive():
+            self.aguardar(timeout)
+        with self._cond:
+            self._fechando = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        with self._cond:
+            if not self._arquivo.closed:
+                self._arquivo.close()
+            return len(self._pendentes)
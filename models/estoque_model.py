@@ -1,163 +1,1312 @@
+import re
 from config.database import DatabaseConfig
-from typing import List, Dict, Optional
+from config.instrumentacao import Instrumentacao
+from models.cache_produtos import CacheProdutos
+from models.instrucoes_sql import InstrucoesSQL
+from models.linhas import CursorLinhas
+from datetime import date, datetime, time, timedelta
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
+
+
+class MovimentacaoLoteError(Exception):
+    """Lote de movimentações rejeitado; ``erros`` traz (índice da linha, mensagem)"""
+
+    def __init__(self, erros: List[Tuple[int, str]]):
+        self.erros = erros
+        resumo = "; ".join(f"linha {i + 1}: {msg}" for i, msg in erros[:5])
+        if len(erros) > 5:
+            resumo += f"; ... (+{len(erros) - 5} erros)"
+        super().__init__(f"Lote rejeitado com {len(erros)} erro(s): {resumo}")
+
 
 class EstoqueModel:
     """Modelo para operações de estoque"""
-    
+
+    # Cache de produtos compartilhado por todas as chamadas do modelo
+    cache = CacheProdutos(**DatabaseConfig.CACHE_CONFIG)
+
+    # Leituras devolvem Linha (__slots__) em vez de um dict por linha
+    linhas_compactas = DatabaseConfig.LINHAS_COMPACTAS
+
+    @staticmethod
+    def _cursor_linhas(conn, **opcoes):
+        """Cursor das leituras: linhas como dict ou, com ``linhas_compactas``, como Linha"""
+        if EstoqueModel.linhas_compactas:
+            return CursorLinhas(conn.cursor(**opcoes))
+        return conn.cursor(dictionary=True, **opcoes)
+
     @staticmethod
     def listar_produtos() -> List[Dict]:
         """Retorna todos os produtos"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        try:
-            cursor.execute("""
-                SELECT id_produto, nome_produto, descricao, 
-                       qtd_estoque, qtd_minima, preco_unitario
-                FROM produtos
-                ORDER BY nome_produto
-            """)
-            return cursor.fetchall()
-        finally:
-            cursor.close()
-            conn.close()
-    
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                cursor.execute(InstrucoesSQL.LISTAR_PRODUTOS)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def listar_produtos_pagina(limite: int = 100,
+                               apos: Optional[Tuple[str, int]] = None,
+                               antes: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """
+        Retorna uma página de produtos ordenada por (nome_produto, id_produto)
+
+        Paginação por chave (keyset) apoiada no índice ``idx_produto_nome``:
+        o custo de cada página independe da posição no catálogo.
+
+        Args:
+            limite: Máximo de produtos na página
+            apos: Chave (nome, id) do último produto já exibido; retorna os seguintes
+            antes: Chave (nome, id) do primeiro produto já exibido; retorna os anteriores
+
+        Returns:
+            List[Dict]: Produtos da página, sempre em ordem crescente
+        """
+        query = """
+            SELECT id_produto, nome_produto, descricao,
+                   qtd_estoque, qtd_minima, preco_unitario
+            FROM produtos
+        """
+        params = []
+
+        if apos is not None:
+            query += " WHERE nome_produto > %s OR (nome_produto = %s AND id_produto > %s)"
+            params += [apos[0], apos[0], apos[1]]
+            query += " ORDER BY nome_produto, id_produto"
+        elif antes is not None:
+            query += " WHERE nome_produto < %s OR (nome_produto = %s AND id_produto < %s)"
+            params += [antes[0], antes[0], antes[1]]
+            query += " ORDER BY nome_produto DESC, id_produto DESC"
+        else:
+            query += " ORDER BY nome_produto, id_produto"
+
+        query += " LIMIT %s"
+        params.append(limite)
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                cursor.execute(query, params)
+                produtos = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        if antes is not None:
+            produtos.reverse()
+        EstoqueModel.cache.guardar(produtos)
+        return produtos
+
+    @staticmethod
+    def obter_produtos(ids: List[int]) -> Dict[int, Dict]:
+        """
+        Retorna produtos por id, lendo do cache e buscando só os ausentes
+
+        Returns:
+            Dict[int, Dict]: Produtos encontrados, por id (ids inexistentes ficam de fora)
+        """
+        cache = EstoqueModel.cache
+        if cache.precisa_validar():
+            EstoqueModel.revalidar_cache()
+
+        encontrados, faltantes = cache.obter(dict.fromkeys(ids))
+        if not faltantes:
+            return encontrados
+
+        # Lista completada até um tamanho fixo para reaproveitar a instrução preparada
+        tamanho = InstrucoesSQL.tamanho_busca(len(faltantes))
+        params = faltantes + faltantes[-1:] * (tamanho - len(faltantes))
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn,
+                                              prepared=tamanho <= InstrucoesSQL.MAX_BUSCA_PREPARADA)
+
+            try:
+                cursor.execute(InstrucoesSQL.buscar_produtos(tamanho), params)
+                produtos = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        cache.guardar(produtos)
+        encontrados.update((p['id_produto'], p) for p in produtos)
+        return encontrados
+
+    @staticmethod
+    def obter_produto(id_produto: int) -> Optional[Dict]:
+        """Retorna um produto pelo id (via cache), ou None se não existir"""
+        return EstoqueModel.obter_produtos([id_produto]).get(id_produto)
+
+    # Palavras mais curtas não entram na busca pela descrição (FULLTEXT/FTS5)
+    MIN_PALAVRA_BUSCA = 3
+
+    @staticmethod
+    def buscar_produtos(texto: str, limite: int = 10) -> List[Dict]:
+        """
+        Busca produtos para o autocompletar dos formulários
+
+        Um texto só de dígitos é tentado primeiro como ``id_produto``. Depois
+        vêm os produtos cujo nome começa pelo texto (intervalo no índice
+        idx_produto_nome) e, se ainda houver espaço, aqueles cuja descrição
+        tem palavras começando por cada palavra do texto (índice FULLTEXT no
+        MySQL, tabela FTS5 no SQLite).
+
+        Returns:
+            List[Dict]: Até ``limite`` produtos, nessa ordem de prioridade
+        """
+        texto = texto.strip()
+        if not texto or limite <= 0:
+            return []
+
+        encontrados: Dict[int, Dict] = {}
+        if texto.isdigit():
+            produto = EstoqueModel.obter_produto(int(texto))
+            if produto:
+                encontrados[produto['id_produto']] = produto
+
+        backend = DatabaseConfig.get_backend()
+        palavras = [p for p in re.findall(r"\w+", texto) if len(p) >= EstoqueModel.MIN_PALAVRA_BUSCA]
+        padrao = re.sub(r"([!%_])", r"!\1", texto) + "%"
+        ids_descricao = []
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn, prepared=True)
+
+            try:
+                cursor.execute(InstrucoesSQL.BUSCAR_PRODUTOS_POR_NOME, (padrao, limite))
+                por_nome = cursor.fetchall()
+                for produto in por_nome:
+                    encontrados.setdefault(produto['id_produto'], produto)
+
+                if palavras and len(encontrados) < limite:
+                    cursor.execute(backend.BUSCA_DESCRICAO,
+                                   (backend.termos_busca(palavras), limite + len(encontrados)))
+                    ids_descricao = [linha['id_produto'] for linha in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+        EstoqueModel.cache.guardar(por_nome)
+        produtos = list(encontrados.values())[:limite]
+        faltantes = [i for i in dict.fromkeys(ids_descricao) if i not in encontrados]
+        faltantes = faltantes[:limite - len(produtos)]
+        if faltantes:
+            por_id = EstoqueModel.obter_produtos(faltantes)
+            produtos.extend(por_id[i] for i in faltantes if i in por_id)
+        return produtos
+
+    @staticmethod
+    def revalidar_cache():
+        """
+        Sincroniza o cache com alterações feitas por outros clientes
+
+        Busca só os produtos com ``atualizado_em`` a partir da última marca
+        (menos a janela de sobreposição), pelo índice idx_produto_atualizado.
+        Se houver mais alterações do que cabe no cache, ele é esvaziado.
+        """
+        cache = EstoqueModel.cache
+        with DatabaseConfig.conexao() as conn:
+            # Linhas internas: a marca sai de cada produto antes do cache
+            cursor = conn.cursor(dictionary=True)
+
+            try:
+                if cache.marca is None:
+                    cursor.execute(InstrucoesSQL.ULTIMA_ALTERACAO_PRODUTOS)
+                    ultimo = cursor.fetchone()
+                    cache.aplicar_alteracoes([], ultimo['marca'] if ultimo else None)
+                    return
+
+                cursor.execute(InstrucoesSQL.PRODUTOS_ALTERADOS_DESDE, (cache.marca - timedelta(seconds=cache.janela), cache.tamanho_max + 1))
+                alterados = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        if len(alterados) > cache.tamanho_max:
+            cache.invalidar()
+            EstoqueModel.revalidar_cache()
+            return
+
+        marca = alterados[-1].pop('atualizado_em') if alterados else None
+        for produto in alterados:
+            produto.pop('atualizado_em', None)
+        cache.aplicar_alteracoes(alterados, marca)
+
+    @staticmethod
+    def alteracoes_produtos(desde: Optional[datetime] = None,
+                            limite: int = 500) -> Tuple[List[Dict], Optional[datetime]]:
+        """
+        Produtos alterados (estoque ou cadastro) a partir de ``desde``
+
+        Toda movimentação altera a linha do produto, então ``atualizado_em``
+        e ``versao`` (somada pelo banco a cada alteração) cobrem entradas,
+        saídas e cadastros. Uma consulta de intervalo em
+        idx_produto_atualizado: sem alterações, lê só o fim do índice.
+        Sem ``desde``, só informa a marca atual (ponto de partida); com
+        ``limite`` atingido, a marca devolvida também é a atual, para quem
+        recarregar tudo continuar dela.
+
+        Returns:
+            Tuple: (até ``limite`` produtos, com ``versao`` e ``atualizado_em``,
+                    em ordem de alteração; maior ``atualizado_em`` lido ou None)
+        """
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn, prepared=True)
+
+            try:
+                alterados = []
+                if desde is not None:
+                    cursor.execute(InstrucoesSQL.ALTERACOES_PRODUTOS, (desde, limite))
+                    alterados = cursor.fetchall()
+                    if len(alterados) < limite:
+                        return alterados, alterados[-1]['atualizado_em'] if alterados else None
+
+                cursor.execute(InstrucoesSQL.ULTIMA_ALTERACAO_PRODUTOS)
+                ultimo = cursor.fetchone()
+                return alterados, ultimo['marca'] if ultimo else None
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def estatisticas_cache() -> dict:
+        """Retorna acertos, falhas e ocupação do cache de produtos"""
+        return EstoqueModel.cache.estatisticas()
+
     @staticmethod
     def adicionar_produto(nome: str, descricao: str, qtd_minima: int, preco: float) -> int:
         """Adiciona novo produto"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO produtos (nome_produto, descricao, qtd_minima, preco_unitario)
-                VALUES (%s, %s, %s, %s)
-            """, (nome, descricao, qtd_minima, preco))
-            conn.commit()
-            return cursor.lastrowid
-        finally:
-            cursor.close()
-            conn.close()
-    
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(InstrucoesSQL.INSERIR_PRODUTO, (nome, descricao, qtd_minima, preco))
+                conn.commit()
+                return cursor.lastrowid
+            finally:
+                cursor.close()
+
     @staticmethod
     def registrar_entrada(id_produto: int, quantidade: int, observacao: str, usuario: str) -> bool:
         """Registra entrada de insumos"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Registra movimentação
-            cursor.execute("""
-                INSERT INTO movimentacoes 
-                (id_produto, tipo_movimentacao, quantidade, observacao, usuario)
-                VALUES (%s, 'ENTRADA', %s, %s, %s)
-            """, (id_produto, quantidade, observacao, usuario))
-            
-            # Atualiza estoque
-            cursor.execute("""
-                UPDATE produtos 
-                SET qtd_estoque = qtd_estoque + %s 
-                WHERE id_produto = %s
-            """, (quantidade, id_produto))
-            
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-            conn.close()
-    
+        with DatabaseConfig.conexao() as conn:
+            # Comandos quentes: instruções preparadas uma vez por conexão do pool
+            cursor = conn.cursor(prepared=True)
+
+            try:
+                # Atualiza estoque; LAST_INSERT_ID(expr) devolve o novo saldo
+                # em cursor.lastrowid sem uma consulta extra
+                cursor.execute(InstrucoesSQL.SOMAR_ESTOQUE, (quantidade, id_produto))
+                if cursor.rowcount == 0:
+                    raise Exception(f"Produto ID {id_produto} não encontrado")
+                novo_estoque = cursor.lastrowid
+
+                # Registra movimentação
+                cursor.execute(InstrucoesSQL.INSERIR_MOVIMENTACAO,
+                               (id_produto, 'ENTRADA', quantidade, observacao, usuario))
+
+                conn.commit()
+                EstoqueModel._atualizar_cache_estoque({id_produto: novo_estoque})
+                return True
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
     @staticmethod
     def registrar_saida(id_produto: int, quantidade: int, observacao: str, usuario: str) -> bool:
-        """Registra saída de insumos"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Verifica disponibilidade
-            cursor.execute("SELECT qtd_estoque FROM produtos WHERE id_produto = %s", (id_produto,))
-            resultado = cursor.fetchone()
-            
-            if not resultado:
-                raise Exception(f"Produto ID {id_produto} não encontrado")
-            
-            estoque_atual = resultado[0]
-            
-            if estoque_atual < quantidade:
-                raise Exception(f"Estoque insuficiente. Disponível: {estoque_atual}")
-            
-            # Registra movimentação
-            cursor.execute("""
-                INSERT INTO movimentacoes 
-                (id_produto, tipo_movimentacao, quantidade, observacao, usuario)
-                VALUES (%s, 'SAIDA', %s, %s, %s)
-            """, (id_produto, quantidade, observacao, usuario))
-            
-            # Atualiza estoque
-            cursor.execute("""
-                UPDATE produtos 
-                SET qtd_estoque = qtd_estoque - %s 
-                WHERE id_produto = %s
-            """, (quantidade, id_produto))
-            
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-            conn.close()
-    
+        """
+        Registra saída de insumos
+
+        A verificação de estoque e a baixa são um único UPDATE condicional:
+        a linha só é alterada se ``qtd_estoque >= quantidade``, e o InnoDB
+        serializa UPDATEs concorrentes na mesma linha. Assim duas saídas
+        simultâneas nunca deixam o estoque negativo, sem SELECT prévio.
+        """
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor(prepared=True)
+
+            try:
+                # Baixa o estoque somente se houver saldo suficiente
+                cursor.execute(InstrucoesSQL.BAIXAR_ESTOQUE, (quantidade, id_produto, quantidade))
+
+                if cursor.rowcount == 0:
+                    # Caminho de erro: descobre o motivo da recusa
+                    cursor.execute(InstrucoesSQL.CONSULTAR_ESTOQUE, (id_produto,))
+                    resultado = cursor.fetchone()
+
+                    if not resultado:
+                        raise Exception(f"Produto ID {id_produto} não encontrado")
+                    raise Exception(f"Estoque insuficiente. Disponível: {resultado[0]}")
+
+                novo_estoque = cursor.lastrowid
+
+                # Registra movimentação
+                cursor.execute(InstrucoesSQL.INSERIR_MOVIMENTACAO,
+                               (id_produto, 'SAIDA', quantidade, observacao, usuario))
+
+                conn.commit()
+                EstoqueModel._atualizar_cache_estoque({id_produto: novo_estoque})
+                return True
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _atualizar_cache_estoque(estoques: Dict[int, Optional[int]]):
+        """Reflete no cache o saldo gravado; saldo desconhecido (None) invalida o item"""
+        conhecidos = {i: q for i, q in estoques.items() if q is not None}
+        EstoqueModel.cache.definir_estoque(conhecidos)
+        EstoqueModel.cache.invalidar(i for i, q in estoques.items() if q is None)
+
+    # Máximo de produtos por UPDATE agrupado no lote
+    TAMANHO_GRUPO_LOTE = 500
+
+    @staticmethod
+    def registrar_movimentacoes(movimentacoes: List[Dict], usuario: str) -> int:
+        """
+        Registra um lote de entradas/saídas em uma única transação
+
+        Cada item é um dict com ``id_produto``, ``tipo_movimentacao``
+        ('ENTRADA' ou 'SAIDA'), ``quantidade`` e, opcionalmente,
+        ``observacao``, ``usuario`` e ``data_movimentacao`` (``datetime``,
+        para lançar com atraso). O estoque de todos os produtos
+        envolvidos é lido (e travado) em uma só consulta, as saídas são
+        validadas na ordem do lote e, se tudo estiver correto, as
+        movimentações são gravadas com um INSERT multi-linhas e os saldos
+        atualizados com um UPDATE por grupo de produtos. Movimentações
+        datadas em dias já fechados corrigem os fechamentos na mesma
+        transação.
+
+        Returns:
+            int: Quantidade de movimentações registradas
+
+        Raises:
+            MovimentacaoLoteError: Se qualquer linha for inválida (nada é gravado)
+        """
+        if not movimentacoes:
+            return 0
+
+        erros = []
+        for i, mov in enumerate(movimentacoes):
+            if mov.get('tipo_movimentacao') not in ('ENTRADA', 'SAIDA'):
+                erros.append((i, f"Tipo inválido: {mov.get('tipo_movimentacao')!r}"))
+            elif not isinstance(mov.get('quantidade'), int) or mov['quantidade'] <= 0:
+                erros.append((i, "Quantidade deve ser maior que zero"))
+            elif 'data_movimentacao' in mov and not isinstance(mov['data_movimentacao'], datetime):
+                erros.append((i, f"Data inválida: {mov['data_movimentacao']!r}"))
+        if erros:
+            raise MovimentacaoLoteError(erros)
+        datadas = any('data_movimentacao' in mov for mov in movimentacoes)
+
+        ids = sorted({mov['id_produto'] for mov in movimentacoes})
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                conn.start_transaction()
+                saldos = EstoqueModel._travar_saldos(cursor, ids)
+
+                deltas, erros = EstoqueModel._validar_saldos(movimentacoes, saldos)
+                if erros:
+                    raise MovimentacaoLoteError(erros)
+
+                EstoqueModel._gravar_lote(cursor, movimentacoes, deltas, usuario, datadas)
+                if datadas:
+                    EstoqueModel._ajustar_fechamentos(cursor, movimentacoes)
+
+                conn.commit()
+                EstoqueModel._atualizar_cache_estoque({i: saldos[i] for i in deltas})
+                return len(movimentacoes)
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _travar_saldos(cursor, ids: List[int]) -> Dict[int, int]:
+        """Lê e trava o estoque de todos os produtos do lote em uma só consulta"""
+        marcadores = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"""
+            SELECT id_produto, qtd_estoque FROM produtos
+            WHERE id_produto IN ({marcadores})
+            FOR UPDATE
+        """, ids)
+        return dict(cursor.fetchall())
+
+    @staticmethod
+    def _validar_saldos(movimentacoes: List[Dict],
+                        saldos: Dict[int, int]) -> Tuple[Dict[int, int], List[Tuple[int, str]]]:
+        """
+        Valida as linhas na ordem, acumulando os saldos
+
+        ``saldos`` é atualizado no lugar só com as linhas válidas.
+
+        Returns:
+            Tuple: (variação de estoque por produto, erros por índice da linha)
+        """
+        deltas = {}
+        erros = []
+        for i, mov in enumerate(movimentacoes):
+            id_produto = mov['id_produto']
+            if id_produto not in saldos:
+                erros.append((i, f"Produto ID {id_produto} não encontrado"))
+                continue
+
+            delta = mov['quantidade'] if mov['tipo_movimentacao'] == 'ENTRADA' else -mov['quantidade']
+            if saldos[id_produto] + delta < 0:
+                erros.append((i, f"Estoque insuficiente. Disponível: {saldos[id_produto]}"))
+                continue
+
+            saldos[id_produto] += delta
+            deltas[id_produto] = deltas.get(id_produto, 0) + delta
+        return deltas, erros
+
+    @staticmethod
+    def _gravar_lote(cursor, movimentacoes: List[Dict], deltas: Dict[int, int], usuario: str,
+                     datadas: bool = False):
+        """
+        Grava movimentações já validadas e aplica as variações de estoque (sem commit)
+
+        As movimentações entram em um INSERT multi-linhas e os saldos são
+        atualizados com um UPDATE por grupo de produtos. Com ``datadas``,
+        cada item grava a sua ``data_movimentacao`` (já validada como
+        ``datetime``); quem pede isso ajusta também os fechamentos
+        (``_ajustar_fechamentos``). Sem ``datadas``, a data é a do banco.
+        """
+        if datadas:
+            agora = datetime.now()
+            cursor.executemany(InstrucoesSQL.INSERIR_MOVIMENTACAO_DATADA, [
+                (mov['id_produto'], mov['tipo_movimentacao'], mov['quantidade'],
+                 mov.get('observacao', ''), mov.get('usuario', usuario),
+                 mov.get('data_movimentacao', agora))
+                for mov in movimentacoes
+            ])
+        else:
+            # executemany gera INSERT multi-linhas
+            cursor.executemany(InstrucoesSQL.INSERIR_MOVIMENTACAO, [
+                (mov['id_produto'], mov['tipo_movimentacao'], mov['quantidade'],
+                 mov.get('observacao', ''), mov.get('usuario', usuario))
+                for mov in movimentacoes
+            ])
+
+        itens = [(id_produto, d) for id_produto, d in deltas.items() if d != 0]
+        for inicio in range(0, len(itens), EstoqueModel.TAMANHO_GRUPO_LOTE):
+            grupo = itens[inicio:inicio + EstoqueModel.TAMANHO_GRUPO_LOTE]
+            casos = " ".join(["WHEN %s THEN %s"] * len(grupo))
+            marcadores = ", ".join(["%s"] * len(grupo))
+            params = [v for par in grupo for v in par] + [id_produto for id_produto, _ in grupo]
+            cursor.execute(f"""
+                UPDATE produtos
+                SET qtd_estoque = qtd_estoque + CASE id_produto {casos} END
+                WHERE id_produto IN ({marcadores})
+            """, params)
+
+    @staticmethod
+    def aplicar_diario(origem: str, registros: List[Dict]) -> Tuple[int, List[Tuple[Dict, str]]]:
+        """
+        Aplica registros de um diário local de movimentações exatamente uma vez
+
+        Cada registro traz ``seq`` (crescente no diário de ``origem``) além
+        dos campos de uma movimentação. Na mesma transação das gravações,
+        ``diario_origens`` guarda a maior ``seq`` aplicada; registros com
+        ``seq`` até ela (reenvio após queda entre o commit e o checkpoint
+        do diário) são ignorados. Linhas recusadas (estoque insuficiente,
+        produto inexistente) são devolvidas sem impedir as demais, pois
+        já foram confirmadas ao operador e não podem travar a fila.
+        Registros que chegam depois do fechamento do seu dia corrigem, na
+        mesma transação, os fechamentos já gravados desse dia em diante.
+
+        Returns:
+            Tuple[int, List[Tuple[Dict, str]]]: (movimentações gravadas,
+            registros recusados com o motivo)
+        """
+        if not registros:
+            return 0, []
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                conn.start_transaction()
+
+                cursor.execute(InstrucoesSQL.TRAVAR_ORIGEM_DIARIO, (origem,))
+                linha = cursor.fetchone()
+                ultima_seq = linha[0] if linha else 0
+
+                # Datas do diário chegam em texto ISO quando lidas do arquivo
+                novos = [{**r, 'data_movimentacao': datetime.fromisoformat(r['data_movimentacao'])}
+                         if isinstance(r.get('data_movimentacao'), str) else r
+                         for r in registros if r['seq'] > ultima_seq]
+                validos, recusados, saldos, deltas = [], [], {}, {}
+                if novos:
+                    saldos = EstoqueModel._travar_saldos(cursor, sorted({r['id_produto'] for r in novos}))
+                    deltas, erros = EstoqueModel._validar_saldos(novos, saldos)
+                    motivos = dict(erros)
+                    recusados = [(r, motivos[i]) for i, r in enumerate(novos) if i in motivos]
+                    validos = [r for i, r in enumerate(novos) if i not in motivos]
+                    if validos:
+                        EstoqueModel._gravar_lote(cursor, validos, deltas, "diario", datadas=True)
+                        EstoqueModel._ajustar_fechamentos(cursor, validos)
+
+                maior_seq = max(r['seq'] for r in registros)
+                if linha is None:
+                    cursor.execute(InstrucoesSQL.INSERIR_ORIGEM_DIARIO, (origem, maior_seq))
+                elif maior_seq > ultima_seq:
+                    cursor.execute(InstrucoesSQL.ATUALIZAR_ORIGEM_DIARIO, (maior_seq, origem))
+
+                conn.commit()
+                EstoqueModel._atualizar_cache_estoque({i: saldos[i] for i in deltas})
+                return len(validos), recusados
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _ajustar_fechamentos(cursor, movimentacoes: List[Dict]):
+        """
+        Soma movimentações de dias passados aos fechamentos posteriores a elas (sem commit)
+
+        O fechamento de um dia é o saldo ao fim dele; uma movimentação
+        gravada depois com data anterior muda esse saldo e o de todos os
+        fechamentos seguintes. Movimentações de hoje não têm fechamento.
+        """
+        hoje = date.today()
+        deltas = {}
+        for mov in movimentacoes:
+            data = mov.get('data_movimentacao')
+            if data is None:
+                continue
+            dia = data.date()
+            if dia >= hoje:
+                continue
+            chave = (dia, mov['id_produto'])
+            delta = mov['quantidade'] if mov['tipo_movimentacao'] == 'ENTRADA' else -mov['quantidade']
+            deltas[chave] = deltas.get(chave, 0) + delta
+
+        for (dia, id_produto), delta in sorted(deltas.items()):
+            if delta:
+                cursor.execute(InstrucoesSQL.AJUSTAR_FECHAMENTOS, (delta, dia, id_produto))
+
+    @staticmethod
+    def importar_produtos(produtos: List[Dict], usuario: str, tamanho_lote: int = 1000) -> int:
+        """
+        Cadastra produtos em massa, com saldo inicial, em uma única transação
+
+        Cada item traz ``nome_produto``, ``descricao``, ``qtd_minima``,
+        ``preco_unitario`` e ``qtd_estoque`` (saldo inicial). Os produtos são
+        gravados com INSERTs multi-linhas de ``tamanho_lote`` linhas e, para
+        cada saldo inicial positivo, é gerada a ENTRADA correspondente.
+
+        Returns:
+            int: Quantidade de produtos cadastrados
+        """
+        if not produtos:
+            return 0
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                conn.start_transaction()
+
+                for inicio in range(0, len(produtos), tamanho_lote):
+                    lote = produtos[inicio:inicio + tamanho_lote]
+                    ids = EstoqueModel._inserir_lote_produtos(cursor, lote)
+
+                    entradas = [
+                        (id_produto, 'ENTRADA', p['qtd_estoque'], 'Saldo inicial (importação)', usuario)
+                        for id_produto, p in zip(ids, lote) if p['qtd_estoque'] > 0
+                    ]
+                    if entradas:
+                        cursor.executemany(InstrucoesSQL.INSERIR_MOVIMENTACAO, entradas)
+
+                conn.commit()
+                return len(produtos)
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _inserir_lote_produtos(cursor, lote: List[Dict]) -> List[int]:
+        """
+        Insere um lote de produtos com um INSERT multi-linhas e retorna os ids
+
+        O InnoDB reserva ids consecutivos para um INSERT de tamanho conhecido,
+        a partir de LAST_INSERT_ID(). Isso é conferido com uma leitura
+        travada do intervalo; se outra sessão tiver intercalado ids, o lote é
+        desfeito até o savepoint e refeito linha a linha.
+        """
+        linhas = [
+            (p['nome_produto'], p['descricao'], p['qtd_estoque'], p['qtd_minima'], p['preco_unitario'])
+            for p in lote
+        ]
+        sql_insert = InstrucoesSQL.INSERIR_PRODUTO_COM_SALDO
+
+        cursor.execute("SAVEPOINT lote_produtos")
+        cursor.executemany(sql_insert, linhas)
+        primeiro_id = cursor.lastrowid
+        ids = list(range(primeiro_id, primeiro_id + len(lote)))
+
+        cursor.execute(InstrucoesSQL.CONFERIR_LOTE_PRODUTOS, (ids[0], ids[-1]))
+        if cursor.fetchall() == [(nome, descricao) for nome, descricao, *_ in linhas]:
+            return ids
+
+        cursor.execute("ROLLBACK TO SAVEPOINT lote_produtos")
+        ids = []
+        for linha in linhas:
+            cursor.execute(sql_insert, linha)
+            ids.append(cursor.lastrowid)
+        return ids
+
     @staticmethod
     def produtos_criticos() -> List[Dict]:
-        """Retorna produtos abaixo do estoque mínimo"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        try:
-            cursor.execute("""
-                SELECT id_produto, nome_produto, qtd_estoque, qtd_minima,
-                       (qtd_minima - qtd_estoque) as deficit
-                FROM produtos
-                WHERE qtd_estoque < qtd_minima
-                ORDER BY deficit DESC
-            """)
-            return cursor.fetchall()
-        finally:
-            cursor.close()
-            conn.close()
-    
-    @staticmethod
-    def relatorio_movimentacoes(data_inicio: str = None, data_fim: str = None) -> List[Dict]:
-        """Gera relatório de movimentações"""
-        conn = DatabaseConfig.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        try:
-            query = """
-                SELECT m.id_movimentacao, p.nome_produto, m.tipo_movimentacao,
-                       m.quantidade, m.data_movimentacao, m.observacao, m.usuario
-                FROM movimentacoes m
-                JOIN produtos p ON m.id_produto = p.id_produto
-                WHERE 1=1
-            """
-            params = []
-            
-            if data_inicio and data_inicio != "AAAA-MM-DD":
-                query += " AND DATE(m.data_movimentacao) >= %s"
-                params.append(data_inicio)
-            
-            if data_fim and data_fim != "AAAA-MM-DD":
-                query += " AND DATE(m.data_movimentacao) <= %s"
-                params.append(data_fim)
-            
-            query += " ORDER BY m.data_movimentacao DESC LIMIT 100"
-            
-            cursor.execute(query, params)
-            return cursor.fetchall()
-        finally:
-            cursor.close()
-            conn.close()
\ No newline at end of file
+        """
+        Retorna produtos abaixo do estoque mínimo
+
+        Lê o intervalo ``deficit > 0`` do índice idx_produto_deficit sobre a
+        coluna gerada, em vez de avaliar a condição em todo o catálogo.
+        """
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                cursor.execute(InstrucoesSQL.PRODUTOS_CRITICOS)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _intervalo_datas(data_inicio: str = None,
+                         data_fim: str = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        Converte datas AAAA-MM-DD (inclusivas) no intervalo [início, fim)
+
+        O fim vira a meia-noite do dia seguinte, para que os filtros
+        comparem a coluna de data diretamente, sem DATE(), e usem índice.
+
+        Raises:
+            ValueError: Se alguma data não estiver no formato AAAA-MM-DD
+        """
+        def converter(data: str) -> Optional[date]:
+            if not data or data == "AAAA-MM-DD":
+                return None
+            try:
+                return date.fromisoformat(data)
+            except ValueError:
+                raise ValueError(f"Data inválida: {data!r} (use AAAA-MM-DD)")
+
+        inicio = converter(data_inicio)
+        fim = converter(data_fim)
+        return (
+            datetime.combine(inicio, time.min) if inicio else None,
+            datetime.combine(fim + timedelta(days=1), time.min) if fim else None,
+        )
+
+    @staticmethod
+    def iterar_movimentacoes(data_inicio: str = None, data_fim: str = None,
+                             limite: Optional[int] = None,
+                             tamanho_lote: int = 1000) -> Iterator[Dict]:
+        """
+        Percorre as movimentações do período sem carregá-las todas na memória
+
+        Usa cursor não bufferizado e busca em lotes de ``tamanho_lote``
+        linhas, então o consumo de memória independe do tamanho do período.
+        A conexão fica emprestada até o gerador ser esgotado ou fechado.
+
+        Períodos que alcançam meses arquivados também leem
+        movimentacoes_arquivo. Só ``limite`` sem data inicial lê apenas a
+        tabela principal, onde estão as movimentações mais recentes.
+
+        Yields:
+            Dict: Movimentação com dados do produto, da mais recente à mais antiga
+        """
+        query = """
+            SELECT m.id_movimentacao, m.id_produto, p.nome_produto, m.tipo_movimentacao,
+                   m.quantidade, m.data_movimentacao, m.observacao, m.usuario
+            FROM movimentacoes m
+            JOIN produtos p ON m.id_produto = p.id_produto
+            WHERE 1=1
+        """
+        params = []
+
+        # Intervalo semiaberto sobre a coluna nua, para usar idx_data_mov e
+        # ler só as partições dos meses do período
+        inicio, fim = EstoqueModel._intervalo_datas(data_inicio, data_fim)
+
+        if inicio:
+            query += " AND m.data_movimentacao >= %s"
+            params.append(inicio)
+
+        if fim:
+            query += " AND m.data_movimentacao < %s"
+            params.append(fim)
+
+        unida = False
+        if inicio or limite is None:
+            query, params, unida = EstoqueModel._unir_arquivo(query, params, inicio)
+
+        query += " ORDER BY data_movimentacao DESC" if unida else " ORDER BY m.data_movimentacao DESC"
+
+        if limite is not None:
+            query += " LIMIT %s"
+            params.append(limite)
+
+        return EstoqueModel._iterar_consulta(query, params, tamanho_lote,
+                                            Instrumentacao.rotulo_fluxo('iterar_movimentacoes'))
+
+    @staticmethod
+    def _unir_arquivo(query: str, params: list,
+                      inicio: Optional[datetime]) -> Tuple[str, list, bool]:
+        """
+        Estende a consulta sobre ``movimentacoes m`` às movimentações arquivadas
+
+        Se o arquivo tiver movimentações a partir de ``inicio`` (ou
+        qualquer uma, sem início), a mesma consulta sobre
+        movimentacoes_arquivo é unida com UNION ALL, com os mesmos filtros.
+
+        Returns:
+            Tuple: (consulta, parâmetros, se houve união); com união, o
+                   ORDER BY deve usar os nomes das colunas, sem apelido
+        """
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute(InstrucoesSQL.ULTIMA_ARQUIVADA)
+                ultima = cursor.fetchone()
+            finally:
+                cursor.close()
+
+        if not ultima or (inicio and ultima[0] < inicio):
+            return query, params, False
+
+        arquivo = query.replace("FROM movimentacoes m", "FROM movimentacoes_arquivo m")
+        return f"{query} UNION ALL {arquivo}", params * 2, True
+
+    @staticmethod
+    def _iterar_consulta(query: str, params: list, tamanho_lote: int, chamador: str) -> Iterator[Dict]:
+        """
+        Executa a consulta com cursor não bufferizado e entrega as linhas em fluxo
+
+        A conexão fica emprestada até o gerador ser esgotado ou fechado.
+        ``chamador`` rotula a consulta na instrumentação: quem consome o
+        gerador não é a função do modelo que montou a consulta.
+        """
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn, buffered=False)
+
+            try:
+                with Instrumentacao.chamador(chamador):
+                    cursor.execute(query, params)
+                while True:
+                    lote = cursor.fetchmany(tamanho_lote)
+                    if not lote:
+                        break
+                    yield from lote
+            finally:
+                # Se o consumidor parou no meio, ainda há linhas pendentes no
+                # protocolo; o pool descarta essa conexão em vez de reusá-la
+                if not conn.unread_result:
+                    cursor.close()
+
+    @staticmethod
+    def iterar_exportacao_movimentacoes(data_inicio: str = None, data_fim: str = None,
+                                        apos_id: Optional[int] = None,
+                                        tamanho_lote: int = 5000,
+                                        lacunas: Optional[List[int]] = None) -> Iterator[Dict]:
+        """
+        Percorre movimentações com dados do produto para exportação
+
+        Ordena por ``id_movimentacao`` para permitir exportação incremental:
+        passando o último id exportado em ``apos_id``, só as novas são lidas
+        (intervalo da chave primária). O id é reservado no INSERT, mas a
+        linha só aparece no commit: uma transação longa pode confirmar um
+        id menor que outros já exportados. Os ids que faltavam abaixo da
+        marca, passados em ``lacunas``, são relidos junto com as novas.
+
+        Yields:
+            Dict: Movimentação com dados do produto, em ordem crescente de id
+        """
+        query = """
+            SELECT m.id_movimentacao, m.id_produto, p.nome_produto, m.tipo_movimentacao,
+                   m.quantidade, m.data_movimentacao, m.observacao, m.usuario,
+                   p.preco_unitario
+            FROM movimentacoes m
+            JOIN produtos p ON m.id_produto = p.id_produto
+            WHERE 1=1
+        """
+        params = []
+
+        if apos_id is not None and lacunas:
+            # Intervalo da chave a partir da menor lacuna (no máximo a
+            # sobreposição abaixo da marca), em vez de um OR sem intervalo
+            marcadores = ", ".join(["%s"] * len(lacunas))
+            query += (" AND m.id_movimentacao >= %s"
+                      f" AND (m.id_movimentacao > %s OR m.id_movimentacao IN ({marcadores}))")
+            params.extend([min(lacunas), apos_id])
+            params.extend(lacunas)
+        elif apos_id is not None:
+            query += " AND m.id_movimentacao > %s"
+            params.append(apos_id)
+
+        inicio, fim = EstoqueModel._intervalo_datas(data_inicio, data_fim)
+
+        if inicio:
+            query += " AND m.data_movimentacao >= %s"
+            params.append(inicio)
+
+        if fim:
+            query += " AND m.data_movimentacao < %s"
+            params.append(fim)
+
+        query, params, unida = EstoqueModel._unir_arquivo(query, params, inicio)
+        query += " ORDER BY id_movimentacao" if unida else " ORDER BY m.id_movimentacao"
+
+        return EstoqueModel._iterar_consulta(query, params, tamanho_lote,
+                                            Instrumentacao.rotulo_fluxo('iterar_exportacao_movimentacoes'))
+
+    @staticmethod
+    def iterar_produtos(apos_id: Optional[int] = None, tamanho_lote: int = 5000) -> Iterator[Dict]:
+        """Percorre o catálogo em ordem de id, em fluxo (para exportação)"""
+        query = """
+            SELECT id_produto, nome_produto, descricao, qtd_estoque,
+                   qtd_minima, preco_unitario, data_cadastro
+            FROM produtos
+        """
+        params = []
+
+        if apos_id is not None:
+            query += " WHERE id_produto > %s"
+            params.append(apos_id)
+
+        query += " ORDER BY id_produto"
+
+        return EstoqueModel._iterar_consulta(query, params, tamanho_lote,
+                                            Instrumentacao.rotulo_fluxo('iterar_produtos'))
+
+    @staticmethod
+    def relatorio_movimentacoes(data_inicio: str = None, data_fim: str = None,
+                                limite: Optional[int] = None) -> List[Dict]:
+        """Gera relatório de movimentações (todas do período, ou as ``limite`` mais recentes)"""
+        return list(EstoqueModel.iterar_movimentacoes(data_inicio, data_fim, limite))
+
+    @staticmethod
+    def _filtro_dias(data_inicio: str = None, data_fim: str = None,
+                     coluna: str = "dia") -> Tuple[str, list]:
+        """Monta o filtro de período sobre a coluna DATE do resumo diário"""
+        inicio, fim = EstoqueModel._intervalo_datas(data_inicio, data_fim)
+        filtro = ""
+        params = []
+
+        if inicio:
+            filtro += f" AND {coluna} >= %s"
+            params.append(inicio.date())
+
+        if fim:
+            filtro += f" AND {coluna} < %s"
+            params.append(fim.date())
+
+        return filtro, params
+
+    @staticmethod
+    def totais_periodo(data_inicio: str = None, data_fim: str = None) -> Dict[str, int]:
+        """
+        Soma entradas e saídas do período a partir do resumo diário
+
+        Lê uma linha por dia, produto e tipo (intervalo da chave primária
+        de movimentacoes_diarias), então o custo acompanha o número de dias
+        do período e não o de movimentações.
+
+        Returns:
+            Dict[str, int]: total_entradas, total_saidas, qtd_entradas e qtd_saidas
+        """
+        filtro, params = EstoqueModel._filtro_dias(data_inicio, data_fim)
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                cursor.execute(f"""
+                    SELECT tipo_movimentacao, SUM(quantidade) AS quantidade,
+                           SUM(qtd_movimentacoes) AS movimentacoes
+                    FROM movimentacoes_diarias
+                    WHERE 1=1 {filtro}
+                    GROUP BY tipo_movimentacao
+                """, params)
+                por_tipo = {linha['tipo_movimentacao']: linha for linha in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+        entradas = por_tipo.get('ENTRADA', {})
+        saidas = por_tipo.get('SAIDA', {})
+        return {
+            'total_entradas': int(entradas.get('quantidade') or 0),
+            'total_saidas': int(saidas.get('quantidade') or 0),
+            'qtd_entradas': int(entradas.get('movimentacoes') or 0),
+            'qtd_saidas': int(saidas.get('movimentacoes') or 0),
+        }
+
+    @staticmethod
+    def resumo_por_produto(data_inicio: str = None, data_fim: str = None) -> List[Dict]:
+        """
+        Entradas, saídas e número de movimentações de cada produto no período
+
+        Agrega o resumo diário (um registro por dia e tipo para cada produto
+        movimentado), sem ler as movimentações.
+
+        Returns:
+            List[Dict]: id_produto, nome_produto, entradas, saidas e movimentacoes,
+                        em ordem de nome
+        """
+        filtro, params = EstoqueModel._filtro_dias(data_inicio, data_fim, "d.dia")
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                cursor.execute(f"""
+                    SELECT d.id_produto, p.nome_produto,
+                           SUM(CASE WHEN d.tipo_movimentacao = 'ENTRADA' THEN d.quantidade ELSE 0 END) AS entradas,
+                           SUM(CASE WHEN d.tipo_movimentacao = 'SAIDA' THEN d.quantidade ELSE 0 END) AS saidas,
+                           SUM(d.qtd_movimentacoes) AS movimentacoes
+                    FROM movimentacoes_diarias d
+                    JOIN produtos p ON p.id_produto = d.id_produto
+                    WHERE 1=1 {filtro}
+                    GROUP BY d.id_produto, p.nome_produto
+                    ORDER BY p.nome_produto, d.id_produto
+                """, params)
+                resumo = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        # SUM devolve DECIMAL; os totais são sempre inteiros
+        for linha in resumo:
+            for campo in ('entradas', 'saidas', 'movimentacoes'):
+                linha[campo] = int(linha[campo])
+        return resumo
+
+    @staticmethod
+    def reconstruir_resumo_diario(data_inicio: str = None, data_fim: str = None) -> int:
+        """
+        Recalcula o resumo diário a partir das movimentações do período
+
+        Usado para preencher o resumo de movimentações gravadas antes da
+        tabela existir ou para corrigi-lo após manutenção direta no banco.
+        Apaga e regrava os dias do período (todos, sem datas) em uma única
+        transação; o INSERT ... SELECT trava as movimentações lidas, então
+        gravações concorrentes no período esperam o fim da reconstrução.
+        As movimentações arquivadas entram na soma junto com as da tabela
+        principal.
+
+        Returns:
+            int: Quantidade de linhas (dia, produto, tipo) gravadas
+        """
+        filtro_dias, params_dias = EstoqueModel._filtro_dias(data_inicio, data_fim)
+        inicio, fim = EstoqueModel._intervalo_datas(data_inicio, data_fim)
+
+        filtro_mov = ""
+        params_mov = []
+        if inicio:
+            filtro_mov += " AND data_movimentacao >= %s"
+            params_mov.append(inicio)
+        if fim:
+            filtro_mov += " AND data_movimentacao < %s"
+            params_mov.append(fim)
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                conn.start_transaction()
+
+                cursor.execute(f"DELETE FROM movimentacoes_diarias WHERE 1=1 {filtro_dias}",
+                               params_dias)
+
+                cursor.execute(f"""
+                    INSERT INTO movimentacoes_diarias
+                        (dia, id_produto, tipo_movimentacao, quantidade, qtd_movimentacoes)
+                    SELECT DATE(data_movimentacao), id_produto, tipo_movimentacao,
+                           SUM(quantidade), COUNT(*)
+                    FROM (
+                        SELECT data_movimentacao, id_produto, tipo_movimentacao, quantidade
+                        FROM movimentacoes
+                        WHERE id_produto IS NOT NULL {filtro_mov}
+                        UNION ALL
+                        SELECT data_movimentacao, id_produto, tipo_movimentacao, quantidade
+                        FROM movimentacoes_arquivo
+                        WHERE id_produto IS NOT NULL {filtro_mov}
+                    ) m
+                    GROUP BY DATE(data_movimentacao), id_produto, tipo_movimentacao
+                """, params_mov * 2)
+                gravadas = cursor.rowcount
+
+                conn.commit()
+                return gravadas
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    # Produtos lidos e gravados por vez ao registrar um fechamento
+    TAMANHO_LOTE_FECHAMENTO = 5000
+
+    @staticmethod
+    def _dia(data: str, padrao: Optional[date] = None) -> date:
+        """
+        Converte uma data AAAA-MM-DD em date (``padrao`` se vier vazia)
+
+        Raises:
+            ValueError: Se a data for inválida, ou vazia sem padrão
+        """
+        inicio, _ = EstoqueModel._intervalo_datas(data, None)
+        if inicio is not None:
+            return inicio.date()
+        if padrao is None:
+            raise ValueError("Informe a data (AAAA-MM-DD)")
+        return padrao
+
+    @staticmethod
+    def registrar_fechamento(dia: str = None) -> int:
+        """
+        Grava o saldo de todos os produtos ao fim do dia informado (padrão: ontem)
+
+        O saldo do dia é o estoque atual menos o resumo diário dos dias
+        posteriores, lidos no mesmo snapshot da transação, então o
+        fechamento pode rodar com o sistema em uso. Refazer o fechamento
+        de um dia substitui o anterior.
+
+        Returns:
+            int: Quantidade de produtos gravados
+
+        Raises:
+            ValueError: Se o dia for inválido ou ainda não tiver terminado
+        """
+        fechamento = EstoqueModel._dia(dia, date.today() - timedelta(days=1))
+        if fechamento >= date.today():
+            raise ValueError("Só é possível fechar dias já encerrados")
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                conn.start_transaction(consistent_snapshot=True)
+                cursor.execute(InstrucoesSQL.APAGAR_FECHAMENTO, (fechamento,))
+
+                gravados = 0
+                ultimo_id = 0
+                while True:
+                    cursor.execute(InstrucoesSQL.SALDOS_FECHAMENTO, (fechamento, ultimo_id, EstoqueModel.TAMANHO_LOTE_FECHAMENTO))
+                    lote = cursor.fetchall()
+                    if not lote:
+                        break
+
+                    cursor.executemany(InstrucoesSQL.INSERIR_FECHAMENTO, [(fechamento, id_produto, int(qtd)) for id_produto, qtd in lote])
+                    gravados += len(lote)
+                    ultimo_id = lote[-1][0]
+
+                conn.commit()
+                return gravados
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def estoque_em(data: str, ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Retorna o estoque dos produtos ao fim do dia informado
+
+        Parte da referência mais próxima da data (o fechamento anterior,
+        o posterior ou o saldo atual) e aplica só os dias entre elas do
+        resumo diário, então o custo é limitado pelo intervalo entre
+        fechamentos e não pelo histórico de movimentações.
+
+        Args:
+            data: Dia no formato AAAA-MM-DD
+            ids: Produtos a consultar (todos os cadastrados até a data, se None)
+
+        Returns:
+            List[Dict]: id_produto, nome_produto e qtd_estoque, em ordem de nome
+        """
+        dia = EstoqueModel._dia(data)
+        if ids is not None and not ids:
+            return []
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = EstoqueModel._cursor_linhas(conn)
+
+            try:
+                # Fechamentos mais próximos antes (ou no dia) e depois
+                cursor.execute(InstrucoesSQL.FECHAMENTO_ANTERIOR, (dia,))
+                anterior = cursor.fetchone()
+                cursor.execute(InstrucoesSQL.FECHAMENTO_POSTERIOR, (dia,))
+                posterior = cursor.fetchone()
+
+                # (distância em dias, fechamento); None representa o saldo atual
+                referencias = [(max((date.today() - dia).days, 0), None)]
+                if anterior:
+                    referencias.append(((dia - anterior['dia']).days, anterior['dia']))
+                if posterior:
+                    referencias.append(((posterior['dia'] - dia).days, posterior['dia']))
+                _, referencia = min(referencias, key=lambda r: r[0])
+
+                if referencia is None:
+                    # Saldo atual menos tudo o que foi movimentado depois do dia
+                    base, juncao, agrupamento, sinal = "COALESCE(p.qtd_estoque, 0)", "", "", "-"
+                    deltas, params = "d.dia > %s", [dia]
+                else:
+                    base = "COALESCE(f.qtd_estoque, 0)"
+                    juncao = ("LEFT JOIN estoque_fechamentos f "
+                              "ON f.dia = %s AND f.id_produto = p.id_produto")
+                    agrupamento = ", f.qtd_estoque"
+                    if referencia <= dia:
+                        sinal, deltas = "+", "d.dia > %s AND d.dia <= %s"
+                        params = [referencia, referencia, dia]
+                    else:
+                        sinal, deltas = "-", "d.dia > %s AND d.dia <= %s"
+                        params = [referencia, dia, referencia]
+
+                # Só produtos que já existiam ao fim do dia
+                filtro = "p.data_cadastro < %s"
+                params.append(dia + timedelta(days=1))
+                if ids is not None:
+                    filtro += f" AND p.id_produto IN ({', '.join(['%s'] * len(ids))})"
+                    params.extend(ids)
+
+                cursor.execute(f"""
+                    SELECT p.id_produto, p.nome_produto,
+                           {base} {sinal} COALESCE(SUM(
+                               CASE WHEN d.tipo_movimentacao = 'ENTRADA'
+                                    THEN d.quantidade ELSE -d.quantidade END), 0) AS qtd_estoque
+                    FROM produtos p
+                    {juncao}
+                    LEFT JOIN movimentacoes_diarias d
+                           ON d.id_produto = p.id_produto AND {deltas}
+                    WHERE {filtro}
+                    GROUP BY p.id_produto{agrupamento}
+                    ORDER BY p.nome_produto, p.id_produto
+                """, params)
+                produtos = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        for produto in produtos:
+            produto['qtd_estoque'] = int(produto['qtd_estoque'])
+        return produtos
+
+    @staticmethod
+    def _inicio_mes(dia: date, meses: int = 0) -> date:
+        """Primeiro dia do mês de ``dia`` deslocado de ``meses`` meses"""
+        indice = dia.year * 12 + dia.month - 1 + meses
+        return date(indice // 12, indice % 12 + 1, 1)
+
+    @staticmethod
+    def criar_particoes(meses_a_frente: int = 3) -> List[str]:
+        """
+        Garante partições mensais de movimentacoes até ``meses_a_frente`` meses adiante
+
+        Divide a partição final (p_futuro, sem limite) em uma partição por
+        mês, a partir do limite da última existente. Com p_futuro vazia a
+        divisão não copia dados. No SQLite, que não particiona, não faz nada.
+
+        Returns:
+            List[str]: Nomes das partições criadas
+        """
+        backend = DatabaseConfig.get_backend()
+        if not backend.particiona_movimentacoes:
+            return []
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            try:
+                cursor.execute(backend.LIMITES_PARTICOES)
+                limites = [linha['limite'] for linha in cursor.fetchall() if linha['limite']]
+
+                ate = EstoqueModel._inicio_mes(date.today(), meses_a_frente)
+                mes = EstoqueModel._inicio_mes(max(limites).date()) if limites else \
+                    EstoqueModel._inicio_mes(date.today())
+                meses = []
+                while mes <= ate:
+                    meses.append(mes)
+                    mes = EstoqueModel._inicio_mes(mes, 1)
+
+                if meses:
+                    # DDL: confirma sozinho, fora de transação
+                    cursor.execute(backend.dividir_particao_final(meses))
+                return [f"p{mes:%Y%m}" for mes in meses]
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def arquivar_movimentacoes(antes_de: str = None, manter_meses: int = 12,
+                               ao_progredir: Callable[[date, int], None] = None) -> int:
+        """
+        Move para movimentacoes_arquivo as movimentações de meses encerrados
+
+        Sai da tabela principal tudo antes do primeiro dia do mês de
+        ``antes_de`` (padrão: o mês de ``manter_meses`` meses atrás). Cada
+        dia com movimentações é uma transação: INSERT ... SELECT no arquivo
+        e DELETE do mesmo intervalo, os dois restritos à partição do mês.
+        Estoque, resumo diário e fechamentos não mudam (o resumo é mantido
+        por trigger só no INSERT da tabela principal), e os relatórios e
+        ``reconstruir_resumo_diario`` continuam lendo os meses arquivados.
+
+        Args:
+            ao_progredir: Chamado após cada dia com (dia, total arquivado até ali)
+
+        Returns:
+            int: Quantidade de movimentações arquivadas
+
+        Raises:
+            ValueError: Se a data for inválida ou cair no mês corrente
+        """
+        padrao = EstoqueModel._inicio_mes(date.today(), -manter_meses)
+        limite = EstoqueModel._inicio_mes(EstoqueModel._dia(antes_de, padrao))
+        if limite > EstoqueModel._inicio_mes(date.today()):
+            raise ValueError("Só é possível arquivar meses já encerrados")
+        limite = datetime.combine(limite, time.min)
+
+        arquivadas = 0
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+
+            try:
+                while True:
+                    conn.start_transaction()
+                    cursor.execute(InstrucoesSQL.MOVIMENTACAO_MAIS_ANTIGA, (limite,))
+                    linha = cursor.fetchone()
+                    if not linha:
+                        conn.commit()
+                        break
+
+                    dia = linha[0].date()
+                    intervalo = (datetime.combine(dia, time.min),
+                                 min(datetime.combine(dia + timedelta(days=1), time.min), limite))
+                    cursor.execute(InstrucoesSQL.ARQUIVAR_MOVIMENTACOES, intervalo)
+                    copiadas = cursor.rowcount
+                    cursor.execute(InstrucoesSQL.APAGAR_MOVIMENTACOES, intervalo)
+                    if cursor.rowcount != copiadas:
+                        raise Exception(f"Arquivamento de {dia} interrompido: {copiadas} copiadas, "
+                                        f"{cursor.rowcount} apagadas")
+
+                    conn.commit()
+                    arquivadas += copiadas
+                    if ao_progredir:
+                        ao_progredir(dia, arquivadas)
+                return arquivadas
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
@@ -0,0 +1,231 @@
+from functools import lru_cache
+from typing import Dict
+
+
+class InstrucoesSQL:
+    """
+    Registro dos comandos SQL de texto fixo do EstoqueModel, por nome
+
+    Texto fixo permite preparar cada comando uma vez por conexão do pool
+    (``conn.cursor(prepared=True)``) e reaproveitá-lo nas chamadas
+    seguintes. Os comandos montados conforme filtros (paginação,
+    relatórios, UPDATE agrupado do lote) continuam nos próprios métodos.
+    """
+
+    # Produtos
+    LISTAR_PRODUTOS = """
+        SELECT id_produto, nome_produto, descricao,
+               qtd_estoque, qtd_minima, preco_unitario
+        FROM produtos
+        ORDER BY nome_produto, id_produto
+    """
+
+    ULTIMA_ALTERACAO_PRODUTOS = """
+        SELECT atualizado_em AS marca FROM produtos
+        ORDER BY atualizado_em DESC
+        LIMIT 1
+    """
+
+    PRODUTOS_ALTERADOS_DESDE = """
+        SELECT id_produto, nome_produto, descricao,
+               qtd_estoque, qtd_minima, preco_unitario, atualizado_em
+        FROM produtos
+        WHERE atualizado_em >= %s
+        ORDER BY atualizado_em
+        LIMIT %s
+    """
+
+    # Acompanhamento de alterações pela interface: a versão separa o que
+    # mudou do que só foi relido na janela de sobreposição
+    ALTERACOES_PRODUTOS = """
+        SELECT id_produto, nome_produto, descricao,
+               qtd_estoque, qtd_minima, preco_unitario, versao, atualizado_em
+        FROM produtos
+        WHERE atualizado_em >= %s
+        ORDER BY atualizado_em
+        LIMIT %s
+    """
+
+    INSERIR_PRODUTO = """
+        INSERT INTO produtos (nome_produto, descricao, qtd_minima, preco_unitario)
+        VALUES (%s, %s, %s, %s)
+    """
+
+    INSERIR_PRODUTO_COM_SALDO = """
+        INSERT INTO produtos
+        (nome_produto, descricao, qtd_estoque, qtd_minima, preco_unitario)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+
+    CONFERIR_LOTE_PRODUTOS = """
+        SELECT nome_produto, descricao FROM produtos
+        WHERE id_produto BETWEEN %s AND %s
+        ORDER BY id_produto
+        FOR SHARE
+    """
+
+    # Autocompletar: nomes que começam pelo texto (intervalo em idx_produto_nome)
+    BUSCAR_PRODUTOS_POR_NOME = """
+        SELECT id_produto, nome_produto, descricao,
+               qtd_estoque, qtd_minima, preco_unitario
+        FROM produtos
+        WHERE nome_produto LIKE %s ESCAPE '!'
+        ORDER BY nome_produto, id_produto
+        LIMIT %s
+    """
+
+    PRODUTOS_CRITICOS = """
+        SELECT id_produto, nome_produto, qtd_estoque, qtd_minima, deficit
+        FROM produtos
+        WHERE deficit > 0
+        ORDER BY deficit DESC
+    """
+
+    # Estoque: LAST_INSERT_ID(expr) devolve o novo saldo em cursor.lastrowid
+    SOMAR_ESTOQUE = """
+        UPDATE produtos
+        SET qtd_estoque = LAST_INSERT_ID(qtd_estoque + %s)
+        WHERE id_produto = %s
+    """
+
+    BAIXAR_ESTOQUE = """
+        UPDATE produtos
+        SET qtd_estoque = LAST_INSERT_ID(qtd_estoque - %s)
+        WHERE id_produto = %s AND qtd_estoque >= %s
+    """
+
+    CONSULTAR_ESTOQUE = "SELECT qtd_estoque FROM produtos WHERE id_produto = %s"
+
+    # Movimentações
+    INSERIR_MOVIMENTACAO = """
+        INSERT INTO movimentacoes
+        (id_produto, tipo_movimentacao, quantidade, observacao, usuario)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+
+    INSERIR_MOVIMENTACAO_DATADA = """
+        INSERT INTO movimentacoes
+        (id_produto, tipo_movimentacao, quantidade, observacao, usuario, data_movimentacao)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    # Arquivamento: um dia por vez, limitado à partição do mês
+    MOVIMENTACAO_MAIS_ANTIGA = """
+        SELECT data_movimentacao FROM movimentacoes
+        WHERE data_movimentacao < %s
+        ORDER BY data_movimentacao
+        LIMIT 1
+    """
+
+    ARQUIVAR_MOVIMENTACOES = """
+        INSERT INTO movimentacoes_arquivo
+        (id_movimentacao, id_produto, tipo_movimentacao, quantidade,
+         data_movimentacao, observacao, usuario)
+        SELECT id_movimentacao, id_produto, tipo_movimentacao, quantidade,
+               data_movimentacao, observacao, usuario
+        FROM movimentacoes
+        WHERE data_movimentacao >= %s AND data_movimentacao < %s
+    """
+
+    APAGAR_MOVIMENTACOES = """
+        DELETE FROM movimentacoes
+        WHERE data_movimentacao >= %s AND data_movimentacao < %s
+    """
+
+    ULTIMA_ARQUIVADA = """
+        SELECT data_movimentacao FROM movimentacoes_arquivo
+        ORDER BY data_movimentacao DESC
+        LIMIT 1
+    """
+
+    # Diários locais de movimentações
+    TRAVAR_ORIGEM_DIARIO = """
+        SELECT ultima_seq FROM diario_origens
+        WHERE origem = %s
+        FOR UPDATE
+    """
+
+    INSERIR_ORIGEM_DIARIO = """
+        INSERT INTO diario_origens (origem, ultima_seq) VALUES (%s, %s)
+    """
+
+    ATUALIZAR_ORIGEM_DIARIO = """
+        UPDATE diario_origens SET ultima_seq = %s, atualizado_em = CURRENT_TIMESTAMP
+        WHERE origem = %s
+    """
+
+    # Fechamentos de estoque
+    APAGAR_FECHAMENTO = "DELETE FROM estoque_fechamentos WHERE dia = %s"
+
+    SALDOS_FECHAMENTO = """
+        SELECT p.id_produto,
+               COALESCE(p.qtd_estoque, 0) - COALESCE(SUM(
+                   CASE WHEN d.tipo_movimentacao = 'ENTRADA'
+                        THEN d.quantidade ELSE -d.quantidade END), 0)
+        FROM produtos p
+        LEFT JOIN movimentacoes_diarias d
+               ON d.id_produto = p.id_produto AND d.dia > %s
+        WHERE p.id_produto > %s
+        GROUP BY p.id_produto
+        ORDER BY p.id_produto
+        LIMIT %s
+    """
+
+    INSERIR_FECHAMENTO = """
+        INSERT INTO estoque_fechamentos (dia, id_produto, qtd_estoque)
+        VALUES (%s, %s, %s)
+    """
+
+    AJUSTAR_FECHAMENTOS = """
+        UPDATE estoque_fechamentos SET qtd_estoque = qtd_estoque + %s
+        WHERE dia >= %s AND id_produto = %s
+    """
+
+    FECHAMENTO_ANTERIOR = """
+        SELECT dia FROM estoque_fechamentos WHERE dia <= %s
+        ORDER BY dia DESC
+        LIMIT 1
+    """
+
+    FECHAMENTO_POSTERIOR = """
+        SELECT dia FROM estoque_fechamentos WHERE dia > %s
+        ORDER BY dia
+        LIMIT 1
+    """
+
+    # Maior lista IN de busca por id com texto fixo (potências de 2 até aqui)
+    MAX_BUSCA_PREPARADA = 256
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def buscar_produtos(quantidade: int) -> str:
+        """Busca por lista de ids com ``quantidade`` marcadores"""
+        marcadores = ", ".join(["%s"] * quantidade)
+        return f"""
+            SELECT id_produto, nome_produto, descricao,
+                   qtd_estoque, qtd_minima, preco_unitario
+            FROM produtos
+            WHERE id_produto IN ({marcadores})
+        """
+
+    @staticmethod
+    def tamanho_busca(quantidade: int) -> int:
+        """
+        Tamanho da lista IN usada para ``quantidade`` ids
+
+        Até ``MAX_BUSCA_PREPARADA`` a lista é arredondada para a potência de
+        2 seguinte (completada repetindo um id), então poucas variações de
+        texto cobrem todas as buscas e cada uma é preparada uma vez.
+        """
+        if quantidade > InstrucoesSQL.MAX_BUSCA_PREPARADA:
+            return quantidade
+        tamanho = 1
+        while tamanho < quantidade:
+            tamanho *= 2
+        return tamanho
+
+    @classmethod
+    def todas(cls) -> Dict[str, str]:
+        """Comandos registrados, por nome"""
+        return {nome: sql for nome, sql in vars(cls).items()
+                if nome.isupper() and isinstance(sql, str)}
@@ -0,0 +1,105 @@
+import keyword
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Tuple
+
+
+class Linha(Mapping):
+    """
+    Linha de resultado compacta: colunas em ``__slots__``, sem dict por linha
+
+    Cada conjunto de colunas ganha uma subclasse própria (``tipo_linha``).
+    Além dos atributos (``linha.nome_produto``), aceita o acesso dos dicts
+    usado pela view, pelo controller e pelo cache (``linha['qtd_estoque']``,
+    atribuição, ``get``, ``keys``, ``items``, ``copy``), então quem consome
+    as linhas não precisa saber qual representação recebeu.
+    """
+
+    __slots__ = ()
+    colunas: Tuple[str, ...] = ()
+
+    def __getitem__(self, coluna):
+        if coluna in self.colunas:
+            return getattr(self, coluna)
+        raise KeyError(coluna)
+
+    def __setitem__(self, coluna, valor):
+        if coluna not in self.colunas:
+            raise KeyError(coluna)
+        setattr(self, coluna, valor)
+
+    def __iter__(self):
+        return iter(self.colunas)
+
+    def __len__(self):
+        return len(self.colunas)
+
+    def copy(self) -> 'Linha':
+        return type(self)(*(getattr(self, coluna) for coluna in self.colunas))
+
+    def __repr__(self):
+        campos = ", ".join(f"{coluna}={getattr(self, coluna)!r}" for coluna in self.colunas)
+        return f"Linha({campos})"
+
+
+@lru_cache(maxsize=256)
+def tipo_linha(colunas: Tuple[str, ...]) -> type:
+    """
+    Classe de linha compacta para as ``colunas`` de um resultado
+
+    O ``__init__`` recebe os valores na ordem das colunas e é gerado como
+    código (como faz o ``namedtuple``), para construir cada linha sem laço.
+
+    Raises:
+        ValueError: Se alguma coluna não puder ser atributo
+    """
+    for coluna in colunas:
+        if not coluna.isidentifier() or keyword.iskeyword(coluna) or hasattr(Linha, coluna):
+            raise ValueError(f"Coluna sem nome utilizável em linha compacta: {coluna!r}")
+    if len(set(colunas)) != len(colunas):
+        raise ValueError(f"Colunas repetidas: {colunas}")
+
+    corpo = "".join(f"\n    self.{coluna} = {coluna}" for coluna in colunas) or "\n    pass"
+    definicao = {}
+    exec(f"def __init__(self, {', '.join(colunas)}):{corpo}", definicao)
+    return type("Linha", (Linha,), {'__slots__': colunas, 'colunas': colunas,
+                                    '__init__': definicao['__init__']})
+
+
+class CursorLinhas:
+    """
+    Cursor de tuplas que entrega as linhas como ``Linha``
+
+    Envolve um cursor comum (sem ``dictionary``) da conexão; o resto da
+    interface é repassado a ele.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _tipo(self) -> type:
+        return tipo_linha(tuple(d[0] for d in self._cursor.description))
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        return None if linha is None else self._tipo()(*linha)
+
+    def fetchmany(self, size: int = 1):
+        linhas = self._cursor.fetchmany(size)
+        if not linhas:
+            return []
+        tipo = self._tipo()
+        return [tipo(*linha) for linha in linhas]
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        if not linhas:
+            return []
+        tipo = self._tipo()
+        return [tipo(*linha) for linha in linhas]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
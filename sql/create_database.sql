@@ -10,25 +10,120 @@ CREATE TABLE IF NOT EXISTS produtos (
     qtd_estoque INT DEFAULT 0,
     qtd_minima INT DEFAULT 10,
     preco_unitario DECIMAL(10,2),
-    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    -- Versão da linha, somada a cada alteração (trg_produtos_versao)
+    versao BIGINT NOT NULL DEFAULT 0,
+    -- Mantida pelo próprio MySQL a cada escrita; > 0 significa estoque crítico
+    deficit INT AS (qtd_minima - qtd_estoque) STORED,
+    -- Busca por palavras da descrição no autocompletar de produtos
+    FULLTEXT INDEX ft_produto_descricao (descricao)
 );
 
--- Tabela de movimentações
+-- Clientes acompanham alterações pela dupla (atualizado_em, versao): a
+-- versão distingue o que mudou do que só foi relido na janela de sobreposição
+CREATE TRIGGER trg_produtos_versao BEFORE UPDATE ON produtos
+FOR EACH ROW SET NEW.versao = OLD.versao + 1;
+
+-- Tabela de movimentações, particionada por mês de data_movimentacao
+-- Filtros de período sobre a coluna nua (intervalo semiaberto, sem DATE())
+-- só leem as partições do intervalo. Tabela particionada não aceita chave
+-- estrangeira e toda chave única precisa conter a coluna de particionamento:
+-- a existência do produto é garantida pelo modelo, que altera (e trava) a
+-- linha do produto na mesma transação em que grava a movimentação.
+-- Partições dos meses seguintes: python cli.py particoes (divide p_futuro)
 CREATE TABLE IF NOT EXISTS movimentacoes (
-    id_movimentacao INT AUTO_INCREMENT PRIMARY KEY,
+    id_movimentacao INT AUTO_INCREMENT,
+    id_produto INT,
+    tipo_movimentacao ENUM('ENTRADA', 'SAIDA') NOT NULL,
+    quantidade INT NOT NULL,
+    data_movimentacao TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    observacao TEXT,
+    usuario VARCHAR(50),
+    PRIMARY KEY (id_movimentacao, data_movimentacao)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(data_movimentacao)) (
+    PARTITION p_anteriores VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- Movimentações de meses encerrados, movidas pelo arquivamento
+-- (python cli.py arquivar); estoque e resumo diário não mudam
+CREATE TABLE IF NOT EXISTS movimentacoes_arquivo (
+    id_movimentacao INT PRIMARY KEY,
     id_produto INT,
     tipo_movimentacao ENUM('ENTRADA', 'SAIDA') NOT NULL,
     quantidade INT NOT NULL,
-    data_movimentacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_movimentacao TIMESTAMP NOT NULL,
     observacao TEXT,
     usuario VARCHAR(50),
-    FOREIGN KEY (id_produto) REFERENCES produtos(id_produto)
+    INDEX idx_arquivo_data (data_movimentacao)
+) ROW_FORMAT=COMPRESSED;
+
+-- Resumo diário de movimentações (uma linha por dia, produto e tipo)
+-- Relatórios por período somam dias em vez de percorrer movimentações
+CREATE TABLE IF NOT EXISTS movimentacoes_diarias (
+    dia DATE NOT NULL,
+    id_produto INT NOT NULL,
+    tipo_movimentacao ENUM('ENTRADA', 'SAIDA') NOT NULL,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    qtd_movimentacoes INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, id_produto, tipo_movimentacao),
+    INDEX idx_diarias_produto (id_produto, dia)
+);
+
+-- Mantém o resumo na mesma transação de qualquer INSERT em movimentacoes
+-- (entrada, saída, lote e importação), sem depender de cada chamador
+CREATE TRIGGER trg_movimentacoes_diarias AFTER INSERT ON movimentacoes
+FOR EACH ROW
+    INSERT INTO movimentacoes_diarias
+        (dia, id_produto, tipo_movimentacao, quantidade, qtd_movimentacoes)
+    VALUES (DATE(NEW.data_movimentacao), NEW.id_produto, NEW.tipo_movimentacao, NEW.quantidade, 1)
+    ON DUPLICATE KEY UPDATE
+        quantidade = quantidade + NEW.quantidade,
+        qtd_movimentacoes = qtd_movimentacoes + 1;
+
+-- Fechamentos de estoque: saldo de cada produto ao fim do dia
+-- O estoque em uma data passada parte do fechamento mais próximo e soma
+-- (ou desconta) só os dias entre os dois no resumo diário
+CREATE TABLE IF NOT EXISTS estoque_fechamentos (
+    dia DATE NOT NULL,
+    id_produto INT NOT NULL,
+    qtd_estoque INT NOT NULL,
+    PRIMARY KEY (dia, id_produto)
+);
+
+-- Diários locais de movimentações: maior sequência já aplicada de cada origem
+-- (gravada na mesma transação das movimentações, garante aplicação única)
+CREATE TABLE IF NOT EXISTS diario_origens (
+    origem CHAR(32) PRIMARY KEY,
+    ultima_seq BIGINT NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
 
 -- Índices para performance
-CREATE INDEX idx_produto_mov ON movimentacoes(id_produto);
-CREATE INDEX idx_tipo_mov ON movimentacoes(tipo_movimentacao);
+-- (id_produto, data): histórico por produto em ordem de data
+CREATE INDEX idx_mov_produto_data ON movimentacoes(id_produto, data_movimentacao);
+-- data: relatórios por período (filtros em intervalo semiaberto, sem DATE())
 CREATE INDEX idx_data_mov ON movimentacoes(data_movimentacao);
+-- (nome, id): listagem paginada por chave
+CREATE INDEX idx_produto_nome ON produtos(nome_produto, id_produto);
+-- atualizado_em: revalidação do cache e acompanhamento de alterações (alterados desde a marca)
+CREATE INDEX idx_produto_atualizado ON produtos(atualizado_em);
+-- deficit: lista de alertas como leitura de intervalo do índice
+CREATE INDEX idx_produto_deficit ON produtos(deficit);
 
 -- Inserir dados de exemplo
 INSERT INTO produtos (nome_produto, descricao, qtd_estoque, qtd_minima, preco_unitario) VALUES
@@ -0,0 +1,127 @@
+-- Esquema do backend SQLite (DB_BACKEND=sqlite)
+-- Mesmas tabelas, colunas e índices de create_database.sql, no dialeto do SQLite.
+-- É aplicado automaticamente na primeira conexão a um arquivo vazio.
+
+-- Tabela de produtos
+CREATE TABLE IF NOT EXISTS produtos (
+    id_produto INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_produto VARCHAR(100) NOT NULL COLLATE NOCASE,
+    descricao TEXT,
+    qtd_estoque INTEGER DEFAULT 0,
+    qtd_minima INTEGER DEFAULT 10,
+    preco_unitario DECIMAL(10,2),
+    data_cadastro TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')),
+    atualizado_em TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+    versao INTEGER NOT NULL DEFAULT 0,
+    -- Mantida pelo próprio SQLite a cada escrita; > 0 significa estoque crítico
+    deficit INTEGER GENERATED ALWAYS AS (qtd_minima - qtd_estoque) STORED
+);
+
+-- Equivalente ao ON UPDATE CURRENT_TIMESTAMP e a trg_produtos_versao do MySQL
+-- (um só UPDATE aninhado; substitui o antigo trg_produtos_atualizado_em)
+DROP TRIGGER IF EXISTS trg_produtos_atualizado_em;
+CREATE TRIGGER IF NOT EXISTS trg_produtos_versao AFTER UPDATE ON produtos
+FOR EACH ROW WHEN NEW.versao IS OLD.versao
+BEGIN
+    UPDATE produtos SET versao = OLD.versao + 1,
+        atualizado_em = CASE WHEN NEW.atualizado_em IS OLD.atualizado_em
+                             THEN strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
+                             ELSE NEW.atualizado_em END
+    WHERE id_produto = NEW.id_produto;
+END;
+
+-- Busca por palavras da descrição (equivalente ao FULLTEXT do MySQL)
+CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+    descricao, content='produtos', content_rowid='id_produto',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_inserir AFTER INSERT ON produtos
+BEGIN
+    INSERT INTO produtos_fts (rowid, descricao) VALUES (NEW.id_produto, NEW.descricao);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_excluir AFTER DELETE ON produtos
+BEGIN
+    INSERT INTO produtos_fts (produtos_fts, rowid, descricao) VALUES ('delete', OLD.id_produto, OLD.descricao);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_produtos_fts_alterar AFTER UPDATE OF descricao ON produtos
+BEGIN
+    INSERT INTO produtos_fts (produtos_fts, rowid, descricao) VALUES ('delete', OLD.id_produto, OLD.descricao);
+    INSERT INTO produtos_fts (rowid, descricao) VALUES (NEW.id_produto, NEW.descricao);
+END;
+
+-- Tabela de movimentações
+CREATE TABLE IF NOT EXISTS movimentacoes (
+    id_movimentacao INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_produto INTEGER REFERENCES produtos(id_produto),
+    tipo_movimentacao TEXT NOT NULL CHECK (tipo_movimentacao IN ('ENTRADA', 'SAIDA')),
+    quantidade INTEGER NOT NULL,
+    data_movimentacao TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')),
+    observacao TEXT,
+    usuario VARCHAR(50)
+);
+
+-- Movimentações de meses encerrados, movidas pelo arquivamento
+-- (o SQLite não particiona; a tabela principal só encolhe)
+CREATE TABLE IF NOT EXISTS movimentacoes_arquivo (
+    id_movimentacao INTEGER PRIMARY KEY,
+    id_produto INTEGER,
+    tipo_movimentacao TEXT NOT NULL CHECK (tipo_movimentacao IN ('ENTRADA', 'SAIDA')),
+    quantidade INTEGER NOT NULL,
+    data_movimentacao TIMESTAMP NOT NULL,
+    observacao TEXT,
+    usuario VARCHAR(50)
+);
+
+-- Resumo diário de movimentações (uma linha por dia, produto e tipo)
+CREATE TABLE IF NOT EXISTS movimentacoes_diarias (
+    dia DATE NOT NULL,
+    id_produto INTEGER NOT NULL,
+    tipo_movimentacao TEXT NOT NULL CHECK (tipo_movimentacao IN ('ENTRADA', 'SAIDA')),
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    qtd_movimentacoes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, id_produto, tipo_movimentacao)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_diarias AFTER INSERT ON movimentacoes
+FOR EACH ROW
+BEGIN
+    INSERT INTO movimentacoes_diarias
+        (dia, id_produto, tipo_movimentacao, quantidade, qtd_movimentacoes)
+    VALUES (DATE(NEW.data_movimentacao), NEW.id_produto, NEW.tipo_movimentacao, NEW.quantidade, 1)
+    ON CONFLICT (dia, id_produto, tipo_movimentacao) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        qtd_movimentacoes = qtd_movimentacoes + 1;
+END;
+
+-- Fechamentos de estoque: saldo de cada produto ao fim do dia
+CREATE TABLE IF NOT EXISTS estoque_fechamentos (
+    dia DATE NOT NULL,
+    id_produto INTEGER NOT NULL,
+    qtd_estoque INTEGER NOT NULL,
+    PRIMARY KEY (dia, id_produto)
+) WITHOUT ROWID;
+
+-- Diários locais de movimentações: maior sequência já aplicada de cada origem
+CREATE TABLE IF NOT EXISTS diario_origens (
+    origem CHAR(32) PRIMARY KEY,
+    ultima_seq INTEGER NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+-- Índices (os mesmos do MySQL)
+CREATE INDEX IF NOT EXISTS idx_mov_produto_data ON movimentacoes(id_produto, data_movimentacao);
+CREATE INDEX IF NOT EXISTS idx_data_mov ON movimentacoes(data_movimentacao);
+CREATE INDEX IF NOT EXISTS idx_arquivo_data ON movimentacoes_arquivo(data_movimentacao);
+CREATE INDEX IF NOT EXISTS idx_produto_nome ON produtos(nome_produto, id_produto);
+CREATE INDEX IF NOT EXISTS idx_produto_atualizado ON produtos(atualizado_em);
+CREATE INDEX IF NOT EXISTS idx_produto_deficit ON produtos(deficit);
+CREATE INDEX IF NOT EXISTS idx_diarias_produto ON movimentacoes_diarias(id_produto, dia);
+
+-- Inserir dados de exemplo
+INSERT INTO produtos (nome_produto, descricao, qtd_estoque, qtd_minima, preco_unitario) VALUES
+('Parafuso M6', 'Parafuso métrico 6mm', 50, 100, 0.25),
+('Arruela Lisa', 'Arruela lisa galvanizada', 30, 200, 0.10),
+('Porca M6', 'Porca sextavada M6', 45, 150, 0.15);
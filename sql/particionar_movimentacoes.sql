@@ -0,0 +1,33 @@
+-- Converte a tabela movimentacoes de um banco criado antes do
+-- particionamento para partições mensais (MySQL). A tabela é reescrita:
+-- rode em janela de manutenção, com backup.
+USE sistema_estoque;
+
+-- Tabela particionada não aceita chave estrangeira; o nome gerado pelo
+-- MySQL costuma ser este (confira com SHOW CREATE TABLE movimentacoes)
+ALTER TABLE movimentacoes DROP FOREIGN KEY movimentacoes_ibfk_1;
+
+-- A coluna de particionamento precisa fazer parte da chave primária
+ALTER TABLE movimentacoes
+    MODIFY data_movimentacao TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id_movimentacao, data_movimentacao);
+
+-- Tudo antes do limite de p_anteriores fica em uma partição só; os meses
+-- seguintes ganham partição própria com: python cli.py particoes
+ALTER TABLE movimentacoes
+PARTITION BY RANGE (UNIX_TIMESTAMP(data_movimentacao)) (
+    PARTITION p_anteriores VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE IF NOT EXISTS movimentacoes_arquivo (
+    id_movimentacao INT PRIMARY KEY,
+    id_produto INT,
+    tipo_movimentacao ENUM('ENTRADA', 'SAIDA') NOT NULL,
+    quantidade INT NOT NULL,
+    data_movimentacao TIMESTAMP NOT NULL,
+    observacao TEXT,
+    usuario VARCHAR(50),
+    INDEX idx_arquivo_data (data_movimentacao)
+) ROW_FORMAT=COMPRESSED;
@@ -0,0 +1,197 @@
+import unittest
+import sys
+import os
+import asyncio
+import http.client
+import json
+import threading
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.protocolo import ServidorHTTP
+from api.servidor import ServicoEstoque, _FormatadorLinhas
+from config.database import DatabaseConfig
+from models.estoque_model import EstoqueModel
+
+
+class TestAPI(unittest.TestCase):
+    """Testes da API HTTP contra uma instância local em porta livre"""
+
+    @classmethod
+    def setUpClass(cls):
+        print("\n🌐 Iniciando testes da API...")
+        assert DatabaseConfig.test_connection(), "Falha na conexão com banco de dados"
+
+        cls.loop = asyncio.new_event_loop()
+        pronto = threading.Event()
+
+        async def subir():
+            cls.servico = ServicoEstoque(workers=2, fila=8)
+            cls.servidor = ServidorHTTP(cls.servico.despachar, "127.0.0.1", 0)
+            await cls.servidor.iniciar()
+            pronto.set()
+
+        def rodar():
+            asyncio.set_event_loop(cls.loop)
+            cls.loop.run_until_complete(subir())
+            cls.loop.run_forever()
+
+        cls.thread = threading.Thread(target=rodar, daemon=True)
+        cls.thread.start()
+        pronto.wait(10)
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.servidor.fechar(), cls.loop).result(10)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(10)
+        cls.servico.encerrar()
+
+    def _requisitar(self, metodo: str, caminho: str, corpo=None):
+        conexao = http.client.HTTPConnection("127.0.0.1", self.servidor.porta, timeout=10)
+        try:
+            dados = json.dumps(corpo) if corpo is not None else None
+            conexao.request(metodo, caminho, body=dados, headers={'Content-Type': 'application/json'})
+            resposta = conexao.getresponse()
+            return resposta.status, resposta.getheader('Content-Type'), resposta.read()
+        finally:
+            conexao.close()
+
+    def _novo_produto(self, nome: str) -> int:
+        status, _, corpo = self._requisitar('POST', "/produtos", {
+            'nome_produto': nome, 'descricao': "API", 'qtd_minima': 5, 'preco_unitario': 2.5})
+        self.assertEqual(status, 201)
+        return json.loads(corpo)['id_produto']
+
+    def test_01_saude_e_rotas(self):
+        """Saúde do serviço, rota inexistente e método não permitido"""
+        status, _, corpo = self._requisitar('GET', "/saude")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(corpo)['status'], 'ok')
+
+        self.assertEqual(self._requisitar('GET', "/inexistente")[0], 404)
+        self.assertEqual(self._requisitar('DELETE', "/produtos")[0], 405)
+
+    def test_02_produto_e_movimentacoes(self):
+        """Cadastro, entrada, saída e recusa por estoque insuficiente"""
+        id_produto = self._novo_produto("Produto API Movimentação")
+
+        status, _, corpo = self._requisitar('GET', f"/produtos/{id_produto}")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(corpo)['nome_produto'], "Produto API Movimentação")
+
+        status, _, corpo = self._requisitar('POST', "/movimentacoes", {
+            'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 10})
+        self.assertEqual(status, 201)
+        self.assertEqual(json.loads(corpo)['qtd_estoque'], 10)
+
+        status, _, corpo = self._requisitar('POST', "/movimentacoes", {
+            'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 11})
+        self.assertEqual(status, 409)
+        self.assertIn("Estoque insuficiente", json.loads(corpo)['erro'])
+
+        status, _, _ = self._requisitar('POST', "/movimentacoes", {
+            'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 0})
+        self.assertEqual(status, 400)
+
+        self.assertEqual(self._requisitar('GET', "/produtos/999999999")[0], 404)
+
+    def test_03_lote_atomico(self):
+        """Lote com linha inválida é recusado inteiro, com os erros por linha"""
+        id_produto = self._novo_produto("Produto API Lote")
+        status, _, corpo = self._requisitar('POST', "/movimentacoes", {'movimentacoes': [
+            {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 3},
+            {'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 50},
+        ]})
+        self.assertEqual(status, 422)
+        self.assertEqual(json.loads(corpo)['erros'][0]['linha'], 2)
+
+        _, _, corpo = self._requisitar('GET', f"/produtos/{id_produto}")
+        self.assertEqual(json.loads(corpo)['qtd_estoque'], 0)
+
+    def test_04_relatorio_em_fluxo(self):
+        """Relatório de movimentações sai em JSON Lines (chunked) e valida datas"""
+        id_produto = self._novo_produto("Produto API Relatório")
+        self._requisitar('POST', "/movimentacoes", {
+            'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 4})
+
+        hoje = date.today().isoformat()
+        status, tipo, corpo = self._requisitar('GET', f"/relatorios/movimentacoes?inicio={hoje}&fim={hoje}")
+        self.assertEqual(status, 200)
+        self.assertTrue(tipo.startswith("application/x-ndjson"))
+        linhas = [json.loads(l) for l in corpo.decode('utf-8').splitlines()]
+        self.assertIn(id_produto, {l['id_produto'] for l in linhas})
+
+        self.assertEqual(self._requisitar('GET', "/relatorios/movimentacoes?inicio=31/12/2024")[0], 400)
+
+        status, _, corpo = self._requisitar('GET', f"/relatorios/estoque-em?data={hoje}&ids={id_produto}")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(corpo)[0]['qtd_estoque'], 4)
+
+    def test_05_fluxos_nao_esgotam_pool(self):
+        """Com os fluxos abertos, ``workers`` chamadas simultâneas ainda obtêm conexão"""
+        id_produto = self._novo_produto("Produto API Fluxos")
+        for _ in range(2):
+            EstoqueModel.registrar_entrada(id_produto, 1, "API", "teste_api")
+        hoje = date.today().isoformat()
+
+        pool = DatabaseConfig.get_pool()
+        timeout_original, pool.timeout = pool.timeout, 1.0
+
+        async def cenario():
+            servico = ServicoEstoque()
+            servico.LINHAS_POR_PARTE = 1
+            self.assertLessEqual(servico.workers + servico.max_fluxos, pool.tamanho)
+            barreira = threading.Barrier(servico.workers, timeout=5)
+
+            def segurar_conexao():
+                with DatabaseConfig.conexao():
+                    barreira.wait()
+
+            # Cada fluxo entrega a primeira parte e fica com o cursor aberto
+            fluxos = [servico._fluxo(lambda: EstoqueModel.iterar_movimentacoes(hoje, hoje),
+                                     _FormatadorLinhas('jsonl'))
+                      for _ in range(servico.max_fluxos)]
+            try:
+                for fluxo in fluxos:
+                    self.assertTrue(await fluxo.__anext__())
+                return await asyncio.gather(
+                    *[servico._executar(segurar_conexao) for _ in range(servico.workers)],
+                    return_exceptions=True)
+            finally:
+                for fluxo in fluxos:
+                    await fluxo.aclose()
+                servico.encerrar()
+
+        try:
+            resultados = asyncio.run(cenario())
+        finally:
+            pool.timeout = timeout_original
+        self.assertEqual(resultados, [None] * len(resultados))
+
+    def test_06_lote_itens_invalidos(self):
+        """Itens malformados no lote viram 422 por linha; campos extras são ignorados"""
+        id_produto = self._novo_produto("Produto API Lote Validado")
+        status, _, corpo = self._requisitar('POST', "/movimentacoes", {'movimentacoes': [
+            {'tipo_movimentacao': 'ENTRADA', 'quantidade': 1},
+            "ENTRADA",
+            {'id_produto': "abc", 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1},
+            {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1},
+            {'id_produto': id_produto, 'tipo_movimentacao': 'TROCA', 'quantidade': 1},
+        ]})
+        self.assertEqual(status, 422)
+        self.assertEqual([e['linha'] for e in json.loads(corpo)['erros']], [1, 2, 3, 5])
+
+        status, _, corpo = self._requisitar('POST', "/movimentacoes", {'movimentacoes': [
+            {'id_produto': str(id_produto), 'tipo_movimentacao': 'entrada', 'quantidade': 2,
+             'data_movimentacao': "2001-01-01 00:00:00", 'usuario': "intruso"},
+        ]})
+        self.assertEqual((status, json.loads(corpo)), (201, {'registradas': 1}))
+        movimentacoes = [m for m in EstoqueModel.iterar_movimentacoes(date.today().isoformat(),
+                                                                      date.today().isoformat())
+                         if m['id_produto'] == id_produto]
+        self.assertEqual([(m['quantidade'], m['usuario']) for m in movimentacoes], [(2, "api")])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
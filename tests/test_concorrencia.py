@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+class TestConcorrencia(unittest.TestCase):
+    """Teste de estresse - saídas concorrentes no mesmo produto"""
+    
+    THREADS = 8
+    SAIDAS_POR_THREAD = 50
+    ESTOQUE_INICIAL = 250
+    
+    def _saldo_razao(self, id_produto: int) -> int:
+        """Saldo calculado a partir do razão de movimentações"""
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(CASE tipo_movimentacao
+                                        WHEN 'ENTRADA' THEN quantidade
+                                        ELSE -quantidade END), 0)
+                    FROM movimentacoes
+                    WHERE id_produto = %s
+                """, (id_produto,))
+                return int(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+    
+    def test_saidas_concorrentes_nao_vendem_a_mais(self):
+        """Várias threads disputando o mesmo produto nunca deixam estoque negativo"""
+        print("\n🔥 Testando saídas concorrentes em produto quente...")
+        
+        id_produto = EstoqueModel.adicionar_produto(
+            nome="Produto Concorrência",
+            descricao="Teste de estresse de saídas",
+            qtd_minima=0,
+            preco=1.00
+        )
+        EstoqueModel.registrar_entrada(id_produto, self.ESTOQUE_INICIAL,
+                                       "Carga inicial", "teste_concorrencia")
+        
+        sucessos = []
+        recusas = []
+        erros_inesperados = []
+        lock = threading.Lock()
+        barreira = threading.Barrier(self.THREADS)
+        
+        def operador(numero: int):
+            barreira.wait()
+            for _ in range(self.SAIDAS_POR_THREAD):
+                try:
+                    EstoqueModel.registrar_saida(id_produto, 1, "Estresse",
+                                                 f"operador_{numero}")
+                    with lock:
+                        sucessos.append(numero)
+                except Exception as e:
+                    with lock:
+                        if "insuficiente" in str(e).lower():
+                            recusas.append(numero)
+                        else:
+                            erros_inesperados.append(e)
+        
+        threads = [threading.Thread(target=operador, args=(n,)) for n in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(erros_inesperados, [])
+        self.assertEqual(len(sucessos), self.ESTOQUE_INICIAL)
+        self.assertEqual(len(recusas), self.THREADS * self.SAIDAS_POR_THREAD - self.ESTOQUE_INICIAL)
+        
+        produto = next(p for p in EstoqueModel.listar_produtos() if p['id_produto'] == id_produto)
+        self.assertEqual(produto['qtd_estoque'], 0)
+        self.assertEqual(produto['qtd_estoque'], self._saldo_razao(id_produto))
+        print(f"   ✅ {len(sucessos)} saídas aceitas, {len(recusas)} recusadas, estoque final 0")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.estoque_model import EstoqueModel
+from models.diario_movimentacoes import DiarioMovimentacoes
+from config.database import DatabaseConfig
+
+
+class TestDiarioMovimentacoes(unittest.TestCase):
+    """Testes do diário local de movimentações (gravação, envio e recuperação)"""
+
+    @classmethod
+    def setUpClass(cls):
+        print("\n📝 Iniciando testes do diário de movimentações...")
+        assert DatabaseConfig.test_connection(), "Falha na conexão com banco de dados"
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.pasta, "diario.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _estoque(self, id_produto: int) -> int:
+        EstoqueModel.cache.invalidar([id_produto])
+        return EstoqueModel.obter_produto(id_produto)['qtd_estoque']
+
+    def _fechamentos(self, id_produto: int) -> dict:
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT dia, qtd_estoque FROM estoque_fechamentos WHERE id_produto = %s",
+                               (id_produto,))
+                return {str(dia): qtd for dia, qtd in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+    def test_envio_em_lote(self):
+        """Movimentações confirmadas pelo diário chegam ao banco em lote"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Diário Lote", "Diário", 5, 1.0)
+        diario = DiarioMovimentacoes(self.caminho, tamanho_lote=10, intervalo_ms=50)
+        try:
+            for _ in range(25):
+                diario.registrar(id_produto, 'ENTRADA', 2, "diário", "teste")
+            diario.registrar(id_produto, 'SAIDA', 5, "diário", "teste")
+            self.assertTrue(diario.aguardar(10))
+        finally:
+            self.assertEqual(diario.fechar(), 0)
+
+        self.assertEqual(self._estoque(id_produto), 45)
+        estatisticas = diario.estatisticas()
+        self.assertEqual(estatisticas['aplicadas'], 26)
+        self.assertGreaterEqual(estatisticas['lotes'], 3)
+
+        with self.assertRaises(ValueError):
+            diario.registrar(id_produto, 'ENTRADA', 0)
+
+    def test_reenvio_apos_queda_nao_duplica(self):
+        """Queda entre o commit e o checkpoint: reabrir reenvia e o banco descarta"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Diário Queda", "Diário", 5, 1.0)
+
+        # Sem thread de envio: simula o processo que caiu antes de enviar
+        diario = DiarioMovimentacoes(self.caminho, iniciar_envio=False)
+        for _ in range(3):
+            diario.registrar(id_produto, 'ENTRADA', 4)
+        diario.fechar()
+
+        # O lote chegou ao banco, mas o checkpoint local não foi gravado
+        with open(self.caminho, encoding='utf-8') as f:
+            linhas = [json.loads(l) for l in f]
+        origem = linhas[0]['origem']
+        EstoqueModel.aplicar_diario(origem, linhas[1:3])
+        self.assertEqual(self._estoque(id_produto), 8)
+
+        # Última linha cortada no meio da escrita
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 4, "id_produto": ')
+
+        diario = DiarioMovimentacoes(self.caminho, intervalo_ms=10)
+        try:
+            self.assertEqual(diario.origem, origem)
+            self.assertTrue(diario.aguardar(10))
+            self.assertEqual(diario.registrar(id_produto, 'ENTRADA', 1), 4)
+            self.assertTrue(diario.aguardar(10))
+        finally:
+            diario.fechar()
+
+        self.assertEqual(self._estoque(id_produto), 13)
+
+    def test_recusa_nao_trava_a_fila(self):
+        """Saída sem estoque é recusada e as demais do lote são aplicadas"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Diário Recusa", "Diário", 5, 1.0)
+        diario = DiarioMovimentacoes(self.caminho, tamanho_lote=3, intervalo_ms=1000)
+        try:
+            diario.registrar(id_produto, 'ENTRADA', 3)
+            diario.registrar(id_produto, 'SAIDA', 10)
+            diario.registrar(id_produto, 'SAIDA', 2)
+            self.assertTrue(diario.aguardar(10))
+        finally:
+            diario.fechar()
+
+        self.assertEqual(self._estoque(id_produto), 1)
+        ids, recusas = diario.retirar_eventos()
+        self.assertEqual(ids, {id_produto})
+        self.assertEqual([r['seq'] for r, _ in recusas], [2])
+        self.assertIn("Estoque insuficiente", recusas[0][1])
+        self.assertTrue(os.path.exists(self.caminho + ".recusadas"))
+
+    def test_atrasada_corrige_fechamentos(self):
+        """Movimentação de um dia já fechado entra nos fechamentos desse dia em diante"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Diário Atrasado", "Diário", 5, 1.0)
+        EstoqueModel.registrar_entrada(id_produto, 10, "hoje", "teste")
+        dias = [date.today() - timedelta(days=n) for n in (3, 2, 1)]
+        for dia in dias:
+            EstoqueModel.registrar_fechamento(dia.isoformat())
+
+        # Registrada anteontem ao meio-dia num posto que ficou sem banco
+        EstoqueModel.aplicar_diario(uuid.uuid4().hex, [
+            {'seq': 1, 'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 4,
+             'data_movimentacao': datetime.combine(dias[1], time(12))},
+        ])
+
+        self.assertEqual(self._fechamentos(id_produto),
+                         {str(dias[0]): 0, str(dias[1]): 4, str(dias[2]): 4})
+        self.assertEqual(self._estoque(id_produto), 14)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,12 +1,18 @@
 import unittest
 import sys
 import os
+import uuid
+from datetime import date, datetime, timedelta
 
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models.estoque_model import EstoqueModel
+from models.estoque_model import EstoqueModel, MovimentacaoLoteError
 from config.database import DatabaseConfig
+from controllers.busca_produtos import CacheBuscaProdutos
+from controllers.alteracoes import AcompanhamentoAlteracoes
+from controllers.exportacao import ExportadorDados
+from models.linhas import Linha
 
 class TestEstoqueModel(unittest.TestCase):
     """Testes unitários para o EstoqueModel"""
@@ -160,6 +166,364 @@ class TestEstoqueModel(unittest.TestCase):
         except Exception as e:
             self.fail(f"Falha ao gerar relatório: {e}")
 
+    def test_09_registrar_movimentacoes_lote(self):
+        """Testa registro de lote de movimentações em uma transação"""
+        id_a = EstoqueModel.adicionar_produto("Teste Lote A", "Lote", 5, 1.00)
+        id_b = EstoqueModel.adicionar_produto("Teste Lote B", "Lote", 5, 1.00)
+        
+        registradas = EstoqueModel.registrar_movimentacoes([
+            {'id_produto': id_a, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 40},
+            {'id_produto': id_b, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 10},
+            {'id_produto': id_a, 'tipo_movimentacao': 'SAIDA', 'quantidade': 15},
+        ], usuario="teste_automatizado")
+        
+        self.assertEqual(registradas, 3)
+        estoques = {p['id_produto']: p['qtd_estoque'] for p in EstoqueModel.listar_produtos()}
+        self.assertEqual(estoques[id_a], 25)
+        self.assertEqual(estoques[id_b], 10)
+        print(f"   ✅ Lote registrado para produtos {id_a} e {id_b}")
+    
+    def test_10_lote_tudo_ou_nada(self):
+        """Testa se um lote com erro não grava nenhuma linha"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Lote Inválido", "Lote", 5, 1.00)
+        
+        with self.assertRaises(MovimentacaoLoteError) as context:
+            EstoqueModel.registrar_movimentacoes([
+                {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 5},
+                {'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 50},
+            ], usuario="teste_automatizado")
+        
+        self.assertEqual([i for i, _ in context.exception.erros], [1])
+        estoques = {p['id_produto']: p['qtd_estoque'] for p in EstoqueModel.listar_produtos()}
+        self.assertEqual(estoques[id_produto], 0)
+        print(f"   ✅ Lote inválido rejeitado sem gravar movimentações")
+
+    def test_11_listar_produtos_pagina(self):
+        """Testa paginação por chave (nome, id) nos dois sentidos"""
+        for i in range(3):
+            EstoqueModel.adicionar_produto(f"Teste Página {i}", "Paginação", 5, 1.00)
+        
+        primeira = EstoqueModel.listar_produtos_pagina(limite=2)
+        self.assertLessEqual(len(primeira), 2)
+        chave_ultima = (primeira[-1]['nome_produto'], primeira[-1]['id_produto'])
+        
+        segunda = EstoqueModel.listar_produtos_pagina(limite=2, apos=chave_ultima)
+        chaves = [(p['nome_produto'], p['id_produto']) for p in primeira + segunda]
+        self.assertEqual(len(set(chaves)), len(chaves), "Páginas não devem se sobrepor")
+        
+        chave_primeira_seg = (segunda[0]['nome_produto'], segunda[0]['id_produto'])
+        anterior = EstoqueModel.listar_produtos_pagina(limite=2, antes=chave_primeira_seg)
+        self.assertEqual([p['id_produto'] for p in anterior], [p['id_produto'] for p in primeira])
+        print(f"   ✅ Paginação por chave consistente")
+
+    def test_12_iterar_movimentacoes(self):
+        """Testa leitura em streaming e interrupção no meio do relatório"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Streaming", "Relatório", 5, 1.00)
+        for _ in range(3):
+            EstoqueModel.registrar_entrada(id_produto, 1, "Streaming", "teste_automatizado")
+        
+        movimentacoes = EstoqueModel.iterar_movimentacoes(tamanho_lote=2)
+        primeira = next(movimentacoes)
+        self.assertIn('id_movimentacao', primeira)
+        movimentacoes.close()
+        
+        # O pool deve continuar utilizável após o gerador ser abandonado
+        relatorio = EstoqueModel.relatorio_movimentacoes(limite=3)
+        self.assertEqual(len(relatorio), 3)
+        print(f"   ✅ Streaming interrompido sem afetar o pool")
+
+    def test_13_cache_produtos(self):
+        """Testa leitura pelo cache e atualização no lugar após movimentação"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Cache", "Cache", 5, 1.00)
+        
+        produto = EstoqueModel.obter_produto(id_produto)
+        self.assertEqual(produto['qtd_estoque'], 0)
+        acertos_antes = EstoqueModel.estatisticas_cache()['acertos']
+        
+        EstoqueModel.registrar_entrada(id_produto, 12, "Cache", "teste_automatizado")
+        EstoqueModel.registrar_saida(id_produto, 5, "Cache", "teste_automatizado")
+        
+        produto = EstoqueModel.obter_produto(id_produto)
+        self.assertEqual(produto['qtd_estoque'], 7)
+        self.assertGreater(EstoqueModel.estatisticas_cache()['acertos'], acertos_antes)
+        self.assertIsNone(EstoqueModel.obter_produto(-1))
+        print(f"   ✅ Cache atualizado no lugar: {EstoqueModel.estatisticas_cache()}")
+
+    def test_14_importar_produtos(self):
+        """Testa importação em massa com saldo inicial"""
+        produtos = [
+            {'nome_produto': f"Teste Importação {i}", 'descricao': "Importado",
+             'qtd_minima': 5, 'preco_unitario': 2.50, 'qtd_estoque': i * 10}
+            for i in range(5)
+        ]
+        
+        importados = EstoqueModel.importar_produtos(produtos, "teste_automatizado", tamanho_lote=2)
+        self.assertEqual(importados, 5)
+        
+        estoques = {p['nome_produto']: p['qtd_estoque'] for p in EstoqueModel.listar_produtos()}
+        self.assertEqual(estoques["Teste Importação 3"], 30)
+        
+        saldos_iniciais = [m for m in EstoqueModel.relatorio_movimentacoes(limite=50)
+                           if m['nome_produto'].startswith("Teste Importação")]
+        self.assertGreaterEqual(len(saldos_iniciais), 4, "Saldo inicial deve gerar ENTRADA")
+        print(f"   ✅ {importados} produtos importados com saldo inicial")
+
+    def test_15_resumo_diario(self):
+        """Testa totais por período e resumo por produto lidos do resumo diário"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Resumo Diário", "", 1, 1.0)
+        inicio = (date.today() - timedelta(days=1)).isoformat()
+        fim = (date.today() + timedelta(days=1)).isoformat()
+        totais_antes = EstoqueModel.totais_periodo(inicio, fim)
+        
+        EstoqueModel.registrar_entrada(id_produto, 40, "Resumo", "teste_automatizado")
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 10},
+            {'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 15},
+        ], usuario="teste_automatizado")
+        EstoqueModel.registrar_saida(id_produto, 5, "Resumo", "teste_automatizado")
+        
+        totais = EstoqueModel.totais_periodo(inicio, fim)
+        self.assertEqual(totais['total_entradas'] - totais_antes['total_entradas'], 50)
+        self.assertEqual(totais['total_saidas'] - totais_antes['total_saidas'], 20)
+        self.assertEqual(totais['qtd_saidas'] - totais_antes['qtd_saidas'], 2)
+        
+        resumo = {r['id_produto']: r for r in EstoqueModel.resumo_por_produto(inicio, fim)}
+        self.assertEqual(resumo[id_produto]['entradas'], 50)
+        self.assertEqual(resumo[id_produto]['saidas'], 20)
+        self.assertEqual(resumo[id_produto]['movimentacoes'], 4)
+        
+        # Reconstruir a partir das movimentações não muda o resultado
+        self.assertGreater(EstoqueModel.reconstruir_resumo_diario(inicio, fim), 0)
+        self.assertEqual(EstoqueModel.totais_periodo(inicio, fim), totais)
+        print(f"   ✅ Totais do período pelo resumo diário: {totais}")
+
+    def test_16_estoque_em_data(self):
+        """Testa estoque em uma data e registro de fechamento"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Estoque na Data", "", 1, 1.0)
+        EstoqueModel.registrar_entrada(id_produto, 30, "Data", "teste_automatizado")
+        EstoqueModel.registrar_saida(id_produto, 5, "Data", "teste_automatizado")
+        hoje = date.today()
+        ontem = (hoje - timedelta(days=1)).isoformat()
+        
+        produtos = EstoqueModel.estoque_em(hoje.isoformat(), [id_produto])
+        self.assertEqual([p['qtd_estoque'] for p in produtos], [25])
+        
+        # O fechamento de ontem não altera o saldo de hoje; o produto, criado
+        # hoje, não existia ao fim de ontem
+        self.assertGreater(EstoqueModel.registrar_fechamento(ontem), 0)
+        self.assertEqual(EstoqueModel.estoque_em(hoje.isoformat(), [id_produto])[0]['qtd_estoque'], 25)
+        self.assertEqual(EstoqueModel.estoque_em(ontem, [id_produto]), [])
+        
+        with self.assertRaises(ValueError):
+            EstoqueModel.registrar_fechamento(hoje.isoformat())
+        with self.assertRaises(ValueError):
+            EstoqueModel.estoque_em("31/12/2024")
+        print("   ✅ Estoque na data calculado a partir do fechamento mais próximo")
+
+    def test_17_buscar_produtos(self):
+        """Testa busca do autocompletar por id, prefixo do nome e palavras da descrição"""
+        marca = uuid.uuid4().hex[:8]
+        id_nome = EstoqueModel.adicionar_produto(f"Busca {marca} Parafuso", "Aço inox", 1, 1.0)
+        id_descricao = EstoqueModel.adicionar_produto(f"Item {marca}", f"Arruela {marca}zz galvanizada", 1, 1.0)
+        id_curinga = EstoqueModel.adicionar_produto(f"Busca {marca} 100%_off", "", 1, 1.0)
+        
+        por_nome = [p['id_produto'] for p in EstoqueModel.buscar_produtos(f"busca {marca}")]
+        self.assertEqual(sorted(por_nome), sorted([id_nome, id_curinga]))
+        
+        # '%' e '_' do texto são literais, não curingas do LIKE
+        curinga = [p['id_produto'] for p in EstoqueModel.buscar_produtos(f"Busca {marca} 100%_")]
+        self.assertEqual(curinga, [id_curinga])
+        self.assertEqual(EstoqueModel.buscar_produtos(f"Busca {marca} 1_0"), [])
+        
+        por_descricao = [p['id_produto'] for p in EstoqueModel.buscar_produtos(f"galvan {marca}")]
+        self.assertEqual(por_descricao, [id_descricao])
+        
+        por_id = EstoqueModel.buscar_produtos(str(id_descricao), limite=3)
+        self.assertEqual(por_id[0]['id_produto'], id_descricao)
+        self.assertLessEqual(len(por_id), 3)
+        self.assertEqual(EstoqueModel.buscar_produtos("   "), [])
+        print(f"   ✅ Busca por nome, descrição e id: {por_nome + por_descricao}")
+
+    def test_18_cache_buscas(self):
+        """Testa refinamento local do cache de buscas do autocompletar"""
+        cache = CacheBuscaProdutos(limite=10)
+        produtos = [
+            {'id_produto': 1, 'nome_produto': "Parafuso Sextavado", 'descricao': "Aço"},
+            {'id_produto': 2, 'nome_produto': "Parafuso Philips", 'descricao': "Cabeça chata"},
+            {'id_produto': 3, 'nome_produto': "Arruela", 'descricao': "Para parafuso sextavado"},
+        ]
+        self.assertIsNone(cache.obter("para"))
+        cache.guardar("para", produtos)
+        
+        self.assertEqual([p['id_produto'] for p in cache.obter("PARAFUSO SEX")], [1, 3])
+        self.assertEqual(cache.refinamentos, 1)
+        self.assertEqual([p['id_produto'] for p in cache.obter("parafuso sex")], [1, 3])
+        self.assertEqual(cache.acertos, 1)
+        
+        # Resultado cheio não garante que nada ficou de fora
+        cache.guardar("ar", produtos * 4)
+        self.assertIsNone(cache.obter("arr"))
+        cache.invalidar()
+        self.assertIsNone(cache.obter("para"))
+        print("   ✅ Cache de buscas refinado localmente")
+
+    def test_19_arquivar_movimentacoes(self):
+        """Testa arquivamento de meses encerrados sem alterar estoque e totais"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Arquivamento", "", 1, 1.0)
+        antigo = datetime.combine(date.today() - timedelta(days=800), datetime.min.time())
+        dia = antigo.date().isoformat()
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 20,
+             'data_movimentacao': antigo + timedelta(hours=9)},
+            {'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 8,
+             'data_movimentacao': antigo + timedelta(hours=15)},
+        ], usuario="teste_automatizado")
+        EstoqueModel.registrar_entrada(id_produto, 5, "Atual", "teste_automatizado")
+        totais = EstoqueModel.totais_periodo(dia, dia)
+        
+        arquivadas = EstoqueModel.arquivar_movimentacoes(manter_meses=24)
+        self.assertGreaterEqual(arquivadas, 2)
+        
+        # Estoque, resumo diário e relatório do período continuam iguais
+        self.assertEqual(EstoqueModel.obter_produto(id_produto)['qtd_estoque'], 17)
+        self.assertEqual(EstoqueModel.totais_periodo(dia, dia), totais)
+        EstoqueModel.reconstruir_resumo_diario(dia, dia)
+        self.assertEqual(EstoqueModel.totais_periodo(dia, dia), totais)
+        antigas = [m for m in EstoqueModel.relatorio_movimentacoes(dia, dia) if m['id_produto'] == id_produto]
+        self.assertEqual([m['quantidade'] for m in antigas], [8, 20])
+        
+        # As recentes ficam na tabela principal
+        recentes = [m for m in EstoqueModel.relatorio_movimentacoes(limite=50) if m['id_produto'] == id_produto]
+        self.assertEqual([m['quantidade'] for m in recentes], [5])
+        self.assertEqual(EstoqueModel.arquivar_movimentacoes(manter_meses=24), 0)
+        
+        with self.assertRaises(ValueError):
+            EstoqueModel.arquivar_movimentacoes(antes_de=(date.today() + timedelta(days=40)).isoformat())
+        with self.assertRaises(Exception):
+            EstoqueModel.registrar_entrada(-1, 1, "", "teste_automatizado")
+        print(f"   ✅ {arquivadas} movimentações arquivadas; estoque e totais preservados")
+
+    def test_20_linhas_compactas(self):
+        """Testa leituras em linhas compactas com a mesma interface dos dicts"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Linha Compacta", "Slots", 3, 2.5)
+        EstoqueModel.registrar_entrada(id_produto, 9, "Compacta", "teste_automatizado")
+        original = EstoqueModel.linhas_compactas
+        EstoqueModel.linhas_compactas = False
+        try:
+            como_dict = EstoqueModel.listar_produtos_pagina(5, apos=("Teste Linha Compact", 0))
+            EstoqueModel.linhas_compactas = True
+            EstoqueModel.cache.invalidar()
+            produtos = EstoqueModel.listar_produtos_pagina(5, apos=("Teste Linha Compact", 0))
+            produto = EstoqueModel.obter_produto(id_produto)
+            hoje = date.today().isoformat()
+            movimentacoes = [m for m in EstoqueModel.iterar_movimentacoes(hoje, hoje)
+                             if m['id_produto'] == id_produto]
+        finally:
+            EstoqueModel.linhas_compactas = original
+            EstoqueModel.cache.invalidar()
+        
+        self.assertIsInstance(produtos[0], Linha)
+        self.assertIsInstance(como_dict[0], dict)
+        self.assertFalse(hasattr(produtos[0], '__dict__'))
+        self.assertEqual(produtos, como_dict)
+        self.assertEqual((produto.qtd_estoque, produto['nome_produto'], produto.get('x', 0)),
+                         (9, "Teste Linha Compacta", 0))
+        self.assertEqual(movimentacoes[0]['quantidade'], 9)
+        
+        # Cópia independente, atribuição por chave e serialização como dict
+        copia = produto.copy()
+        copia['qtd_estoque'] = 1
+        self.assertEqual(produto['qtd_estoque'], 9)
+        self.assertEqual(dict(copia)['qtd_estoque'], 1)
+        self.assertEqual(ExportadorDados._valor_json(copia), dict(copia))
+        with self.assertRaises(KeyError):
+            copia['inexistente'] = 1
+        print(f"   ✅ Linha compacta: {produto}")
+
+    def test_21_acompanhar_alteracoes(self):
+        """Testa a entrega só dos produtos alterados desde a marca, com recuo quando ocioso"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Alterações", "", 5, 1.0)
+        acompanhamento = AcompanhamentoAlteracoes(intervalo=1, intervalo_max=4, variacao=0)
+        
+        def consultar():
+            return acompanhamento.aplicar(*EstoqueModel.alteracoes_produtos(
+                acompanhamento.desde(), acompanhamento.limite))
+        
+        consultar()
+        self.assertTrue(acompanhamento.iniciado)
+        EstoqueModel.registrar_entrada(id_produto, 3, "Outro posto", "teste_automatizado")
+        alterados, recarregar = consultar()
+        produto = next(p for p in alterados if p['id_produto'] == id_produto)
+        self.assertFalse(recarregar)
+        self.assertEqual(produto['qtd_estoque'], 3)
+        self.assertEqual(acompanhamento.intervalo, 1)
+        
+        # Relido na janela de sobreposição, sem nova versão não é entregue
+        self.assertEqual(consultar(), ([], False))
+        self.assertEqual(consultar(), ([], False))
+        self.assertEqual(consultar(), ([], False))
+        self.assertEqual(acompanhamento.intervalo, 4)
+        
+        EstoqueModel.registrar_saida(id_produto, 1, "Outro posto", "teste_automatizado")
+        alterados, _ = consultar()
+        self.assertEqual([(p['id_produto'], p['versao'], p['qtd_estoque']) for p in alterados],
+                         [(id_produto, produto['versao'] + 1, 2)])
+        self.assertEqual(acompanhamento.proximo_ms(), 1000)
+        
+        # Mais alterações que o limite: recarga completa da tela
+        pequeno = AcompanhamentoAlteracoes(limite=2)
+        pequeno.iniciar(AcompanhamentoAlteracoes.INICIO)
+        self.assertEqual(pequeno.aplicar(*EstoqueModel.alteracoes_produtos(pequeno.desde(), 2)),
+                         ([], True))
+        # A recarga mantém a janela: um commit atrasado, com atualizado_em
+        # anterior à marca da recarga, ainda é lido e entregue
+        marca = pequeno.marca
+        self.assertEqual(pequeno.desde(), marca - timedelta(seconds=pequeno.janela))
+        atrasado = {'id_produto': id_produto, 'versao': produto['versao'] + 2,
+                    'atualizado_em': marca - timedelta(seconds=1)}
+        self.assertEqual(pequeno.aplicar([atrasado], marca), ([atrasado], False))
+        self.assertEqual(pequeno.aplicar([atrasado], marca), ([], False))
+        print(f"   ✅ Alterações acompanhadas: {acompanhamento.estatisticas()}")
+
+    def test_22_lote_datado_corrige_fechamentos(self):
+        """Testa lote com data passada sobre dia já fechado e recusa de data inválida"""
+        id_produto = EstoqueModel.adicionar_produto("Teste Lote Datado", "", 1, 1.0)
+        hoje = date.today()
+        # Dias sem fechamento de outras suítes, que não conheciam o produto
+        fechado = hoje - timedelta(days=5)
+        anterior = hoje - timedelta(days=6)
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("UPDATE produtos SET data_cadastro = %s WHERE id_produto = %s",
+                               (datetime.combine(hoje - timedelta(days=10), datetime.min.time()), id_produto))
+                conn.commit()
+            finally:
+                cursor.close()
+        
+        def lote(quantidade: int, dia: date) -> list:
+            return [{'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': quantidade,
+                     'data_movimentacao': datetime.combine(dia, datetime.min.time()) + timedelta(hours=12)}]
+        
+        EstoqueModel.registrar_movimentacoes(lote(10, hoje - timedelta(days=8)), "teste_automatizado")
+        EstoqueModel.registrar_fechamento(fechado.isoformat())
+        self.assertEqual(EstoqueModel.estoque_em(fechado.isoformat(), [id_produto])[0]['qtd_estoque'], 10)
+        
+        # Lançada hoje com a data da véspera do fechamento: ele passa a contar com ela
+        EstoqueModel.registrar_movimentacoes(lote(5, anterior), "teste_automatizado")
+        self.assertEqual(EstoqueModel.estoque_em(fechado.isoformat(), [id_produto])[0]['qtd_estoque'], 15)
+        self.assertEqual(EstoqueModel.estoque_em(anterior.isoformat(), [id_produto])[0]['qtd_estoque'], 15)
+        EstoqueModel.cache.invalidar([id_produto])
+        self.assertEqual(EstoqueModel.obter_produto(id_produto)['qtd_estoque'], 15)
+        
+        with self.assertRaises(MovimentacaoLoteError) as context:
+            EstoqueModel.registrar_movimentacoes([
+                {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1,
+                 'data_movimentacao': 'lixo'},
+            ], "teste_automatizado")
+        self.assertIn("Data inválida", context.exception.erros[0][1])
+        print("   ✅ Lote datado corrige os fechamentos já gravados")
+
 def run_tests():
     """Executa os testes e gera relatório"""
     print("\n" + "="*60)
@@ -0,0 +1,170 @@
+import unittest
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stderr
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cli
+from controllers.exportacao import ExportadorDados
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+
+class TestExportacao(unittest.TestCase):
+    """Testes da exportação em CSV/JSON Lines e da marca d'água incremental"""
+
+    LINHAS = [
+        {'id_movimentacao': 1, 'nome_produto': "Caneta, azul", 'quantidade': 3,
+         'data_movimentacao': datetime(2024, 5, 1, 8, 30), 'preco_unitario': Decimal("2.50")},
+        {'id_movimentacao': 2, 'nome_produto': "Lápis", 'quantidade': 1,
+         'data_movimentacao': datetime(2024, 5, 2, 9, 0), 'preco_unitario': None},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        print("\n📤 Iniciando testes da exportação...")
+        assert DatabaseConfig.test_connection(), "Falha na conexão com banco de dados"
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _executar(self, sql: str, params: tuple = ()) -> list:
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                linhas = cursor.fetchall() if cursor.with_rows else []
+                conn.commit()
+                return linhas
+            finally:
+                cursor.close()
+
+    def test_formatos(self):
+        """CSV com cabeçalho, JSON Lines com datas e decimais como texto, gzip"""
+        saida = io.StringIO()
+        exportador = ExportadorDados('csv').exportar(self.LINHAS, saida)
+        self.assertEqual((exportador.linhas, exportador.ultimo_id), (2, 2))
+        linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+        self.assertEqual(linhas[0]['nome_produto'], "Caneta, azul")
+        self.assertEqual(linhas[0]['data_movimentacao'], "2024-05-01 08:30:00")
+        self.assertEqual(linhas[1]['preco_unitario'], "")
+
+        caminho = os.path.join(self.pasta, "mov.jsonl.gz")
+        with ExportadorDados.abrir_saida(caminho, compactar=True) as arquivo:
+            ExportadorDados('jsonl').exportar(self.LINHAS, arquivo)
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            linhas = [json.loads(l) for l in f]
+        self.assertEqual(linhas[0], {'id_movimentacao': 1, 'nome_produto': "Caneta, azul", 'quantidade': 3,
+                                     'data_movimentacao': "2024-05-01T08:30:00", 'preco_unitario': "2.50"})
+        self.assertIsNone(linhas[1]['preco_unitario'])
+
+        with self.assertRaises(ValueError):
+            ExportadorDados('xml')
+
+    def test_arquivo_de_estado(self):
+        """Marca d'água e lacunas sobrevivem à ida e volta pelo arquivo de estado"""
+        caminho = os.path.join(self.pasta, "estado.json")
+        self.assertIsNone(ExportadorDados.ler_marca(caminho))
+        self.assertEqual(ExportadorDados.ler_lacunas(caminho), [])
+
+        ExportadorDados.gravar_marca(caminho, 42, [40, 41])
+        ExportadorDados.gravar_marca(caminho, 57, [55])
+        self.assertEqual(ExportadorDados.ler_marca(caminho), 57)
+        self.assertEqual(ExportadorDados.ler_lacunas(caminho), [55])
+        self.assertEqual(os.listdir(self.pasta), ["estado.json"])
+
+    def test_lacunas(self):
+        """Ids que faltaram abaixo da marca são relidos até sair da sobreposição"""
+        def linhas(*ids):
+            return [{'id_movimentacao': i} for i in ids]
+
+        exportador = ExportadorDados('jsonl', sobreposicao=10).exportar(linhas(1, 2, 5, 6), io.StringIO(), apos_id=0)
+        self.assertEqual((exportador.ultimo_id, exportador.lacunas), (6, [3, 4]))
+
+        # O 4 confirmou depois: chega junto com as novas e sai das lacunas
+        exportador = ExportadorDados('jsonl', sobreposicao=10).exportar(
+            linhas(4, 7, 9), io.StringIO(), apos_id=6, lacunas=[3, 4])
+        self.assertEqual((exportador.linhas, exportador.ultimo_id, exportador.lacunas), (3, 9, [3, 8]))
+
+        # Sem linhas novas a marca se mantém; lacunas além da sobreposição expiram
+        exportador = ExportadorDados('jsonl', sobreposicao=3).exportar([], io.StringIO(), apos_id=9, lacunas=[3, 8])
+        self.assertEqual((exportador.ultimo_id, exportador.lacunas), (9, [8]))
+        # Sem sobreposição, só a marca
+        exportador = ExportadorDados('jsonl').exportar(linhas(11, 15), io.StringIO(), apos_id=9, lacunas=[8])
+        self.assertEqual((exportador.ultimo_id, exportador.lacunas), (15, []))
+
+    def test_filtro_por_data(self):
+        """Início e fim inclusivos, em ordem de id e com dados do produto"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Exportação Datas", "", 1, 3.0)
+        hoje = date.today()
+        dias = [hoje - timedelta(days=n) for n in (10, 5, 1)]
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': id_produto, 'tipo_movimentacao': 'ENTRADA', 'quantidade': q,
+             'data_movimentacao': datetime.combine(dia, time(12))}
+            for q, dia in enumerate(dias, start=1)
+        ], usuario="teste_exportacao")
+
+        def exportadas(inicio, fim, apos_id=None):
+            return [(m['quantidade'], m['nome_produto'])
+                    for m in EstoqueModel.iterar_exportacao_movimentacoes(
+                        inicio.isoformat(), fim.isoformat(), apos_id=apos_id)
+                    if m['id_produto'] == id_produto]
+
+        self.assertEqual(exportadas(dias[1], dias[1]), [(2, "Produto Exportação Datas")])
+        self.assertEqual([q for q, _ in exportadas(dias[0], dias[1])], [1, 2])
+        self.assertEqual(exportadas(hoje, hoje), [])
+
+        ids = [m['id_movimentacao'] for m in EstoqueModel.iterar_exportacao_movimentacoes(
+            dias[0].isoformat(), hoje.isoformat()) if m['id_produto'] == id_produto]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual([q for q, _ in exportadas(dias[0], hoje, apos_id=ids[0])], [2, 3])
+
+        with self.assertRaises(ValueError):
+            list(EstoqueModel.iterar_exportacao_movimentacoes("01/05/2024"))
+
+    def test_commit_atrasado(self):
+        """``cli.py exportar --estado`` relê o id que confirmou abaixo da marca"""
+        id_produto = EstoqueModel.adicionar_produto("Produto Exportação Atrasada", "", 1, 1.0)
+        ultimo = self._executar("SELECT MAX(id_movimentacao) FROM movimentacoes")[0][0] or 0
+        estado = os.path.join(self.pasta, "estado.json")
+        saida = os.path.join(self.pasta, "mov.jsonl")
+        ExportadorDados.gravar_marca(estado, ultimo)
+
+        inserir = """
+            INSERT INTO movimentacoes (id_movimentacao, id_produto, tipo_movimentacao, quantidade, usuario)
+            VALUES (%s, %s, 'ENTRADA', %s, 'teste_exportacao')
+        """
+
+        def exportar() -> list:
+            with redirect_stderr(io.StringIO()):
+                self.assertEqual(cli.main(['exportar', 'movimentacoes', '--formato', 'jsonl',
+                                           '--saida', saida, '--estado', estado]), 0)
+            with open(saida, encoding='utf-8') as f:
+                return [json.loads(l)['id_movimentacao'] for l in f]
+
+        # Id seguinte ainda em uma transação aberta: o posterior confirma antes
+        self._executar(inserir, (ultimo + 2, id_produto, 2))
+        self.assertEqual(exportar(), [ultimo + 2])
+        self.assertEqual(ExportadorDados.ler_lacunas(estado), [ultimo + 1])
+
+        self._executar(inserir, (ultimo + 1, id_produto, 1))
+        self.assertEqual(exportar(), [ultimo + 1])
+        self.assertEqual(ExportadorDados.ler_marca(estado), ultimo + 2)
+        self.assertEqual(ExportadorDados.ler_lacunas(estado), [])
+        self.assertEqual(exportar(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
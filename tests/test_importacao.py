@@ -0,0 +1,162 @@
+import unittest
+import sys
+import os
+import csv
+import io
+import shutil
+import tempfile
+import uuid
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cli
+from controllers.importacao import ImportadorCSV
+from config.database import DatabaseConfig
+
+
+class TestImportacao(unittest.TestCase):
+    """Testes da importação de produtos por CSV (controller e linha de comando)"""
+
+    @classmethod
+    def setUpClass(cls):
+        print("\n📥 Iniciando testes da importação CSV...")
+        assert DatabaseConfig.test_connection(), "Falha na conexão com banco de dados"
+
+    def setUp(self):
+        # Nomes únicos por teste: o banco é compartilhado com as outras suítes
+        self.prefixo = f"Importado {uuid.uuid4().hex[:8]}"
+        self.pasta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _consultar(self, sql: str, params: tuple) -> list:
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def _produto(self, nome: str):
+        linhas = self._consultar("""
+            SELECT id_produto, descricao, qtd_minima, preco_unitario, qtd_estoque
+            FROM produtos WHERE nome_produto = %s
+        """, (nome,))
+        return linhas[0] if linhas else None
+
+    def _movimentacoes(self, id_produto: int) -> list:
+        return self._consultar("""
+            SELECT tipo_movimentacao, quantidade, observacao, usuario
+            FROM movimentacoes WHERE id_produto = %s
+        """, (id_produto,))
+
+    def test_delimitador_detectado(self):
+        """Ponto e vírgula é detectado pelo cabeçalho, com preço em vírgula decimal"""
+        texto = (
+            "nome_produto;descricao;qtd_minima;preco_unitario;qtd_estoque\n"
+            f"{self.prefixo} A;Caixa, grande;3;12,50;0\n"
+            f"{self.prefixo} B;;;;\n"
+        )
+        importador = ImportadorCSV(usuario="teste_importacao").importar(io.StringIO(texto))
+
+        self.assertEqual((importador.lidas, importador.importadas, importador.rejeitadas), (2, 2, []))
+        _, descricao, qtd_minima, preco, qtd_estoque = self._produto(f"{self.prefixo} A")
+        self.assertEqual((descricao, qtd_minima, float(preco), qtd_estoque), ("Caixa, grande", 3, 12.5, 0))
+        # Colunas vazias assumem os padrões
+        self.assertEqual(self._produto(f"{self.prefixo} B")[2], 10)
+
+        tabulado = f"nome_produto\tqtd_minima\n{self.prefixo} C\t4\n"
+        ImportadorCSV().importar(io.StringIO(tabulado))
+        self.assertEqual(self._produto(f"{self.prefixo} C")[2], 4)
+
+    def test_linhas_rejeitadas(self):
+        """Linhas inválidas são rejeitadas com número e motivo, sem barrar as demais"""
+        texto = (
+            "nome_produto,qtd_minima,preco_unitario,qtd_estoque\n"
+            f"{self.prefixo} ok,1,1.0,0\n"
+            ",1,1.0,0\n"
+            f"{self.prefixo} qtd,abc,1.0,0\n"
+            f"{self.prefixo} preco,1,um real,0\n"
+            f"{self.prefixo} negativo,1,1.0,-5\n"
+            f"{'x' * 101},1,1.0,0\n"
+        )
+        importador = ImportadorCSV().importar(io.StringIO(texto))
+
+        self.assertEqual((importador.lidas, importador.importadas), (6, 1))
+        motivos = {numero: motivo for numero, motivo, _ in importador.rejeitadas}
+        self.assertEqual(sorted(motivos), [3, 4, 5, 6, 7])
+        self.assertIn("obrigatório", motivos[3])
+        self.assertIn("qtd_minima inválido: 'abc'", motivos[4])
+        self.assertIn("preco_unitario inválido", motivos[5])
+        self.assertIn("qtd_estoque não pode ser negativo", motivos[6])
+        self.assertIn("100 caracteres", motivos[7])
+        self.assertIsNotNone(self._produto(f"{self.prefixo} ok"))
+        self.assertIsNone(self._produto(f"{self.prefixo} qtd"))
+
+        saida = io.StringIO()
+        importador.escrever_rejeitadas(saida)
+        linhas = list(csv.reader(io.StringIO(saida.getvalue())))
+        self.assertEqual(linhas[0], ['linha', 'motivo', 'conteudo'])
+        self.assertEqual([l[0] for l in linhas[1:]], ['3', '4', '5', '6', '7'])
+
+        with self.assertRaises(ValueError):
+            ImportadorCSV().importar(io.StringIO("descricao,qtd_minima\nsem nome,1\n"))
+
+    def test_saldo_inicial(self):
+        """Saldo inicial positivo gera a ENTRADA correspondente; saldo zero não gera"""
+        texto = (
+            "nome_produto,qtd_estoque\n"
+            f"{self.prefixo} com saldo,7\n"
+            f"{self.prefixo} sem saldo,0\n"
+        )
+        ImportadorCSV(usuario="teste_importacao").importar(io.StringIO(texto))
+
+        com_saldo = self._produto(f"{self.prefixo} com saldo")
+        self.assertEqual(com_saldo[4], 7)
+        self.assertEqual(self._movimentacoes(com_saldo[0]),
+                         [('ENTRADA', 7, 'Saldo inicial (importação)', 'teste_importacao')])
+        self.assertEqual(self._movimentacoes(self._produto(f"{self.prefixo} sem saldo")[0]), [])
+
+    def test_progresso_e_taxa(self):
+        """Uma chamada de progresso por transação e taxa = importadas / duração"""
+        texto = "nome_produto\n" + "".join(f"{self.prefixo} {i}\n" for i in range(5))
+        progresso = []
+        importador = ImportadorCSV(tamanho_lote=2, linhas_por_transacao=2,
+                                   ao_progredir=lambda imp: progresso.append(imp.importadas))
+        self.assertEqual(importador.linhas_por_segundo, 0.0)
+
+        importador.importar(io.StringIO(texto))
+        self.assertEqual(progresso, [2, 4, 5])
+        self.assertGreater(importador.duracao, 0)
+        self.assertAlmostEqual(importador.linhas_por_segundo, 5 / importador.duracao)
+        # Encerrada a importação, a duração não cresce mais
+        self.assertEqual(importador.duracao, importador.fim - importador.inicio)
+
+    def test_linha_de_comando(self):
+        """``cli.py importar``: código 0 sem rejeições, 2 com rejeições (gravadas) e 1 sem arquivo"""
+        arquivo = os.path.join(self.pasta, "produtos.csv")
+        rejeitados = os.path.join(self.pasta, "rejeitados.csv")
+        with open(arquivo, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(f"nome_produto;qtd_estoque\n{self.prefixo} cli;2\n;1\n")
+
+        with redirect_stdout(io.StringIO()) as saida:
+            codigo = cli.main(['importar', arquivo, '--usuario', 'teste_cli', '--rejeitados', rejeitados])
+        self.assertEqual(codigo, 2)
+        self.assertIn("Importadas:        1", saida.getvalue())
+        with open(rejeitados, encoding='utf-8') as f:
+            self.assertEqual([l[0] for l in csv.reader(f)], ['linha', '3'])
+        produto = self._produto(f"{self.prefixo} cli")
+        self.assertEqual(self._movimentacoes(produto[0])[0][3], 'teste_cli')
+
+        with open(arquivo, 'w', encoding='utf-8', newline='') as f:
+            f.write(f"nome_produto\n{self.prefixo} cli 2\n")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(cli.main(['importar', arquivo]), 0)
+            self.assertEqual(cli.main(['importar', os.path.join(self.pasta, "inexistente.csv")]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
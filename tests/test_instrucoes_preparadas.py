@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.backends import BackendMySQL, ConexaoMySQL
+from models.estoque_model import EstoqueModel
+from models.instrucoes_sql import InstrucoesSQL
+
+
+class _CursorServidor:
+    """Cursor preparado de mentira: conta preparações como o servidor faria"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._sql = None
+        self.fechado = False
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self._linhas = []
+
+    @property
+    def with_rows(self):
+        return self.description is not None
+
+    def execute(self, operation, params=()):
+        if operation != self._sql:
+            self._sql = operation
+            self._conn.preparacoes.append(operation)
+        if operation.lstrip().startswith("SELECT"):
+            self.description = [('id_produto',), ('nome_produto',)]
+            self._linhas = [(p, f"Produto {p}") for p in params]
+        else:
+            self.description = None
+            self._linhas = []
+            self.rowcount = 1
+            self.lastrowid = 42
+
+    def fetchall(self):
+        linhas, self._linhas = self._linhas, []
+        return linhas
+
+    def close(self):
+        self.fechado = True
+
+
+class _ConexaoServidor:
+    def __init__(self):
+        self.preparacoes = []
+        self.cursores = []
+
+    def cursor(self, prepared=False, **kwargs):
+        cursor = _CursorServidor(self)
+        self.cursores.append((prepared, kwargs, cursor))
+        return cursor
+
+    def close(self):
+        pass
+
+
+class TestInstrucoesPreparadas(unittest.TestCase):
+    """Reaproveitamento de instruções preparadas por conexão e registro de comandos"""
+
+    def setUp(self):
+        self.backend = BackendMySQL({}, preparar=True, limite_preparadas=2)
+        self.bruta = _ConexaoServidor()
+        self.conn = ConexaoMySQL(self.bruta, self.backend)
+
+    def test_prepara_uma_vez_por_conexao(self):
+        """O mesmo comando em cursores diferentes é preparado uma única vez"""
+        for _ in range(3):
+            cursor = self.conn.cursor(prepared=True)
+            cursor.execute(InstrucoesSQL.SOMAR_ESTOQUE, (1, 7))
+            self.assertEqual((cursor.rowcount, cursor.lastrowid), (1, 42))
+            cursor.close()
+
+        self.assertEqual(self.bruta.preparacoes, [InstrucoesSQL.SOMAR_ESTOQUE])
+        self.assertEqual(self.backend.preparacoes, 1)
+
+    def test_resultado_lido_e_limite(self):
+        """Linhas vêm como dict; acima do limite a instrução mais antiga é fechada"""
+        cursor = self.conn.cursor(prepared=True, dictionary=True)
+        cursor.execute(InstrucoesSQL.buscar_produtos(2), (3, 4))
+        self.assertEqual(cursor.fetchone(), {'id_produto': 3, 'nome_produto': "Produto 3"})
+        self.assertEqual(len(cursor.fetchall()), 1)
+
+        cursor.execute(InstrucoesSQL.SOMAR_ESTOQUE, (1, 3))
+        cursor.execute(InstrucoesSQL.INSERIR_MOVIMENTACAO, (3, 'ENTRADA', 1, "", "teste"))
+        self.assertEqual(self.conn.preparadas, 2)
+        self.assertTrue(self.bruta.cursores[0][2].fechado)
+
+    def test_desligado_usa_cursor_comum(self):
+        """Com preparar=False o pedido vira um cursor comum bufferizado"""
+        self.backend.preparar = False
+        self.conn.cursor(prepared=True, dictionary=True)
+        self.assertEqual(self.bruta.cursores, [(False, {'dictionary': True, 'buffered': True},
+                                                self.bruta.cursores[0][2])])
+
+    def test_registro_de_comandos(self):
+        """Os comandos do registro estão em uso e a busca por ids tem poucos tamanhos"""
+        self.assertIn('BAIXAR_ESTOQUE', InstrucoesSQL.todas())
+        self.assertEqual([InstrucoesSQL.tamanho_busca(n) for n in (1, 3, 4, 100, 300)],
+                         [1, 4, 4, 128, 300])
+
+        with open(sys.modules[EstoqueModel.__module__].__file__, encoding='utf-8') as f:
+            fonte = f.read()
+        sem_uso = [nome for nome in InstrucoesSQL.todas() if f"InstrucoesSQL.{nome}" not in fonte]
+        self.assertEqual(sem_uso, [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.instrumentacao import (ConexaoInstrumentada, HistogramaLatencia,
+                                   Instrumentacao)
+from models.estoque_model import EstoqueModel
+
+
+class _CursorFalso:
+    """Cursor mínimo: SELECT devolve três linhas, os demais afetam uma"""
+
+    def __init__(self):
+        self.with_rows = False
+        self.rowcount = -1
+        self.lotes = [True, True, False]
+
+    def execute(self, operation, params=None):
+        if "falha" in operation:
+            raise RuntimeError("erro simulado")
+        self.with_rows = operation.lstrip().upper().startswith("SELECT")
+        self.rowcount = -1 if self.with_rows else 1
+
+    def fetchall(self):
+        return [(1,), (2,), (3,)]
+
+    def fetchmany(self, size=1):
+        # Cursor não bufferizado: o tempo da consulta aparece na leitura
+        time.sleep(0.02)
+        return [(1,)] * size if self.lotes.pop(0) else []
+
+    def close(self):
+        pass
+
+
+class _ConexaoFalsa:
+    def cursor(self, *args, **kwargs):
+        return _CursorFalso()
+
+
+class TestInstrumentacao(unittest.TestCase):
+    """Testes da medição de comandos SQL (só a origem do fluxo usa o banco)"""
+
+    def setUp(self):
+        Instrumentacao.zerar()
+        self.limite_original = Instrumentacao.limite_lenta_ms
+
+    def tearDown(self):
+        Instrumentacao.limite_lenta_ms = self.limite_original
+        Instrumentacao.zerar()
+
+    def test_01_histograma_percentis(self):
+        """Percentis saem das faixas e nunca passam do máximo observado"""
+        histograma = HistogramaLatencia()
+        for ms in [0.2] * 90 + [30] * 9 + [700]:
+            histograma.registrar(ms)
+
+        resumo = histograma.resumo()
+        self.assertEqual(resumo['chamadas'], 100)
+        self.assertEqual(resumo['p50_ms'], 0.25)
+        self.assertEqual(resumo['p95_ms'], 50)
+        self.assertEqual(resumo['p99_ms'], 50)
+        self.assertEqual(resumo['max_ms'], 700)
+        self.assertEqual(sum(resumo['faixas'].values()), 100)
+
+    def test_02_rotulo_linhas_e_erros(self):
+        """Cada execução é registrada sob função:COMANDO tabela"""
+        def listar_itens(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT id_produto FROM produtos WHERE qtd_estoque > %s", (0,))
+            return cursor.fetchall()
+
+        def gravar_item(conn):
+            cursor = conn.cursor()
+            cursor.execute("UPDATE produtos SET qtd_estoque = 0 WHERE id_produto = %s", (1,))
+
+        conn = ConexaoInstrumentada(_ConexaoFalsa())
+        self.assertEqual(len(listar_itens(conn)), 3)
+        gravar_item(conn)
+        with self.assertRaises(RuntimeError):
+            conn.cursor().execute("SELECT falha FROM produtos")
+
+        comandos = Instrumentacao.estatisticas()['comandos']
+        self.assertEqual(comandos['listar_itens:SELECT produtos']['linhas'], 3)
+        self.assertEqual(comandos['gravar_item:UPDATE produtos']['linhas'], 1)
+        self.assertEqual(comandos['test_02_rotulo_linhas_e_erros:SELECT produtos']['erros'], 1)
+
+    def test_03_consultas_lentas(self):
+        """Execuções acima do limite entram na lista de lentas"""
+        Instrumentacao.limite_lenta_ms = 0
+        conn = ConexaoInstrumentada(_ConexaoFalsa())
+        cursor = conn.cursor()
+        cursor.execute("SELECT  nome_produto\n FROM produtos")
+        cursor.close()
+
+        lentas = Instrumentacao.estatisticas()['lentas']
+        self.assertEqual(len(lentas), 1)
+        self.assertEqual(lentas[0]['sql'], "SELECT nome_produto FROM produtos")
+
+    def test_04_leitura_em_fluxo(self):
+        """Tempo dos fetch* conta na execução, registrada quando o resultado se esgota"""
+        Instrumentacao.limite_lenta_ms = 30
+        conn = ConexaoInstrumentada(_ConexaoFalsa())
+
+        def ler_lotes():
+            cursor = conn.cursor()
+            cursor.execute("SELECT id_produto FROM produtos")
+            self.assertEqual(Instrumentacao.estatisticas()['comandos'], {})
+            linhas = []
+            while True:
+                lote = cursor.fetchmany(2)
+                if not lote:
+                    return linhas
+                linhas.extend(lote)
+
+        self.assertEqual(len(ler_lotes()), 4)
+        estatisticas = Instrumentacao.estatisticas()
+        comando = estatisticas['comandos']['ler_lotes:SELECT produtos']
+        self.assertEqual((comando['chamadas'], comando['linhas']), (1, 4))
+        self.assertGreaterEqual(comando['max_ms'], 60)
+        self.assertEqual([l['rotulo'] for l in estatisticas['lentas']], ['ler_lotes:SELECT produtos'])
+
+    def test_05_origem_do_fluxo(self):
+        """Consultas em fluxo levam o nome de quem pediu o gerador, não do helper"""
+        Instrumentacao.ativa = True
+        try:
+            def exportar_catalogo():
+                return list(EstoqueModel.iterar_produtos(tamanho_lote=2))
+
+            exportar_catalogo()
+        finally:
+            Instrumentacao.ativa = False
+
+        comandos = Instrumentacao.estatisticas()['comandos']
+        rotulo = 'exportar_catalogo/iterar_produtos:SELECT produtos'
+        self.assertIn(rotulo, comandos)
+        self.assertFalse(any(r.startswith('_iterar_consulta') for r in comandos))
+        self.assertEqual(comandos[rotulo]['chamadas'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
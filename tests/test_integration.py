@@ -70,6 +70,55 @@ class TestIntegration(unittest.TestCase):
         print(f"      ✅ Relatório gerado - {len(movimentacoes_produto)} movimentações")
         
         print("\n✅ TESTE DE INTEGRAÇÃO COMPLETO - SUCESSO!")
+    
+    def test_carga_inicial_em_segundo_plano(self):
+        """Carga inicial da janela: uma só conexão aberta e marcos de tempo registrados"""
+        from config.inicializacao import TemposInicializacao
+        from controllers.estoque_controller import EstoqueController
+        
+        DatabaseConfig.get_pool().fechar()
+        criadas_antes = DatabaseConfig.estatisticas_pool()['conexoes_criadas']
+        TemposInicializacao.iniciar()
+        
+        dados = EstoqueController._carregar_inicial(None, 100)
+        
+        self.assertLessEqual(len(dados['produtos']), 100)
+        self.assertIsInstance(dados['criticos'], list)
+        self.assertEqual(DatabaseConfig.estatisticas_pool()['conexoes_criadas'] - criadas_antes, 1)
+        etapas = [etapa for etapa, _, _ in TemposInicializacao.etapas()]
+        self.assertEqual(etapas, ["banco conectado", "produtos lidos", "alertas lidos"])
+    
+    def test_produto_por_nome_na_movimentacao(self):
+        """Nome digitado sem escolher a sugestão: aceito só se identifica um produto"""
+        from types import SimpleNamespace
+        from controllers.busca_produtos import CacheBuscaProdutos
+        from controllers.estoque_controller import EstoqueController
+        
+        cache = CacheBuscaProdutos(10)
+        cache.guardar("caneta", [{'id_produto': 7, 'nome_produto': "Caneta", 'descricao': ""},
+                                 {'id_produto': 8, 'nome_produto': "Caneta Azul", 'descricao': ""}])
+        cache.guardar("lapis", [{'id_produto': 9, 'nome_produto': "Lápis HB", 'descricao': ""}])
+        controller = SimpleNamespace(cache_buscas=cache)
+        controller._resolver_produto = lambda texto: EstoqueController._resolver_produto(controller, texto)
+        
+        def validar(produto, quantidade="3"):
+            return EstoqueController._validar_movimentacao(
+                controller, {'id_produto': produto, 'quantidade': quantidade})
+        
+        self.assertEqual(validar(" 12 "), (12, 3))
+        self.assertEqual(validar("lapis"), (9, 3))
+        # Duas sugestões, mas só uma com exatamente esse nome
+        self.assertEqual(validar("Caneta"), (7, 3))
+        # Refinada do prefixo "caneta" já buscado
+        self.assertEqual(validar("caneta az"), (8, 3))
+        
+        for produto in ("Borracha", "Ca"):
+            with self.assertRaisesRegex(ValueError, "selecione um produto da lista"):
+                validar(produto)
+        with self.assertRaisesRegex(ValueError, "Informe o produto"):
+            validar("  ")
+        with self.assertRaisesRegex(ValueError, "número inteiro"):
+            validar("12", "dez")
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
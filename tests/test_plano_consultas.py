@@ -0,0 +1,298 @@
+import unittest
+import sys
+import os
+import inspect
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.estoque_model import EstoqueModel
+from config.database import DatabaseConfig
+
+
+class _CursorGravador:
+    """Cursor que anota cada comando executado antes de repassá-lo"""
+
+    def __init__(self, cursor, registro: list):
+        self._cursor = cursor
+        self._registro = registro
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._registro.append((operation, params))
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        if seq_params:
+            self._registro.append((operation, seq_params[0]))
+        return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class _ConexaoGravadora:
+    """Conexão cujos cursores gravam os comandos executados"""
+
+    def __init__(self, conn, registro: list):
+        self._conn = conn
+        self._registro = registro
+
+    def cursor(self, *args, **kwargs):
+        return _CursorGravador(self._conn.cursor(*args, **kwargs), self._registro)
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+class TestPlanoConsultas(unittest.TestCase):
+    """
+    Regressão de planos de execução: roda EXPLAIN em cada comando emitido
+    pelo EstoqueModel e falha se algum fizer varredura completa de tabela
+    (type = ALL) fora das exceções documentadas abaixo. No backend SQLite
+    o plano vem de EXPLAIN QUERY PLAN ("SCAN tabela" sem índice = ALL).
+    """
+
+    PRODUTOS_SEMENTE = 2000
+    MOVIMENTACOES_SEMENTE = 5000
+    ARQUIVADAS_SEMENTE = 2000
+
+    # Varreduras completas deliberadas: método -> tabelas e motivo
+    VARREDURAS_PERMITIDAS = {
+        'listar_produtos': {'produtos'},  # listagem completa do catálogo, por definição
+        'estoque_em': {'produtos'},       # sem ids, o estoque na data cobre todo o catálogo
+    }
+
+    # Métodos que não executam SQL próprio
+    SEM_SQL = {'_intervalo_datas', 'relatorio_movimentacoes',
+               '_atualizar_cache_estoque', 'estatisticas_cache',
+               '_iterar_consulta', '_filtro_dias', '_dia',
+               '_travar_saldos', '_validar_saldos', '_gravar_lote',
+               '_unir_arquivo', '_inicio_mes', 'criar_particoes', '_cursor_linhas'}
+
+    @classmethod
+    def setUpClass(cls):
+        """Popula volume suficiente para o otimizador escolher índices"""
+        print("\n🔎 Preparando dados para análise de planos...")
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany("""
+                    INSERT INTO produtos (nome_produto, descricao, qtd_minima, preco_unitario)
+                    VALUES (%s, %s, %s, %s)
+                """, [(f"Plano Consulta {i:05d}", "Semente de planos", 10, 1.0)
+                      for i in range(cls.PRODUTOS_SEMENTE)])
+                primeiro_id = cursor.lastrowid
+                conn.commit()
+            finally:
+                cursor.close()
+
+        cls.ids = list(range(primeiro_id, primeiro_id + cls.PRODUTOS_SEMENTE))
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': cls.ids[i % len(cls.ids)], 'tipo_movimentacao': 'ENTRADA',
+             'quantidade': 5, 'observacao': 'semente'}
+            for i in range(cls.MOVIMENTACOES_SEMENTE)
+        ], usuario="teste_planos")
+
+        # Histórico antigo, movido para o arquivo
+        antigo = datetime.combine(date.today() - timedelta(days=1100), datetime.min.time())
+        EstoqueModel.registrar_movimentacoes([
+            {'id_produto': cls.ids[i % len(cls.ids)], 'tipo_movimentacao': 'ENTRADA',
+             'quantidade': 1, 'data_movimentacao': antigo + timedelta(minutes=i)}
+            for i in range(cls.ARQUIVADAS_SEMENTE)
+        ], usuario="teste_planos")
+        EstoqueModel.arquivar_movimentacoes((date.today() - timedelta(days=1000)).isoformat())
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("ANALYZE TABLE produtos, movimentacoes, movimentacoes_arquivo, "
+                               "movimentacoes_diarias, estoque_fechamentos")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def _cenarios(self) -> dict:
+        """Uma chamada representativa para cada método do modelo"""
+        # Período seletivo (antes da semente) para exercitar o filtro por data
+        hoje = date.today()
+        inicio = (hoje - timedelta(days=60)).isoformat()
+        fim = (hoje - timedelta(days=30)).isoformat()
+        id_produto = self.ids[0]
+
+        return {
+            'listar_produtos': lambda: EstoqueModel.listar_produtos(),
+            'listar_produtos_pagina': lambda: (
+                EstoqueModel.listar_produtos_pagina(50),
+                EstoqueModel.listar_produtos_pagina(50, apos=("Plano Consulta 01000", id_produto)),
+                EstoqueModel.listar_produtos_pagina(50, antes=("Plano Consulta 01000", id_produto)),
+            ),
+            'adicionar_produto': lambda: EstoqueModel.adicionar_produto("Plano Novo", "", 1, 1.0),
+            'registrar_entrada': lambda: EstoqueModel.registrar_entrada(id_produto, 10, "", "teste_planos"),
+            'registrar_saida': lambda: EstoqueModel.registrar_saida(id_produto, 1, "", "teste_planos"),
+            'registrar_movimentacoes': lambda: EstoqueModel.registrar_movimentacoes([
+                {'id_produto': i, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1}
+                for i in self.ids[:20]
+            ], usuario="teste_planos"),
+            'aplicar_diario': lambda: EstoqueModel.aplicar_diario(uuid.uuid4().hex, [
+                {'seq': n + 1, 'id_produto': i, 'tipo_movimentacao': 'ENTRADA', 'quantidade': 1,
+                 'data_movimentacao': datetime.now() - timedelta(days=n % 3)}
+                for n, i in enumerate(self.ids[:20])
+            ]),
+            '_ajustar_fechamentos': lambda: self._em_transacao(EstoqueModel._ajustar_fechamentos, [
+                {'id_produto': id_produto, 'tipo_movimentacao': 'SAIDA', 'quantidade': 1,
+                 'data_movimentacao': datetime.combine(hoje - timedelta(days=45), datetime.min.time())},
+            ]),
+            'buscar_produtos': lambda: (EstoqueModel.buscar_produtos("Plano Consulta 010"),
+                                        EstoqueModel.buscar_produtos("semente planos")),
+            'produtos_criticos': lambda: EstoqueModel.produtos_criticos(),
+            'iterar_movimentacoes': lambda: (
+                list(EstoqueModel.iterar_movimentacoes(inicio, fim, limite=100)),
+                list(EstoqueModel.iterar_movimentacoes("2000-01-01", fim, limite=100)),
+            ),
+            'obter_produtos': lambda: (EstoqueModel.cache.invalidar(),
+                                       EstoqueModel.obter_produtos(self.ids[:50])),
+            'obter_produto': lambda: (EstoqueModel.cache.invalidar(),
+                                      EstoqueModel.obter_produto(id_produto)),
+            'iterar_exportacao_movimentacoes': lambda: (
+                list(EstoqueModel.iterar_exportacao_movimentacoes(apos_id=10**9)),
+                list(EstoqueModel.iterar_exportacao_movimentacoes(apos_id=10**9, lacunas=[10**9 - 5, 10**9 - 2])),
+            ),
+            'iterar_produtos': lambda: list(EstoqueModel.iterar_produtos(apos_id=self.ids[-10])),
+            'importar_produtos': lambda: EstoqueModel.importar_produtos([
+                {'nome_produto': f"Plano Importado {i}", 'descricao': "", 'qtd_minima': 1,
+                 'preco_unitario': 1.0, 'qtd_estoque': i}
+                for i in range(20)
+            ], usuario="teste_planos", tamanho_lote=8),
+            '_inserir_lote_produtos': lambda: self._em_transacao(EstoqueModel._inserir_lote_produtos, [
+                {'nome_produto': f"Plano Lote {i}", 'descricao': "", 'qtd_minima': 1,
+                 'preco_unitario': 1.0, 'qtd_estoque': 0}
+                for i in range(8)
+            ]),
+            'revalidar_cache': lambda: (EstoqueModel.cache.invalidar(),
+                                        EstoqueModel.revalidar_cache(),
+                                        EstoqueModel.revalidar_cache()),
+            'alteracoes_produtos': lambda: (EstoqueModel.alteracoes_produtos(),
+                                            EstoqueModel.alteracoes_produtos(datetime.now())),
+            'totais_periodo': lambda: EstoqueModel.totais_periodo(inicio, fim),
+            'resumo_por_produto': lambda: EstoqueModel.resumo_por_produto(inicio, fim),
+            'reconstruir_resumo_diario': lambda: EstoqueModel.reconstruir_resumo_diario(inicio, fim),
+            'registrar_fechamento': lambda: EstoqueModel.registrar_fechamento(fim),
+            'arquivar_movimentacoes': lambda: EstoqueModel.arquivar_movimentacoes(
+                (hoje - timedelta(days=400)).isoformat()),
+            'estoque_em': lambda: (EstoqueModel.estoque_em(inicio, self.ids[:20]),
+                                   EstoqueModel.estoque_em(date.today().isoformat(), self.ids[:20]),
+                                   EstoqueModel.estoque_em(fim)),
+        }
+
+    @staticmethod
+    def _em_transacao(funcao, *args):
+        """Chama um auxiliar do modelo que recebe o cursor e desfaz o que ele gravou"""
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                conn.start_transaction()
+                return funcao(cursor, *args)
+            finally:
+                conn.rollback()
+                cursor.close()
+
+    @contextmanager
+    def _gravar(self, registro: list):
+        original = DatabaseConfig.conexao
+
+        @contextmanager
+        def conexao_gravadora():
+            with original() as conn:
+                yield _ConexaoGravadora(conn, registro)
+
+        with mock.patch.object(DatabaseConfig, 'conexao', conexao_gravadora):
+            yield
+
+    # Palavras que podem seguir o nome da tabela no lugar de um apelido
+    _NAO_APELIDOS = {'WHERE', 'SET', 'ON', 'LEFT', 'RIGHT', 'INNER', 'JOIN', 'ORDER',
+                     'GROUP', 'LIMIT', 'VALUES', 'USING', 'FOR'}
+
+    def _explicar(self, sql: str, params) -> list:
+        if DatabaseConfig.BACKEND == 'sqlite':
+            return self._explicar_sqlite(sql, params)
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + sql, params)
+                # <union1,2> é a tabela temporária do UNION ALL com o arquivo
+                return [linha for linha in cursor.fetchall()
+                        if not (linha['table'] or "").startswith("<union")]
+            finally:
+                cursor.close()
+
+    def _explicar_sqlite(self, sql: str, params) -> list:
+        """Plano do SQLite nas colunas usadas do EXPLAIN do MySQL"""
+        tabelas = {}
+        for tabela, apelido in re.findall(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?",
+                                          sql, re.IGNORECASE):
+            tabelas[tabela] = tabela
+            if apelido and apelido.upper() not in self._NAO_APELIDOS:
+                tabelas[apelido] = tabela
+
+        with DatabaseConfig.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plano = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        linhas = []
+        for *_, detalhe in plano:
+            passo = re.match(r"(SCAN|SEARCH) (\w+)(.*)", detalhe)
+            if not passo or passo.group(2) not in tabelas:
+                continue
+            if passo.group(1) == 'SEARCH':
+                tipo = 'ref'
+            else:
+                # "VIRTUAL TABLE INDEX" é a consulta na tabela FTS5, não uma varredura
+                tipo = 'index' if re.search(r"USING|VIRTUAL TABLE INDEX", passo.group(3)) else 'ALL'
+            linhas.append({'table': tabelas[passo.group(2)], 'type': tipo, 'possible_keys': detalhe})
+        return linhas
+
+    def test_todos_os_metodos_tem_cenario(self):
+        """Todo método novo do modelo precisa entrar nesta suíte"""
+        metodos = {nome for nome, _ in inspect.getmembers(EstoqueModel, inspect.isfunction)}
+        sem_cenario = metodos - set(self._cenarios()) - self.SEM_SQL
+        self.assertEqual(sem_cenario, set(), "Adicione cenários de EXPLAIN para estes métodos")
+
+    def test_sem_varredura_completa(self):
+        """Nenhum comando do modelo deve regredir para varredura completa"""
+        for metodo, chamada in self._cenarios().items():
+            registro = []
+            with self._gravar(registro):
+                chamada()
+
+            self.assertTrue(registro, f"{metodo} não executou SQL")
+            for sql, params in registro:
+                comando = sql.strip().split(None, 1)[0].upper()
+                if comando not in ('SELECT', 'UPDATE', 'DELETE'):
+                    continue
+
+                with self.subTest(metodo=metodo, sql=" ".join(sql.split())[:80]):
+                    for linha in self._explicar(sql, params):
+                        if linha['type'] != 'ALL':
+                            continue
+                        self.assertIn(
+                            linha['table'], self.VARREDURAS_PERMITIDAS.get(metodo, set()),
+                            f"{metodo}: varredura completa em {linha['table']} "
+                            f"(possible_keys={linha['possible_keys']})"
+                        )
+        print("   ✅ Nenhuma varredura completa inesperada")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
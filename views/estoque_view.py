@@ -1,10 +1,116 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Callable
+from typing import Callable, Optional
+
+class AutocompletarProduto:
+    """
+    Sugestões de produtos sob um campo de ID enquanto o operador digita
+
+    Cada tecla reinicia uma espera de ``ESPERA_MS``; só quando ela termina
+    a busca é pedida com ``ao_buscar(texto)``. A resposta chega por
+    ``exibir`` e é descartada se o texto já mudou. Escolher uma sugestão
+    (Enter, clique duplo) põe o ID no campo e o nome ao lado.
+    """
+    
+    ESPERA_MS = 250
+    MIN_CARACTERES = 2
+    
+    def __init__(self, entry: ttk.Entry, label_produto: ttk.Label, ao_buscar: Callable[[str], None]):
+        self.entry = entry
+        self.label_produto = label_produto
+        self.ao_buscar = ao_buscar
+        self._agendamento = None
+        self._produtos = []
+        
+        self._janela = tk.Toplevel(entry)
+        self._janela.withdraw()
+        self._janela.overrideredirect(True)
+        self._lista = tk.Listbox(self._janela, height=8, width=70, activestyle='dotbox')
+        self._lista.pack(fill='both', expand=True)
+        
+        entry.bind('<KeyRelease>', self._ao_digitar)
+        entry.bind('<Down>', self._ir_para_lista)
+        entry.bind('<Escape>', lambda e: self.fechar())
+        entry.bind('<FocusOut>', lambda e: entry.after(150, self._fechar_sem_foco))
+        self._lista.bind('<Return>', self._escolher)
+        self._lista.bind('<Double-Button-1>', self._escolher)
+        self._lista.bind('<Escape>', lambda e: (self.fechar(), self.entry.focus_set()))
+        self._lista.bind('<FocusOut>', lambda e: entry.after(150, self._fechar_sem_foco))
+    
+    def _ao_digitar(self, evento):
+        if evento.keysym in ('Down', 'Up', 'Escape', 'Return', 'Tab'):
+            return
+        if self._agendamento:
+            self.entry.after_cancel(self._agendamento)
+            self._agendamento = None
+        
+        self.label_produto.configure(text="")
+        texto = self.entry.get().strip()
+        if len(texto) < self.MIN_CARACTERES and not texto.isdigit():
+            self.fechar()
+            return
+        self._agendamento = self.entry.after(self.ESPERA_MS, self._buscar)
+    
+    def _buscar(self):
+        self._agendamento = None
+        self.ao_buscar(self.entry.get().strip())
+    
+    def exibir(self, texto: str, produtos: list):
+        """Mostra as sugestões do ``texto``, se ele ainda for o do campo"""
+        if texto != self.entry.get().strip():
+            return
+        self._produtos = produtos
+        if not produtos:
+            self.fechar()
+            self.label_produto.configure(text="Nenhum produto encontrado")
+            return
+        
+        self._lista.delete(0, 'end')
+        for produto in produtos:
+            self._lista.insert('end', f"{produto['id_produto']:>7}  {produto['nome_produto'][:45]:<45} "
+                                      f"estoque: {produto['qtd_estoque']}")
+        self._lista.configure(height=min(len(produtos), 8))
+        self._janela.geometry(f"+{self.entry.winfo_rootx()}"
+                              f"+{self.entry.winfo_rooty() + self.entry.winfo_height()}")
+        self._janela.deiconify()
+        self._janela.lift()
+    
+    def _ir_para_lista(self, evento=None):
+        if self._produtos and self._janela.winfo_viewable():
+            self._lista.focus_set()
+            self._lista.selection_clear(0, 'end')
+            self._lista.selection_set(0)
+            self._lista.activate(0)
+    
+    def _escolher(self, evento=None):
+        selecao = self._lista.curselection()
+        if not selecao:
+            return
+        produto = self._produtos[selecao[0]]
+        self.entry.delete(0, 'end')
+        self.entry.insert(0, str(produto['id_produto']))
+        self.label_produto.configure(text=f"{produto['nome_produto']} (estoque: {produto['qtd_estoque']})")
+        self.fechar()
+        self.entry.focus_set()
+        self.entry.icursor('end')
+    
+    def _fechar_sem_foco(self):
+        foco = self.entry.focus_get()
+        if foco not in (self.entry, self._lista):
+            self.fechar()
+    
+    def fechar(self):
+        self._janela.withdraw()
+
 
 class EstoqueView:
     """Interface gráfica do sistema de estoque"""
     
+    # Janela virtual da lista de produtos
+    TAMANHO_PAGINA_PRODUTOS = 100
+    MAX_LINHAS_PRODUTOS = 500
+    MARGEM_ROLAGEM = 0.1
+    
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("Sistema de Controle de Estoque")
@@ -17,12 +123,33 @@ class EstoqueView:
         self.on_gerar_relatorio: Callable = None
         self.on_listar_produtos: Callable = None
         self.on_atualizar_alertas: Callable = None
+        self.on_pagina_produtos: Callable = None
+        self.on_estoque_em: Callable = None
+        self.on_diagnostico: Callable = None
+        self.on_instrumentar: Callable = None
+        self.on_buscar_produtos: Callable = None
+        
+        # Estado da janela de produtos carregada na Treeview
+        self._linhas_produtos = {}  # id_produto -> valores exibidos (iid = str(id))
+        self._linhas_alertas = {}
+        self._inicio_produtos = True
+        self._fim_produtos = True
+        self._carregando_produtos = False
+        self._agendamento_diagnostico = None
         
         self._criar_interface()
     
     def _criar_interface(self):
         """Cria todos os componentes da interface"""
         
+        # Barra de status (operação em andamento à esquerda, diário à direita)
+        frame_status = ttk.Frame(self.root)
+        frame_status.pack(side='bottom', fill='x')
+        self.label_status = ttk.Label(frame_status, text="", anchor='w', padding=(10, 2))
+        self.label_status.pack(side='left', fill='x', expand=True)
+        self.label_diario = ttk.Label(frame_status, text="", anchor='e', padding=(10, 2))
+        self.label_diario.pack(side='right')
+        
         # Notebook (abas)
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
@@ -42,6 +169,12 @@ class EstoqueView:
         self._criar_aba_movimentacao()
         self._criar_aba_relatorios()
         self._criar_aba_alertas()
+        
+        # Aba de diagnóstico: criada oculta, alternada com Ctrl+Shift+D
+        self.tab_diagnostico = ttk.Frame(self.notebook)
+        self._criar_aba_diagnostico()
+        self.root.bind_all('<Control-Shift-D>', self._alternar_diagnostico)
+        self.root.bind_all('<Control-Shift-d>', self._alternar_diagnostico)
     
     def _criar_aba_produtos(self):
         """Aba de cadastro e listagem de produtos"""
@@ -89,12 +222,13 @@ class EstoqueView:
             self.tree_produtos.heading(col, text=col)
             self.tree_produtos.column(col, width=largura)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_lista, orient='vertical', command=self.tree_produtos.yview)
-        self.tree_produtos.configure(yscroll=scrollbar.set)
+        # Scrollbar (a rolagem dispara o carregamento de novas páginas)
+        self.scrollbar_produtos = ttk.Scrollbar(frame_lista, orient='vertical',
+                                                command=self.tree_produtos.yview)
+        self.tree_produtos.configure(yscroll=self._ao_rolar_produtos)
         
         self.tree_produtos.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.scrollbar_produtos.pack(side='right', fill='y')
         
         # Botão atualizar
         ttk.Button(frame_lista, text="🔄 Atualizar Lista", 
@@ -107,9 +241,11 @@ class EstoqueView:
         frame_entrada = ttk.LabelFrame(self.tab_movimentacao, text="➕ Entrada de Insumos", padding=15)
         frame_entrada.pack(fill='x', padx=10, pady=10)
         
-        ttk.Label(frame_entrada, text="ID Produto:").grid(row=0, column=0, sticky='w', pady=5)
-        self.entry_entrada_id = ttk.Entry(frame_entrada, width=15)
+        ttk.Label(frame_entrada, text="Produto (ID ou nome):").grid(row=0, column=0, sticky='w', pady=5)
+        self.entry_entrada_id = ttk.Entry(frame_entrada, width=25)
         self.entry_entrada_id.grid(row=0, column=1, pady=5, padx=5)
+        self.label_entrada_produto = ttk.Label(frame_entrada, text="", foreground='gray')
+        self.label_entrada_produto.grid(row=0, column=4, sticky='w', padx=(20, 0))
         
         ttk.Label(frame_entrada, text="Quantidade:").grid(row=0, column=2, sticky='w', pady=5, padx=(20,0))
         self.entry_entrada_qtd = ttk.Entry(frame_entrada, width=15)
@@ -126,9 +262,11 @@ class EstoqueView:
         frame_saida = ttk.LabelFrame(self.tab_movimentacao, text="➖ Saída de Insumos", padding=15)
         frame_saida.pack(fill='x', padx=10, pady=10)
         
-        ttk.Label(frame_saida, text="ID Produto:").grid(row=0, column=0, sticky='w', pady=5)
-        self.entry_saida_id = ttk.Entry(frame_saida, width=15)
+        ttk.Label(frame_saida, text="Produto (ID ou nome):").grid(row=0, column=0, sticky='w', pady=5)
+        self.entry_saida_id = ttk.Entry(frame_saida, width=25)
         self.entry_saida_id.grid(row=0, column=1, pady=5, padx=5)
+        self.label_saida_produto = ttk.Label(frame_saida, text="", foreground='gray')
+        self.label_saida_produto.grid(row=0, column=4, sticky='w', padx=(20, 0))
         
         ttk.Label(frame_saida, text="Quantidade:").grid(row=0, column=2, sticky='w', pady=5, padx=(20,0))
         self.entry_saida_qtd = ttk.Entry(frame_saida, width=15)
@@ -140,6 +278,13 @@ class EstoqueView:
         
         ttk.Button(frame_saida, text="✅ Registrar Saída", 
                    command=self._handle_saida).grid(row=2, column=0, columnspan=4, pady=10)
+        
+        # Autocompletar por nome/descrição nos campos de produto
+        self._autocompletar = {
+            campo: AutocompletarProduto(entry, label, lambda texto, campo=campo: self._handle_buscar(campo, texto))
+            for campo, entry, label in (('entrada', self.entry_entrada_id, self.label_entrada_produto),
+                                        ('saida', self.entry_saida_id, self.label_saida_produto))
+        }
     
     def _criar_aba_relatorios(self):
         """Aba de geração de relatórios"""
@@ -157,8 +302,29 @@ class EstoqueView:
         self.entry_data_fim.grid(row=0, column=3, pady=5, padx=5)
         self.entry_data_fim.insert(0, "AAAA-MM-DD")
         
+        # Sem a listagem, o relatório usa só o resumo diário (rápido em períodos longos)
+        self.var_detalhar_relatorio = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame_filtros, text="Listar movimentações",
+                        variable=self.var_detalhar_relatorio).grid(row=1, column=0, columnspan=4, sticky='w')
+        
         ttk.Button(frame_filtros, text="📊 Gerar Relatório", 
-                   command=self._handle_gerar_relatorio).grid(row=1, column=0, columnspan=4, pady=10)
+                   command=self._handle_gerar_relatorio).grid(row=2, column=0, columnspan=4, pady=10)
+        
+        # Estoque em uma data passada (auditoria)
+        frame_estoque_em = ttk.LabelFrame(self.tab_relatorios, text="Estoque em uma Data", padding=15)
+        frame_estoque_em.pack(fill='x', padx=10, pady=(0, 10))
+        
+        ttk.Label(frame_estoque_em, text="Data (AAAA-MM-DD):").grid(row=0, column=0, sticky='w', pady=5)
+        self.entry_estoque_data = ttk.Entry(frame_estoque_em, width=20)
+        self.entry_estoque_data.grid(row=0, column=1, pady=5, padx=5)
+        self.entry_estoque_data.insert(0, "AAAA-MM-DD")
+        
+        ttk.Label(frame_estoque_em, text="ID Produto (opcional):").grid(row=0, column=2, sticky='w', pady=5, padx=(20,0))
+        self.entry_estoque_id = ttk.Entry(frame_estoque_em, width=10)
+        self.entry_estoque_id.grid(row=0, column=3, pady=5, padx=5)
+        
+        ttk.Button(frame_estoque_em, text="📦 Estoque na Data", 
+                   command=self._handle_estoque_em).grid(row=0, column=4, padx=(20,0), pady=5)
         
         # Área de resultados
         frame_resultado = ttk.LabelFrame(self.tab_relatorios, text="Resultado", padding=15)
@@ -197,6 +363,121 @@ class EstoqueView:
         ttk.Button(frame_alertas, text="🔄 Atualizar Alertas", 
                    command=self._handle_atualizar_alertas).pack(pady=5)
     
+    INTERVALO_DIAGNOSTICO_MS = 2000
+    
+    def _criar_aba_diagnostico(self):
+        """Aba oculta com medições dos comandos SQL, do pool e do cache"""
+        
+        frame_controles = ttk.Frame(self.tab_diagnostico, padding=(10, 10, 10, 0))
+        frame_controles.pack(fill='x')
+        
+        self.var_instrumentacao = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_controles, text="Instrumentação ativa",
+                        variable=self.var_instrumentacao,
+                        command=self._handle_instrumentar).pack(side='left')
+        ttk.Button(frame_controles, text="🔄 Atualizar",
+                   command=self._atualizar_diagnostico).pack(side='left', padx=10)
+        
+        self.label_diagnostico = ttk.Label(self.tab_diagnostico, text="", justify='left',
+                                           font=('Courier', 9), padding=(10, 5))
+        self.label_diagnostico.pack(fill='x')
+        
+        frame_comandos = ttk.LabelFrame(self.tab_diagnostico, text="Comandos SQL", padding=10)
+        frame_comandos.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        colunas = ('Comando', 'Chamadas', 'Erros', 'Linhas', 'Média (ms)', 'p95 (ms)',
+                   'Máx (ms)', 'Total (ms)')
+        self.tree_diagnostico = ttk.Treeview(frame_comandos, columns=colunas,
+                                             show='headings', height=12)
+        larguras = [360, 80, 60, 90, 90, 90, 90, 100]
+        for col, largura in zip(colunas, larguras):
+            self.tree_diagnostico.heading(col, text=col)
+            self.tree_diagnostico.column(col, width=largura, anchor='w' if col == 'Comando' else 'e')
+        
+        scrollbar_diag = ttk.Scrollbar(frame_comandos, orient='vertical',
+                                       command=self.tree_diagnostico.yview)
+        self.tree_diagnostico.configure(yscroll=scrollbar_diag.set)
+        self.tree_diagnostico.pack(side='left', fill='both', expand=True)
+        scrollbar_diag.pack(side='right', fill='y')
+        
+        frame_lentas = ttk.LabelFrame(self.tab_diagnostico, text="Consultas lentas recentes", padding=10)
+        frame_lentas.pack(fill='both', expand=True, padx=10, pady=(5, 10))
+        self.text_lentas = tk.Text(frame_lentas, height=8, wrap='none', font=('Courier', 9))
+        self.text_lentas.pack(fill='both', expand=True)
+    
+    def _diagnostico_visivel(self) -> bool:
+        return str(self.tab_diagnostico) in self.notebook.tabs()
+    
+    def _alternar_diagnostico(self, event=None):
+        if self._diagnostico_visivel():
+            self.notebook.forget(self.tab_diagnostico)
+            if self._agendamento_diagnostico:
+                self.root.after_cancel(self._agendamento_diagnostico)
+                self._agendamento_diagnostico = None
+            return
+        self.notebook.add(self.tab_diagnostico, text="🩺 Diagnóstico")
+        self.notebook.select(self.tab_diagnostico)
+        self._atualizar_diagnostico(agendar=True)
+    
+    def _atualizar_diagnostico(self, agendar: bool = False):
+        """Pede os números ao controller; repete enquanto a aba estiver aberta"""
+        if not self._diagnostico_visivel():
+            return
+        if self.on_diagnostico:
+            self.on_diagnostico()
+        if agendar:
+            self._agendamento_diagnostico = self.root.after(
+                self.INTERVALO_DIAGNOSTICO_MS, self._atualizar_diagnostico, True)
+    
+    def _handle_instrumentar(self):
+        if self.on_instrumentar:
+            self.on_instrumentar(self.var_instrumentacao.get())
+    
+    def exibir_diagnostico(self, dados: dict):
+        """Mostra as medições (``consultas``, ``pool`` e ``cache``) na aba de diagnóstico"""
+        consultas = dados['consultas']
+        pool = dados['pool']
+        cache = dados['cache']
+        aquisicao = consultas['aquisicao_conexao']
+        self.var_instrumentacao.set(consultas['ativa'])
+        
+        self.label_diagnostico.configure(text=(
+            f"Pool: {pool['abertas']}/{pool['tamanho']} abertas, {pool['ociosas']} ociosas, "
+            f"{pool['checkouts']} checkouts, espera máx {pool['espera_max_ms']:.1f} ms\n"
+            f"Aquisição de conexão: média {aquisicao['media_ms']:.2f} ms, "
+            f"p95 {aquisicao['p95_ms']:.2f} ms, máx {aquisicao['max_ms']:.2f} ms\n"
+            f"Cache: {cache['itens']}/{cache['tamanho_max']} itens, "
+            f"taxa de acerto {cache['taxa_acerto']:.1%}\n"
+            f"Consulta lenta a partir de {consultas['limite_lenta_ms']:.0f} ms\n"
+            f"Inicialização: " + (", ".join(f"{etapa} {ms:.0f} ms"
+                                            for etapa, ms, _ in dados.get('inicializacao', [])) or "-")
+            + self._descrever_diario(dados.get('diario'))
+            + self._descrever_alteracoes(dados.get('alteracoes'))
+        ))
+        
+        # Ordenado pelo tempo total; itens identificados pelo rótulo
+        comandos = sorted(consultas['comandos'].items(),
+                          key=lambda item: item[1]['total_ms'], reverse=True)
+        tree = self.tree_diagnostico
+        rotulos = {rotulo for rotulo, _ in comandos}
+        for iid in tree.get_children():
+            if iid not in rotulos:
+                tree.delete(iid)
+        for indice, (rotulo, c) in enumerate(comandos):
+            valores = (rotulo, c['chamadas'], c['erros'], c['linhas'], f"{c['media_ms']:.2f}",
+                       f"{c['p95_ms']:.2f}", f"{c['max_ms']:.2f}", f"{c['total_ms']:.1f}")
+            if tree.exists(rotulo):
+                tree.item(rotulo, values=valores)
+                if tree.index(rotulo) != indice:
+                    tree.move(rotulo, '', indice)
+            else:
+                tree.insert('', indice, iid=rotulo, values=valores)
+        
+        self.text_lentas.delete('1.0', tk.END)
+        for lenta in reversed(consultas['lentas']):
+            self.text_lentas.insert(tk.END, f"{lenta['quando']} {lenta['ms']:>9.1f} ms  "
+                                            f"{lenta['rotulo']}  {lenta['sql']}\n")
+    
     # Handlers
     def _handle_adicionar_produto(self):
         if self.on_adicionar_produto:
@@ -226,18 +507,53 @@ class EstoqueView:
             }
             self.on_saida_insumo(dados)
     
+    def _handle_buscar(self, campo: str, texto: str):
+        if self.on_buscar_produtos:
+            self.on_buscar_produtos(campo, texto)
+    
+    def exibir_sugestoes(self, campo: str, texto: str, produtos: list):
+        """Mostra sob o campo ('entrada' ou 'saida') os produtos encontrados para ``texto``"""
+        self._autocompletar[campo].exibir(texto, produtos)
+    
     def _handle_gerar_relatorio(self):
         if self.on_gerar_relatorio:
             filtros = {
                 'data_inicio': self.entry_data_inicio.get(),
-                'data_fim': self.entry_data_fim.get()
+                'data_fim': self.entry_data_fim.get(),
+                'detalhar': self.var_detalhar_relatorio.get()
             }
             self.on_gerar_relatorio(filtros)
     
+    def _handle_estoque_em(self):
+        if self.on_estoque_em:
+            filtros = {
+                'data': self.entry_estoque_data.get(),
+                'id_produto': self.entry_estoque_id.get()
+            }
+            self.on_estoque_em(filtros)
+    
     def _handle_listar_produtos(self):
         if self.on_listar_produtos:
             self.on_listar_produtos()
     
+    def _ao_rolar_produtos(self, primeiro, ultimo):
+        """Atualiza a scrollbar e pede a página vizinha ao se aproximar da borda"""
+        self.scrollbar_produtos.set(primeiro, ultimo)
+        
+        if self._carregando_produtos or not self.on_pagina_produtos:
+            return
+        
+        itens = self.tree_produtos.get_children()
+        if not itens:
+            return
+        
+        if float(ultimo) >= 1 - self.MARGEM_ROLAGEM and not self._fim_produtos:
+            self._carregando_produtos = True
+            self.on_pagina_produtos('proxima', self._chave_produto(itens[-1]))
+        elif float(primeiro) <= self.MARGEM_ROLAGEM and not self._inicio_produtos:
+            self._carregando_produtos = True
+            self.on_pagina_produtos('anterior', self._chave_produto(itens[0]))
+    
     def _handle_atualizar_alertas(self):
         if self.on_atualizar_alertas:
             self.on_atualizar_alertas()
@@ -249,39 +565,306 @@ class EstoqueView:
         self.entry_preco.delete(0, tk.END)
     
     # Métodos de atualização de dados
+    @staticmethod
+    def _sincronizar_tree(tree: ttk.Treeview, linhas: dict, novas: list):
+        """
+        Leva a Treeview ao conteúdo de ``novas`` aplicando só as diferenças
+        
+        Args:
+            tree: Treeview cujos itens usam str(id_produto) como iid
+            linhas: Mapa id_produto -> valores exibidos (atualizado no lugar)
+            novas: Lista ordenada de (id_produto, valores)
+        
+        Linhas que sumiram são removidas, novas são inseridas na posição
+        certa e as existentes só são tocadas se algum valor mudou (ou se a
+        ordem mudou). Seleção e rolagem das linhas mantidas são preservadas.
+        """
+        novos_ids = {id_produto for id_produto, _ in novas}
+        removidos = [id_produto for id_produto in linhas if id_produto not in novos_ids]
+        if removidos:
+            tree.delete(*(str(id_produto) for id_produto in removidos))
+            for id_produto in removidos:
+                del linhas[id_produto]
+        
+        atuais = [int(iid) for iid in tree.get_children()]
+        ordem_ok = atuais == [id_produto for id_produto, _ in novas if id_produto in linhas]
+        
+        for indice, (id_produto, valores) in enumerate(novas):
+            iid = str(id_produto)
+            if id_produto in linhas:
+                if linhas[id_produto] != valores:
+                    tree.item(iid, values=valores)
+                    linhas[id_produto] = valores
+                if not ordem_ok and tree.index(iid) != indice:
+                    tree.move(iid, '', indice)
+            else:
+                tree.insert('', indice, iid=iid, values=valores)
+                linhas[id_produto] = valores
+    
+    @staticmethod
+    def _valores_produto(p: dict) -> tuple:
+        return (
+            p['id_produto'], 
+            p['nome_produto'], 
+            p['descricao'],
+            p['qtd_estoque'], 
+            p['qtd_minima'], 
+            f"R$ {p['preco_unitario']:.2f}"
+        )
+    
+    def _chave_produto(self, iid: str) -> tuple:
+        """Chave de paginação (nome, id) de uma linha da janela"""
+        valores = self._linhas_produtos[int(iid)]
+        return (valores[1], valores[0])
+    
+    def _inserir_produto(self, p: dict, posicao):
+        valores = self._valores_produto(p)
+        self.tree_produtos.insert('', posicao, iid=str(p['id_produto']), values=valores)
+        self._linhas_produtos[p['id_produto']] = valores
+    
+    def _remover_produtos(self, itens):
+        self.tree_produtos.delete(*itens)
+        for iid in itens:
+            del self._linhas_produtos[int(iid)]
+    
+    def janela_produtos(self) -> tuple:
+        """
+        Descreve a janela atual para recarregá-la sem perder a posição
+        
+        Returns:
+            tuple: (chave ``apos`` para o modelo, limite de linhas)
+        """
+        itens = self.tree_produtos.get_children()
+        limite = max(len(itens), self.TAMANHO_PAGINA_PRODUTOS)
+        if not itens or self._inicio_produtos:
+            return None, limite
+        # (nome, id - 1) como chave exclusiva inclui o próprio primeiro item
+        nome, id_produto = self._chave_produto(itens[0])
+        return (nome, id_produto - 1), limite
+    
     def atualizar_lista_produtos(self, produtos: list):
-        """Atualiza a Treeview de produtos"""
-        self.tree_produtos.delete(*self.tree_produtos.get_children())
+        """Atualiza a janela de produtos com uma recarga completa dela"""
+        self.anexar_pagina_produtos(produtos, 'recarregar')
+    
+    def _na_janela(self, nome: str, id_produto: int) -> bool:
+        """Se a chave (nome, id) cai no intervalo carregado (nomes sem caixa, como no banco)"""
+        itens = self.tree_produtos.get_children()
+        if not itens:
+            return self._inicio_produtos and self._fim_produtos
+        
+        def chave(iid: str) -> tuple:
+            nome_item, id_item = self._chave_produto(iid)
+            return (nome_item.casefold(), id_item)
+        
+        alvo = (nome.casefold(), id_produto)
+        if not self._inicio_produtos and alvo < chave(itens[0]):
+            return False
+        if not self._fim_produtos and alvo > chave(itens[-1]):
+            return False
+        return True
+    
+    def atualizar_produtos(self, produtos: list) -> bool:
+        """
+        Atualiza no lugar só as células alteradas dos produtos informados que estão visíveis
+        
+        Returns:
+            bool: True se a janela precisa ser recarregada: um produto fora
+                  dela (criado ou renomeado em outro posto) passou a cair
+                  no intervalo carregado, ou um visível mudou de nome e,
+                  com isso, de posição
+        """
+        recarregar = False
+        for p in produtos:
+            valores = self._valores_produto(p)
+            atual = self._linhas_produtos.get(p['id_produto'])
+            if atual is None:
+                recarregar = recarregar or self._na_janela(p['nome_produto'], p['id_produto'])
+            elif atual[1] != valores[1]:
+                recarregar = True
+            elif atual != valores:
+                self.tree_produtos.item(str(p['id_produto']), values=valores)
+                self._linhas_produtos[p['id_produto']] = valores
+        return recarregar
+    
+    def anexar_pagina_produtos(self, produtos: list, direcao: str):
+        """
+        Carrega uma página na janela virtual de produtos
+        
+        Args:
+            produtos: Página retornada pelo modelo, em ordem crescente
+            direcao: 'recarregar' (substitui o conteúdo da janela aplicando
+                     só as diferenças), 'proxima' (anexa ao fim) ou
+                     'anterior' (insere no topo)
+        
+        A janela guarda no máximo ``MAX_LINHAS_PRODUTOS`` linhas; ao crescer
+        por um lado, as linhas do lado oposto são descartadas e a rolagem é
+        ajustada para o usuário não perder a posição.
+        """
+        self._carregando_produtos = False
+        completa = len(produtos) >= self.TAMANHO_PAGINA_PRODUTOS
+        
+        total_antes = len(self.tree_produtos.get_children())
+        primeiro_antes = self.tree_produtos.yview()[0] * total_antes
+        
+        if direcao == 'recarregar':
+            itens = self.tree_produtos.get_children()
+            topo = itens[int(primeiro_antes)] if itens else None
+            
+            _, limite = self.janela_produtos()
+            self._sincronizar_tree(self.tree_produtos, self._linhas_produtos,
+                                   [(p['id_produto'], self._valores_produto(p)) for p in produtos])
+            self._fim_produtos = len(produtos) < limite
+            
+            itens = self.tree_produtos.get_children()
+            excesso = max(0, len(itens) - self.MAX_LINHAS_PRODUTOS)
+            if excesso:
+                self._remover_produtos(itens[-excesso:])
+                self._fim_produtos = False
+            
+            # Mantém no topo a mesma linha que estava lá antes da recarga
+            total_depois = len(self.tree_produtos.get_children())
+            if topo and self.tree_produtos.exists(topo) and total_depois:
+                self.tree_produtos.yview_moveto(self.tree_produtos.index(topo) / total_depois)
+            return
+        
+        if not produtos:
+            if direcao == 'proxima':
+                self._fim_produtos = True
+            else:
+                self._inicio_produtos = True
+            return
+        
+        if direcao == 'proxima':
+            for p in produtos:
+                self._inserir_produto(p, 'end')
+            self._fim_produtos = not completa
+            
+            itens = self.tree_produtos.get_children()
+            excesso = max(0, len(itens) - self.MAX_LINHAS_PRODUTOS)
+            if excesso:
+                self._remover_produtos(itens[:excesso])
+                self._inicio_produtos = False
+            primeiro_depois = primeiro_antes - excesso
+        else:
+            for posicao, p in enumerate(produtos):
+                self._inserir_produto(p, posicao)
+            self._inicio_produtos = not completa
+            
+            itens = self.tree_produtos.get_children()
+            excesso = max(0, len(itens) - self.MAX_LINHAS_PRODUTOS)
+            if excesso:
+                self._remover_produtos(itens[-excesso:])
+                self._fim_produtos = False
+            primeiro_depois = primeiro_antes + len(produtos)
+        
+        total_depois = len(self.tree_produtos.get_children())
+        self.tree_produtos.yview_moveto(max(0.0, primeiro_depois) / total_depois)
+    
+    def cancelar_pagina_produtos(self):
+        """Libera a janela para novos pedidos após falha ao carregar uma página"""
+        self._carregando_produtos = False
+    
+    @staticmethod
+    def _valores_alerta(p: dict) -> tuple:
+        percentual = (p['qtd_estoque'] / p['qtd_minima']) * 100 if p['qtd_minima'] > 0 else 0
+        status = "🔴 CRÍTICO" if percentual < 50 else "🟡 ATENÇÃO"
+        return (
+            status, 
+            p['id_produto'], 
+            p['nome_produto'],
+            p['qtd_estoque'], 
+            p['qtd_minima'], 
+            p['qtd_minima'] - p['qtd_estoque']
+        )
+    
+    def atualizar_alertas_produtos(self, produtos: list):
+        """
+        Reavalia o alerta só dos produtos informados (ex.: após uma movimentação)
+        
+        Produtos que ficaram críticos entram na posição certa (déficit
+        decrescente), os que saíram da faixa crítica são removidos e os
+        demais têm só as células alteradas reescritas.
+        """
         for p in produtos:
-            self.tree_produtos.insert('', 'end', values=(
-                p['id_produto'], 
-                p['nome_produto'], 
-                p['descricao'],
-                p['qtd_estoque'], 
-                p['qtd_minima'], 
-                f"R$ {p['preco_unitario']:.2f}"
-            ))
+            id_produto = p['id_produto']
+            iid = str(id_produto)
+            critico = p['qtd_estoque'] < p['qtd_minima']
+            atual = self._linhas_alertas.get(id_produto)
+            
+            if not critico:
+                if atual is not None:
+                    self.tree_alertas.delete(iid)
+                    del self._linhas_alertas[id_produto]
+                continue
+            
+            valores = self._valores_alerta(p)
+            if atual == valores:
+                continue
+            if atual is not None:
+                self.tree_alertas.delete(iid)
+                del self._linhas_alertas[id_produto]
+            
+            deficit = valores[-1]
+            posicao = 0
+            for outro in self.tree_alertas.get_children():
+                if self._linhas_alertas[int(outro)][-1] < deficit:
+                    break
+                posicao += 1
+            self.tree_alertas.insert('', posicao, iid=iid, values=valores)
+            self._linhas_alertas[id_produto] = valores
     
     def atualizar_alertas(self, produtos_criticos: list):
-        """Atualiza alertas de estoque crítico"""
-        self.tree_alertas.delete(*self.tree_alertas.get_children())
-        for p in produtos_criticos:
-            percentual = (p['qtd_estoque'] / p['qtd_minima']) * 100 if p['qtd_minima'] > 0 else 0
-            status = "🔴 CRÍTICO" if percentual < 50 else "🟡 ATENÇÃO"
-            self.tree_alertas.insert('', 'end', values=(
-                status, 
-                p['id_produto'], 
-                p['nome_produto'],
-                p['qtd_estoque'], 
-                p['qtd_minima'], 
-                p['deficit']
-            ))
+        """Atualiza alertas de estoque crítico aplicando só as diferenças"""
+        self._sincronizar_tree(self.tree_alertas, self._linhas_alertas,
+                               [(p['id_produto'], self._valores_alerta(p)) for p in produtos_criticos])
     
     def exibir_relatorio(self, texto_relatorio: str):
         """Exibe relatório na área de texto"""
         self.text_relatorio.delete('1.0', tk.END)
         self.text_relatorio.insert('1.0', texto_relatorio)
     
+    def definir_ocupado(self, ocupado: bool):
+        """Mostra/oculta o indicador de operação em andamento"""
+        self.label_status.configure(text="⏳ Processando..." if ocupado else "")
+        self.root.configure(cursor='watch' if ocupado else '')
+    
+    def definir_status(self, texto: str):
+        """Mostra um texto na barra de status (até a próxima mudança de estado)"""
+        self.label_status.configure(text=texto)
+    
+    def exibir_pendentes_diario(self, pendentes: int, erro: Optional[str] = None):
+        """Mostra quantas movimentações do diário local aguardam envio ao banco"""
+        if erro:
+            texto = f"📝 {pendentes} pendente(s) de envio — banco indisponível, tentando novamente"
+        elif pendentes:
+            texto = f"📝 {pendentes} pendente(s) de envio"
+        else:
+            texto = ""
+        self.label_diario.configure(text=texto)
+    
+    @staticmethod
+    def _descrever_diario(diario: Optional[dict]) -> str:
+        if not diario:
+            return ""
+        envio = diario['latencia_envio']
+        return (f"\nDiário: {diario['pendentes']} pendentes, {diario['aplicadas']} aplicadas, "
+                f"{diario['recusadas']} recusadas em {diario['lotes']} lotes "
+                f"(lote {diario['tamanho_lote']}, {diario['intervalo_ms']:.0f} ms), "
+                f"confirmação→banco p95 {envio['p95_ms']:.0f} ms")
+    
+    @staticmethod
+    def _descrever_alteracoes(alteracoes: Optional[dict]) -> str:
+        if not alteracoes:
+            return ""
+        return (f"\nAlterações de outros clientes: {alteracoes['consultas']} consultas "
+                f"({alteracoes['vazias']} sem novidade), {alteracoes['entregues']} produtos "
+                f"atualizados, {alteracoes['recargas']} recargas, "
+                f"próxima em {alteracoes['intervalo']:.0f} s")
+    
+    def perguntar_nova_tentativa(self, titulo: str, mensagem: str) -> bool:
+        """Pergunta se a operação que falhou deve ser repetida"""
+        return messagebox.askretrycancel(titulo, mensagem)
+    
     def mostrar_mensagem(self, titulo: str, mensagem: str, tipo: str = "info"):
         """Exibe mensagem para o usuário"""
         if tipo == "info":